@@ -6,6 +6,8 @@ from ScopusWp.wordpress import WordpressPublicationPostController
 
 from ScopusWp.config import Config, LoggingController
 
+from ScopusWp.progress import ProgressReporter
+
 from wordpress_xmlrpc.exceptions import InvalidCredentialsError
 
 from ScopusWp.reference import DATETIME_FORMAT
@@ -31,13 +33,36 @@ class TopController:
         self.wordpress_controller = WordpressPublicationPostController()
 
         self.config = Config.get_instance()
+        self.reporter = ProgressReporter.get_instance()
+
+        # The references and the backups of the posted publications are written by the write queue of the scopus
+        # controller, while the next publication is already being posted. Before reading the references, the queue
+        # has to be flushed
+        self.write_queue = self.scopus_controller.write_queue
+        self.write_queue.register('reference', self._insert_references, self.reference_controller.save)
+        self.write_queue.register('comment_reference', self._insert_comment_references, self.reference_controller.save)
+
+        # The publications posted on the website are never evicted from the size bounded cache
+        self.scopus_controller.cache_controller.add_pin_function(self._posted_scopus_ids)
 
     def close(self):
         self.logger.debug('Closing the top controller')
 
+        self.scopus_controller.close()
         self.reference_controller.close()
         self.logging_controller.close()
 
+    def _posted_scopus_ids(self):
+        return list(map(lambda x: int(x[2]), self.reference_controller.iter_all_references()))
+
+    def _insert_references(self, reference_list):
+        for reference in reference_list:
+            self.reference_controller.insert_reference(*reference)
+
+    def _insert_comment_references(self, comment_reference_list):
+        for comment_reference in comment_reference_list:
+            self.reference_controller.insert_comment_reference(*comment_reference)
+
     def update_website(self):
         # Getting all the publications that are saved in the backup system
         # Getting the user profiles of all the observed users
@@ -57,35 +82,45 @@ class TopController:
         :return: void
         """
         # Getting all the publications currently on the website
+        self.write_queue.flush()
         post_reference_list = self.reference_controller.select_all_references()
         # for each publication getting the comment reference and the new publication from scopus
         counter = 0
-        for post_reference in post_reference_list:
-            wordpress_post_id = post_reference[1]
-            updated_datetime = post_reference[3]
-            current_datetime = datetime.datetime.now()
-            update_interval = int(self.config['WORDPRESS']['update_expiration'])
-            if (current_datetime - updated_datetime).days < update_interval:
-                continue
-            amount_comments_posted = self.update_citations_post(wordpress_post_id)
-            counter += amount_comments_posted
-            if counter >= max_amount:
-                break
+        with self.reporter.task('update_citations_website', len(post_reference_list)) as progress_task:
+            for post_reference in post_reference_list:
+                progress_task.advance()
+                wordpress_post_id = post_reference[1]
+                updated_datetime = post_reference[3]
+                current_datetime = datetime.datetime.now()
+                update_interval = int(self.config['WORDPRESS']['update_expiration'])
+                if (current_datetime - updated_datetime).days < update_interval:
+                    continue
+                amount_comments_posted = self.update_citations_post(wordpress_post_id)
+                counter += amount_comments_posted
+                if counter >= max_amount:
+                    break
 
     def update_citations_post(self, wordpress_post_id):
 
         # Getting the list of all the comment publications from the comment reference database
+        self.write_queue.flush()
         comment_reference_list = self.reference_controller.select_comment_reference_list_py_post(wordpress_post_id)
         old_citation_list = list(map(lambda x: x[3], comment_reference_list))
         # Getting the post reference tuple
         post_reference = self.reference_controller.select_post_reference_by_wordpress(wordpress_post_id)
         post_scopus_id = post_reference[2]
         post_publication = self.scopus_controller.get_publication(post_scopus_id, caching=True)
-        # Saving the new publication into the backup system
-        self.scopus_controller.insert_publication_backup(post_publication)
-        new_citation_list = list(map(lambda x: int(x), post_publication.citations))
-        # Building the difference from the new and old citation list
-        difference = list(set(new_citation_list) - set(old_citation_list))
+        # Saving the new publication into the backup system. This only writes, if the content hash of the
+        # publication has changed since the last backup
+        changed = self.scopus_controller.insert_publication_backup(post_publication)
+        if changed:
+            self.scopus_controller.backup_controller.save()
+        else:
+            self.logger.info('Publication "{}" unchanged since the last backup'.format(post_scopus_id))
+        # Updating the citation graph with the current citations and getting those citing publications of the graph,
+        # which are not yet posted as comments
+        self.scopus_controller.insert_citations([post_publication])
+        difference = self.scopus_controller.get_missing_citing_ids(post_scopus_id, old_citation_list)
         # Requesting the publication itself from scopus to check for new citations
         counter = 0
         for scopus_id in difference:
@@ -93,7 +128,7 @@ class TopController:
             self.post_scopus_citation(post_publication, citation_publication)
             counter += 1
         # Updating the time, when was updated
-        self.reference_controller.insert_reference(*post_reference[:-1])
+        self.write_queue.put('reference', post_reference[:-1])
         return counter
 
     def update_publications_website(self):
@@ -115,10 +150,13 @@ class TopController:
         # Getting the new and relevant publications
         new_scopus_publication_list = self.new_scopus_publications()
         # Posting those new publications to the website
-        for scopus_publication in new_scopus_publication_list:
-            self.post_scopus_publication(scopus_publication)
-            reference = self.reference_controller.select_post_reference_by_scopus(int(scopus_publication))
-            self.update_citations_post(reference[1])
+        with self.reporter.task('populate_website', len(new_scopus_publication_list)) as progress_task:
+            for scopus_publication in new_scopus_publication_list:
+                self.post_scopus_publication(scopus_publication)
+                self.write_queue.flush()
+                reference = self.reference_controller.select_post_reference_by_scopus(int(scopus_publication))
+                self.update_citations_post(reference[1])
+                progress_task.advance()
 
     def new_scopus_publications(self):
         """
@@ -127,6 +165,7 @@ class TopController:
         :return: [ScopusPublication]
         """
         # Getting a list of all the scopus ids for the publications already in the website
+        self.write_queue.flush()
         reference_list = self.reference_controller.select_all_references()
         old_scopus_id_list = list(map(lambda x: x[2], reference_list))
 
@@ -172,16 +211,18 @@ class TopController:
         observed_publications_list = self.scopus_controller.get_publications_observed(caching=caching)
 
         # Uploading all the publications to the website
-        for publication in observed_publications_list:
-            self.post_scopus_publication(publication)
-
-            # posting all the citations as comments
-            citation_publication_list = self.scopus_controller.get_multiple_publications(
-                publication.citations,
-                caching=caching
-            )
-            for citation_scopus_publication in citation_publication_list:
-                self.post_scopus_citation(publication, citation_scopus_publication)
+        with self.reporter.task('repopulate_website', len(observed_publications_list)) as progress_task:
+            for publication in observed_publications_list:
+                self.post_scopus_publication(publication)
+
+                # posting all the citations as comments
+                citation_publication_list = self.scopus_controller.get_multiple_publications(
+                    publication.citations,
+                    caching=caching
+                )
+                for citation_scopus_publication in citation_publication_list:
+                    self.post_scopus_citation(publication, citation_scopus_publication)
+                progress_task.advance()
 
     def post_scopus_citation(self, post_publication, citation_scopus_publication):
         """
@@ -196,6 +237,7 @@ class TopController:
         """
         # Getting the wordpress id of the according post from the reference database
         scopus_id_post_publication = int(post_publication)
+        self.write_queue.flush()
         reference_tuple = self.reference_controller.select_post_reference_by_scopus(scopus_id_post_publication)
 
         # Posting the citation to the actual
@@ -206,12 +248,12 @@ class TopController:
                 wordpress_post_id,
                 [citation_publication]
             )[0]
-            self.reference_controller.insert_comment_reference(
+            self.write_queue.put('comment_reference', (
                 citation_publication.id,
                 wordpress_post_id,
                 wordpress_comment_id,
                 citation_scopus_publication.id
-            )
+            ))
             self.activity_logger.info(
                 'Comment posted, post id: {}, comment id: {}, scopus id: {}'.format(
                     wordpress_post_id,
@@ -235,10 +277,9 @@ class TopController:
             )
             print('No comment id returned')
 
-        # Saving the citation publication in the backup database for possible future use
-        self.scopus_controller.insert_publication_backup(citation_scopus_publication)
-        self.reference_controller.save()
-        self.scopus_controller.backup_controller.save()
+        # Saving the citation publication in the backup database for possible future use, but only writing it if
+        # the content has changed compared to the version already backed up
+        self.write_queue.put('publication_backup', citation_scopus_publication)
 
     def post_scopus_publication(self, scopus_publication):
         """
@@ -259,14 +300,11 @@ class TopController:
 
         # Posting this publication to the wordpress site
         wordpress_id = self.wordpress_controller.post_publication(publication, keywords)
-        # Saving the posting in the reference database
-        self.reference_controller.insert_reference(publication.id, wordpress_id, scopus_publication.id)
-        # Saving the publication to the backup system
-        self.scopus_controller.insert_publication_backup(scopus_publication)
-
-        # Saving the backup database and the reference database
-        self.scopus_controller.backup_controller.save()
-        self.reference_controller.save()
+        # Saving the posting in the reference database and the publication to the backup system. Both are written
+        # and saved by the write queue, while the next publication is being posted
+        self.write_queue.put('reference', (publication.id, wordpress_id, scopus_publication.id))
+        self.scopus_controller.cache_controller.pin_publications([int(scopus_publication)])
+        self.write_queue.put('publication_backup', scopus_publication)
 
         self.activity_logger.info(
             'Publication posted, post id: {}, scopus id:{}, internal id:{}'.format(
@@ -280,8 +318,9 @@ class TopController:
 
     def wipe_website(self):
         # Getting all the wordpress ids from the reference database to delete all the posts from the website
-        reference_list = self.reference_controller.select_all_references()
-        for reference in reference_list:
+        self.write_queue.flush()
+        # The references are streamed from the database, as the table can get too large to be loaded at once
+        for reference in self.reference_controller.iter_all_references():
             wordpress_id = reference[1]
             self.wordpress_controller.delete_post(wordpress_id)
         self.logger.info('wiped all posts in the reference table from the website')
@@ -1,16 +1,49 @@
-from ScopusWp.config import Config
+from ScopusWp.config import Config, PROJECT_PATH
 from ScopusWp.config import SQL_LOGGING_EXTENSION
 
+import collections
+import contextlib
+import threading
+import datetime
 import logging
+import queue
+import sqlite3
+import time
+import os
 
-import MySQLdb
+# The MySQL driver and sqlalchemy are only needed for the MySQL backend, a deployment using the embedded SQLite
+# backend can run without them
+try:
+    import MySQLdb
+    from MySQLdb.cursors import SSCursor
+except ImportError:
+    MySQLdb = None
+    SSCursor = None
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
+# The memory mapped key value store is only needed for the LMDB cache backend
+try:
+    import lmdb
+except ImportError:
+    lmdb = None
 
-from sqlalchemy.ext.declarative import declarative_base
+try:
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker, Session
 
-from IndicoWp.config import Config
+    from sqlalchemy.ext.declarative import declarative_base
+except ImportError:
+    create_engine = None
+
+
+def placeholders(amount):
+    """
+    The comma separated list of the given amount of "%s" placeholders, to be used within the brackets of an IN clause
+    of a parameterized sql statement.
+
+    :param amount: The int amount of placeholders
+    :return: The string
+    """
+    return ', '.join(['%s'] * amount)
 
 
 def get_or_create(session, model, **kwargs):
@@ -71,13 +104,196 @@ class MySQLDatabase:
 ######################
 
 
+class ConnectionPool:
+    """
+    A thread safe pool of DB-API connections.
+
+    Every thread checks out its own connection, which stays bound to the thread until it is released again, so that
+    the transaction of one thread is never mixed up with the one of another thread. At most "size" connections are
+    open at the same time, a thread asking for a connection, while all of them are checked out, waits until one is
+    released. The connections of threads, which have ended without releasing them, are reclaimed.
+
+    A connection, which has not been used for longer than the health check interval is pinged before it is handed out
+    again and replaced by a new connection, if the ping fails.
+
+    The pool also keeps the amount of the uncommitted operations of every connection, as all the database access
+    objects of a thread share the transaction of its connection. A connection with uncommitted operations is neither
+    replaced nor released, as those operations would be lost without notice.
+    """
+    def __init__(self, connect_function, ping_function, size=8, health_check_interval=30):
+        # The function without arguments, that creates a new connection and the function, that takes a connection and
+        # raises an exception, if the connection is not usable anymore
+        self.connect_function = connect_function
+        self.ping_function = ping_function
+
+        self.size = size
+        self.health_check_interval = health_check_interval
+
+        # The connections, which are currently not checked out by any thread
+        self.idle_list = []
+        # The checked out connections with the threads as keys
+        self.checkout_dict = {}
+        # The time each connection was last handed out, with the id of the connection as key
+        self.used_dict = {}
+        # The amount of uncommitted operations on each connection and the time of the first one, with the id of the
+        # connection as key
+        self.pending_dict = {}
+
+        self.condition = threading.Condition()
+        self.local = threading.local()
+
+        self.logger = logging.getLogger('ConnectionPool')
+
+    def connection(self):
+        """
+        The connection of the current thread. If the thread does not have a connection yet, one is checked out.
+
+        :return: The DB-API connection object
+        """
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = self._checkout()
+            self.local.connection = connection
+
+        elif time.monotonic() - self.used_dict.get(id(connection), 0) > self.health_check_interval:
+            connection = self._check_health(connection)
+
+        self.used_dict[id(connection)] = time.monotonic()
+        return connection
+
+    def pending(self):
+        """
+        The uncommitted operations on the connection of the current thread. The returned list is shared by all the
+        database access objects, which use the connection, and is changed by them in place.
+
+        :return: A list with the int amount of the operations and the monotonic time of the first one or None
+        """
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            return [0, None]
+        with self.condition:
+            return self.pending_dict.setdefault(id(connection), [0, None])
+
+    def _checkout(self):
+        with self.condition:
+            while True:
+                if len(self.idle_list) != 0:
+                    connection = self.idle_list.pop()
+                    break
+
+                if len(self.checkout_dict) < self.size:
+                    connection = self.connect_function()
+                    break
+
+                # Reclaiming the connections of the threads, that have ended in the meantime
+                for thread in list(self.checkout_dict.keys()):
+                    if not thread.is_alive():
+                        self._discard(self.checkout_dict.pop(thread))
+                if len(self.checkout_dict) < self.size:
+                    continue
+
+                self.condition.wait(timeout=1)
+
+            self.checkout_dict[threading.current_thread()] = connection
+
+        if id(connection) in self.used_dict:
+            connection = self._check_health(connection)
+        return connection
+
+    def _check_health(self, connection):
+        try:
+            self.ping_function(connection)
+            return connection
+        except Exception as exception:
+            self.logger.warning('The connection failed the health check with "{}", reconnecting'.format(exception))
+
+        # The transaction of a lost connection is gone, its uncommitted operations are reported after the reconnect
+        with self.condition:
+            operations = self.pending_dict.get(id(connection), [0, None])[0]
+        connection = self.reconnect(force=True)
+        if operations != 0:
+            raise RuntimeError('The connection was lost with {} uncommitted operations'.format(operations))
+        return connection
+
+    def reconnect(self, force=False):
+        """
+        Closes the connection of the current thread and replaces it with a new connection.
+
+        :param force: Whether to replace the connection even if it has uncommitted operations, which are discarded
+        :return: The new DB-API connection object
+        """
+        operations = self.pending()[0]
+        if operations != 0 and not force:
+            raise RuntimeError('The connection can not be replaced with {} uncommitted operations'.format(operations))
+
+        connection = self.connect_function()
+        with self.condition:
+            old_connection = self.checkout_dict.get(threading.current_thread())
+            if old_connection is not None:
+                self._discard(old_connection)
+            self.checkout_dict[threading.current_thread()] = connection
+        self.local.connection = connection
+        self.used_dict[id(connection)] = time.monotonic()
+        return connection
+
+    def release(self):
+        """
+        Puts the connection of the current thread back into the pool. The pending operations have to be committed
+        or rolled back before.
+
+        :return: void
+        """
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            return
+
+        operations = self.pending()[0]
+        if operations != 0:
+            raise RuntimeError('The connection can not be released with {} uncommitted operations'.format(operations))
+
+        self.local.connection = None
+        with self.condition:
+            self.pending_dict.pop(id(connection), None)
+        try:
+            connection.rollback()
+        except Exception:
+            connection = None
+
+        with self.condition:
+            self.checkout_dict.pop(threading.current_thread(), None)
+            if connection is not None:
+                self.idle_list.append(connection)
+            self.condition.notify()
+
+    def _discard(self, connection):
+        self.used_dict.pop(id(connection), None)
+        self.pending_dict.pop(id(connection), None)
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def close(self):
+        """
+        Closes all the connections of the pool.
+
+        :return: void
+        """
+        with self.condition:
+            for connection in self.idle_list + list(self.checkout_dict.values()):
+                self._discard(connection)
+            self.idle_list = []
+            self.checkout_dict = {}
+            self.condition.notify_all()
+        self.local = threading.local()
+
+
 class Db:
     """
-    This is the singleton class which manages the database connection object.
-    On the first call to the get instance method a new "MySQLdb" connection object is being created using the database
-    name, username and password given in the config file of the project.
-    The connection object is stored in a class variable and is returned each time the get instance method is called
-    again.
+    This is the singleton class which manages the pool of the MySQL database connections.
+    On the first call to the get instance method a new pool is created, whose connections use the database name,
+    username and password given in the config file of the project. The size of the pool and the interval of the health
+    checks are set with the "pool_size" and "health_check_interval" of the "DATABASE" section in the config.
     """
     _instance = None
 
@@ -87,12 +303,12 @@ class Db:
     @staticmethod
     def get_instance():
         """
-        This method returns the connection object for the database that is stored inside this singleton.
+        This method returns the connection pool for the database that is stored inside this singleton.
 
-        :return: MySQLdb.connect() object
+        :return: ConnectionPool
         """
-        # In case this is the first call to the method a new connection object will be created and saved in the static
-        # class variable.
+        # In case this is the first call to the method a new pool will be created and saved in the static class
+        # variable.
         if Db._instance is None:
             Db.new_instance()
 
@@ -102,16 +318,27 @@ class Db:
     @staticmethod
     def new_instance():
         """
-        This method creates the new database connection object from the database name, the username and password in
-        the config file of the project and then saves the object in the class variable
+        This method creates the new connection pool from the database name, the username and password in the config
+        file of the project and then saves the object in the class variable
         :return:
         """
         config = Config.get_instance()
         database = config['MYSQL']['database']
         username = config['MYSQL']['username']
         password = config['MYSQL']['password']
-        connector = MySQLdb.connect(host='localhost', user=username, passwd=password, db=database)
-        Db._instance = connector
+
+        def connect():
+            return MySQLdb.connect(host='localhost', user=username, passwd=password, db=database)
+
+        def ping(connection):
+            connection.ping()
+
+        Db._instance = ConnectionPool(
+            connect,
+            ping,
+            size=config.getint('DATABASE', 'pool_size', fallback=8),
+            health_check_interval=config.getfloat('DATABASE', 'health_check_interval', fallback=30)
+        )
 
 
 class SQLDatabaseAccessInterface:
@@ -136,57 +363,426 @@ class SQLDatabaseAccessInterface:
         """
         raise NotImplementedError()
 
-    def execute(self, sql):
+    def execute(self, sql, parameters=None):
         """
         Supposed to execute a sql command without return
 
         :param sql: The string sql code to return
+        :param parameters: The optional tuple of values for the placeholders in the sql code
         :return: void
         """
         raise NotImplementedError()
 
-    def select(self, sql):
+    def select(self, sql, parameters=None):
         """
         Supposed to execute a sql command and then return a list of lists, where each sub list represents one row
         in the database.
 
         :param sql: The string sql command to return
+        :param parameters: The optional tuple of values for the placeholders in the sql command
         :return: A list of lists
         """
         raise NotImplementedError()
 
+    def execute_many(self, sql, parameter_list, chunk_size=None):
+        """
+        Supposed to execute the parameterized sql command once for every parameter tuple in the given list, in chunks
+        of the given size, but all within one single transaction.
 
-class MySQLDatabaseAccess(SQLDatabaseAccessInterface):
+        :param sql: The string sql command with the parameter placeholders
+        :param parameter_list: A list of parameter tuples, one for each execution of the command
+        :param chunk_size: The int amount of parameter tuples to be sent to the database at once
+        :return: void
+        """
+        raise NotImplementedError()
+
+    def iter_select(self, sql, parameters=None, fetch_size=None):
+        """
+        Supposed to execute a sql select command and then return a generator over the rows, which only keeps the
+        given amount of rows in memory at a time.
+
+        :param sql: The string sql command
+        :param parameters: The optional tuple of values for the placeholders in the sql command
+        :param fetch_size: The int amount of rows to be fetched from the database at once
+        :return: A generator of row tuples
+        """
+        raise NotImplementedError()
+
+
+class SQLDialect:
     """
-    MySQL database access wrapper.
-    THis class implements the SQL database access interface.
-    it is used to execute Insert, update statements onto the database or fetch rows of data with the select statement.
-    This wrapper is to be used everywhere, where a interface to the mysql database is needed.
+    Base class for the differences in the sql syntax between the database backends.
+
+    All the models write their parameterized sql with the "%s" placeholders of the MySQL driver. The dialect converts
+    those into the placeholders of its backend and creates those statements, whose syntax is not portable, like the
+    upsert or the truncation of a table.
     """
-    def __init__(self):
-        # Getting the database access from the singleton and creating a new cursor to interact with the database
-        self.db = Db.get_instance()
-        self.cursor = self.db.cursor()
+    name = None
+
+    def prepare(self, sql):
+        """
+        Converts the given parameterized sql with "%s" placeholders into the placeholder style of the backend.
+
+        :param sql: The sql string
+        :return: The sql string for the backend
+        """
+        return sql
+
+    def server_side_cursor(self, connection):
+        """
+        A new cursor of the given connection, which leaves the result set of a query on the server and only
+        transfers the rows, when they are fetched.
+
+        :param connection: The DB-API connection object
+        :return: The cursor object
+        """
+        return connection.cursor()
+
+    def begin(self, connection):
+        """
+        Makes sure, that a transaction is open on the given connection, so that a savepoint does not start and end a
+        transaction on its own.
+
+        :param connection: The DB-API connection object
+        :return: void
+        """
+        pass
+
+    def upsert_sql(self, database_name, column_list, key_column_list):
+        """
+        The parameterized sql statement for inserting a row into the given table, which updates all the columns of
+        the row, in case a row with the same key already exists.
+
+        :param database_name: The name of the table
+        :param column_list: The list of the column names, in the order of the parameters
+        :param key_column_list: The list of the column names, that make up the primary key of the table
+        :return: The sql string using "%s" placeholders
+        """
+        raise NotImplementedError()
+
+    def insert_ignore_sql(self, database_name, column_list):
+        """
+        The parameterized sql statement for inserting a row into the given table, which does nothing, in case a row
+        with the same key already exists.
+
+        :param database_name: The name of the table
+        :param column_list: The list of the column names, in the order of the parameters
+        :return: The sql string using "%s" placeholders
+        """
+        raise NotImplementedError()
+
+    def truncate_sql(self, database_name):
+        """
+        The sql statement, that deletes all the rows of the given table.
+
+        :param database_name: The name of the table
+        :return: The sql string
+        """
+        raise NotImplementedError()
+
+    def is_disconnect(self, exception):
+        """
+        Whether the given exception, raised by the driver, means that the connection to the database has been lost.
+
+        :param exception: The exception object
+        :return: boolean
+        """
+        return False
+
+
+class MySQLDialect(SQLDialect):
+
+    name = 'mysql'
+
+    def server_side_cursor(self, connection):
+        # The default cursor of the MySQL driver copies the whole result set into the memory of the client
+        return connection.cursor(SSCursor)
+
+    def is_disconnect(self, exception):
+        # 2006 "server has gone away", 2013 "lost connection during query", 2055 "lost connection at ..."
+        return isinstance(exception, MySQLdb.OperationalError) and len(exception.args) != 0 and \
+            exception.args[0] in (2006, 2013, 2055)
+
+    def upsert_sql(self, database_name, column_list, key_column_list):
+        sql = (
+            'INSERT INTO {database} ({columns}) '
+            'VALUES ({placeholders}) '
+            'ON DUPLICATE KEY UPDATE {updates};'
+        ).format(
+            database=database_name,
+            columns=', '.join(column_list),
+            placeholders=', '.join(['%s'] * len(column_list)),
+            updates=', '.join(map(lambda x: '{0} = VALUES({0})'.format(x), column_list))
+        )
+        return sql
+
+    def insert_ignore_sql(self, database_name, column_list):
+        sql = (
+            'INSERT IGNORE INTO {database} ({columns}) '
+            'VALUES ({placeholders});'
+        ).format(
+            database=database_name,
+            columns=', '.join(column_list),
+            placeholders=', '.join(['%s'] * len(column_list))
+        )
+        return sql
+
+    def truncate_sql(self, database_name):
+        return 'TRUNCATE TABLE {};'.format(database_name)
+
+
+class SQLiteDialect(SQLDialect):
+
+    name = 'sqlite'
+
+    def prepare(self, sql):
+        return sql.replace('%s', '?')
+
+    def begin(self, connection):
+        # The driver only opens a transaction on its own before data changing statements, not before a savepoint
+        if not connection.in_transaction:
+            connection.execute('BEGIN;')
+
+    def upsert_sql(self, database_name, column_list, key_column_list):
+        update_column_list = list(filter(lambda x: x not in key_column_list, column_list))
+        sql = (
+            'INSERT INTO {database} ({columns}) '
+            'VALUES ({placeholders}) '
+            'ON CONFLICT ({keys}) DO UPDATE SET {updates};'
+        ).format(
+            database=database_name,
+            columns=', '.join(column_list),
+            placeholders=', '.join(['%s'] * len(column_list)),
+            keys=', '.join(key_column_list),
+            updates=', '.join(map(lambda x: '{0} = excluded.{0}'.format(x), update_column_list))
+        )
+        return sql
+
+    def insert_ignore_sql(self, database_name, column_list):
+        sql = (
+            'INSERT OR IGNORE INTO {database} ({columns}) '
+            'VALUES ({placeholders});'
+        ).format(
+            database=database_name,
+            columns=', '.join(column_list),
+            placeholders=', '.join(['%s'] * len(column_list))
+        )
+        return sql
+
+    def truncate_sql(self, database_name):
+        return 'DELETE FROM {};'.format(database_name)
+
+
+class DBAPIDatabaseAccess(SQLDatabaseAccessInterface):
+    """
+    Base class for the database access wrappers of all the backends, whose driver implements the python DB-API.
+
+    The subclasses only have to pass the connection object and the sql dialect of their backend. The statements are
+    executed as a unit of work: they are collected in one open transaction, which is committed once the amount of
+    'commit_interval' operations have been executed or the first pending operation is older than 'commit_seconds'
+    (both from the "DATABASE" section of the config) and at the latest with the next call to the save method.
+    With a commit interval of 1 every statement is committed right away.
+    """
+    SAVEPOINT_SQL = 'SAVEPOINT bulk;'
+    ROLLBACK_SAVEPOINT_SQL = 'ROLLBACK TO SAVEPOINT bulk;'
+    RELEASE_SAVEPOINT_SQL = 'RELEASE SAVEPOINT bulk;'
+    ATOMIC_SAVEPOINT_SQL = 'SAVEPOINT atomic_{};'
+    ATOMIC_ROLLBACK_SQL = 'ROLLBACK TO SAVEPOINT atomic_{};'
+    ATOMIC_RELEASE_SQL = 'RELEASE SAVEPOINT atomic_{};'
+
+    def __init__(self, pool, dialect, logger_name):
+        # Every thread uses its own connection from the pool and its own cursor for this connection. The unit of work
+        # counters belong to the transaction of the connection and are therefore kept by the pool
+        self.pool = pool  # type: ConnectionPool
+        self.local = threading.local()
+
+        self.dialect = dialect  # type: SQLDialect
+
+        # The default amount of rows to be sent to the database with one bulk statement
+        self.config = Config.get_instance()
+        self.chunk_size = self.config.getint('MYSQL', 'bulk_chunk_size', fallback=500)
+        # The default amount of rows to be fetched at once, when iterating over a result set
+        self.fetch_size = self.config.getint('DATABASE', 'fetch_size', fallback=1000)
+
+        # The parameterized statements, which have already been converted into the placeholder style of the backend.
+        # As the values are never part of the sql string, the same statement string is reused for every call, which
+        # also lets the driver reuse its compiled statement (SQLite) or batch the rows of an executemany (MySQL)
+        self.statement_cache_size = self.config.getint('DATABASE', 'statement_cache_size', fallback=256)
+        self.statement_cache = collections.OrderedDict()
+        self.statement_lock = threading.Lock()
+
+        # The limits for the open transaction, after which the pending operations are committed automatically
+        self.commit_interval = max(1, self.config.getint('DATABASE', 'commit_interval', fallback=500))
+        self.commit_seconds = self.config.getfloat('DATABASE', 'commit_seconds', fallback=10.0)
 
         # Getting the according logger
-        self.logger = logging.getLogger('MYSQLDatabaseAccess')
+        self.logger = logging.getLogger(logger_name)
+
+    @property
+    def db(self):
+        """
+        The connection of the current thread, checked out from the pool.
+
+        :return: The DB-API connection object
+        """
+        return self.pool.connection()
+
+    @property
+    def cursor(self):
+        """
+        The cursor of the current thread. A new one is created, whenever the connection of the thread has changed.
+
+        :return: The DB-API cursor object
+        """
+        connection = self.db
+        if getattr(self.local, 'connection', None) is not connection:
+            self.local.connection = connection
+            self.local.cursor = connection.cursor()
+        return self.local.cursor
+
+    @property
+    def pending_operations(self):
+        return self.pool.pending()[0]
+
+    @pending_operations.setter
+    def pending_operations(self, value):
+        self.pool.pending()[0] = value
+
+    @property
+    def pending_since(self):
+        return self.pool.pending()[1]
+
+    @pending_since.setter
+    def pending_since(self, value):
+        self.pool.pending()[1] = value
+
+    def release(self):
+        """
+        Commits the pending operations of the current thread and returns its connection to the pool. This is supposed
+        to be called by worker threads, once they are done with the database.
+
+        :return: void
+        """
+        self.save_pending()
+        self.local.connection = None
+        self.local.cursor = None
+        self.pool.release()
 
     def save(self):
-        #self.db.commit()
-        #self.cursor.close()
-        #self.cursor = self.db.cursor()
-        a = 1
+        """
+        Commits all the operations pending in the current transaction.
 
-    def execute(self, sql):
+        :return: void
         """
-        Executes the given string of sql statements on the mysql database of this project, which is specified in the
-        config file.
+        self.db.commit()
+        self.pending_operations = 0
+        self.pending_since = None
+
+    def save_pending(self):
+        """
+        Commits the operations pending in the current transaction, if there are any.
+
+        :return: void
+        """
+        if self.pending_operations != 0:
+            self.save()
+
+    def rollback(self):
+        """
+        Discards all the operations pending in the current transaction.
 
-        :param sql: The string of sql code.
         :return: void
         """
+        self.db.rollback()
+        if self.pending_operations != 0:
+            self.logger.warning('Rolled back {} pending operations'.format(self.pending_operations))
+        self.pending_operations = 0
+        self.pending_since = None
+
+    def prepare(self, sql):
+        """
+        The parameterized sql statement in the placeholder style of the backend, taken from the statement cache.
+
+        :param sql: The sql string using "%s" placeholders
+        :return: The sql string for the backend
+        """
+        with self.statement_lock:
+            statement = self.statement_cache.get(sql)
+            if statement is None:
+                statement = self.dialect.prepare(sql)
+                self.statement_cache[sql] = statement
+                if len(self.statement_cache) > self.statement_cache_size:
+                    self.statement_cache.popitem(last=False)
+            else:
+                self.statement_cache.move_to_end(sql)
+            return statement
+
+    def _register_operations(self, amount):
+        # Adding the executed operations to the open transaction and committing the transaction, if one of the
+        # limits is reached. The time limit is only checked here, when a new operation is executed
+        if self.pending_since is None:
+            self.pending_since = time.monotonic()
+        self.pending_operations += amount
+        self._save_if_due()
+
+    def _save_if_due(self):
+        # Within an atomic block the transaction must not be committed, as that would end its savepoint
+        if self.pending_operations == 0 or self._atomic_depth() != 0:
+            return
+        if self.pending_operations >= self.commit_interval or \
+                time.monotonic() - self.pending_since >= self.commit_seconds:
+            self.save()
+
+    def _atomic_depth(self):
+        return getattr(self.local, 'atomic_depth', 0)
+
+    @contextlib.contextmanager
+    def atomic(self):
+        """
+        A block of statements, which are applied as a whole or not at all.
+
+        The statements of the block are executed within a savepoint of the open transaction. If the block raises an
+        exception, the transaction is rolled back to the savepoint, so that none of its statements remain pending,
+        while the operations pending from before the block are kept. The transaction is not committed automatically
+        within the block, only after it, if one of the limits of the unit of work is reached. Blocks can be nested.
+
+        :return: A context manager
+        """
+        depth = self._atomic_depth() + 1
+        pending_operations = self.pending_operations
+        cursor = self.cursor
+        self.dialect.begin(self.db)
+        cursor.execute(self.ATOMIC_SAVEPOINT_SQL.format(depth))
+        self.local.atomic_depth = depth
         try:
-            self.cursor.execute(sql)
+            yield
+            cursor.execute(self.ATOMIC_RELEASE_SQL.format(depth))
+        except Exception:
+            try:
+                cursor.execute(self.ATOMIC_ROLLBACK_SQL.format(depth))
+                cursor.execute(self.ATOMIC_RELEASE_SQL.format(depth))
+                self.pending_operations = pending_operations
+            except Exception:
+                # Without the savepoint, the state of the transaction is unknown
+                self.rollback()
+            raise
+        finally:
+            self.local.atomic_depth = depth - 1
+        self._save_if_due()
+
+    def _execute(self, sql, parameters=None):
+        try:
+            try:
+                self._execute_cursor(sql, parameters)
+            except Exception as exception:
+                # A connection, that has been lost (server restart, timeout) is replaced and the statement is tried
+                # once more, but only if no operations or savepoints of the open transaction would be lost with it
+                if not self.dialect.is_disconnect(exception) or self.pending_operations != 0 or \
+                        self._atomic_depth() != 0:
+                    raise exception
+                self.logger.warning('The database connection was lost, reconnecting')
+                self.pool.reconnect()
+                self._execute_cursor(sql, parameters)
         except Exception as exception:
             # Logging the error
             error_string = (
@@ -199,16 +795,81 @@ class MySQLDatabaseAccess(SQLDatabaseAccessInterface):
             # Actually raising an exception
             raise exception
 
-    def select(self, sql):
+    def _execute_cursor(self, sql, parameters):
+        if parameters is None:
+            self.cursor.execute(sql)
+        else:
+            self.cursor.execute(self.prepare(sql), parameters)
+
+    def execute(self, sql, parameters=None):
+        """
+        Executes the given sql statement on the database of this project, which is specified in the config file.
+        The statement is committed together with the other pending operations, see the class description.
+
+        :param sql: The string of sql code.
+        :param parameters: The optional tuple of values for the "%s" placeholders in the sql code, which will be
+            escaped by the driver
+        :return: void
+        """
+        self._execute(sql, parameters)
+        self._register_operations(1)
+
+    def execute_many(self, sql, parameter_list, chunk_size=None):
+        """
+        Executes the parameterized sql statement for every parameter tuple in the given list.
+
+        The parameter tuples are sent to the database in chunks of the given size (on default the 'bulk_chunk_size'
+        of the config), which lets the driver turn a single row insert statement into a multi row insert. Every row
+        counts as one operation of the open transaction. The chunks are executed within a savepoint, so that if any
+        of them fails, only the rows of this call are rolled back and the other pending operations of the transaction
+        are kept.
+
+        :param sql: The string sql statement using "%s" as the placeholders for the parameters
+        :param parameter_list: A list of parameter tuples, one for each row
+        :param chunk_size: The int amount of rows per chunk
+        :return: void
+        """
+        if chunk_size is None:
+            chunk_size = self.chunk_size
+
+        cursor = self.cursor
+        self.dialect.begin(self.db)
+        cursor.execute(self.SAVEPOINT_SQL)
+        try:
+            for index in range(0, len(parameter_list), chunk_size):
+                chunk_list = parameter_list[index:index + chunk_size]
+                cursor.executemany(self.prepare(sql), chunk_list)
+            cursor.execute(self.RELEASE_SAVEPOINT_SQL)
+        except Exception as exception:
+            try:
+                cursor.execute(self.ROLLBACK_SAVEPOINT_SQL)
+                cursor.execute(self.RELEASE_SAVEPOINT_SQL)
+            except Exception:
+                # Without the savepoint, the state of the transaction is unknown
+                self.rollback()
+            # Logging the error
+            error_string = (
+                'During the bulk handling of the SQL expression "{}" with {} rows occurred the exception "{}"'
+            ).format(
+                str(sql).replace('\n', ' '),
+                len(parameter_list),
+                str(exception).replace('\n', ' ')
+            )
+            self.logger.error(error_string)
+            raise exception
+        self._register_operations(len(parameter_list))
+
+    def select(self, sql, parameters=None):
         """
         Executes the sql code string on the database and returns the list of rows selected.
         This method is supposed to be used with the select statement.
 
         :param sql: The sql code string.
+        :param parameters: The optional tuple of values for the "%s" placeholders in the sql code
         :return: [data tuples, each one for one row, that matches the select statement]
         """
         # First: Actually executing the sql command
-        self.execute(sql)
+        self._execute(sql, parameters)
 
         # Second: iterating through the contents of the cursor
         row_list = []
@@ -226,3 +887,394 @@ class MySQLDatabaseAccess(SQLDatabaseAccessInterface):
                 )
                 self.logger.error(error_message)
         return row_list
+
+    def iter_select(self, sql, parameters=None, fetch_size=None):
+        """
+        Executes the sql select statement with a server side cursor and returns a generator over the rows, which
+        fetches them in batches of the given size (on default the 'fetch_size' of the "DATABASE" section in the
+        config). This way the memory stays flat, no matter how many rows the result set has.
+
+        With the MySQL backend the connection can not be used for other statements, until the generator is either
+        exhausted or closed.
+
+        :param sql: The sql code string
+        :param parameters: The optional tuple of values for the "%s" placeholders in the sql code
+        :param fetch_size: The int amount of rows to be fetched at once
+        :return: A generator of row tuples
+        """
+        if fetch_size is None:
+            fetch_size = self.fetch_size
+
+        cursor = self.dialect.server_side_cursor(self.db)
+        try:
+            if parameters is None:
+                cursor.execute(sql)
+            else:
+                cursor.execute(self.prepare(sql), parameters)
+
+            row_list = cursor.fetchmany(fetch_size)
+            while len(row_list) != 0:
+                for row in row_list:
+                    yield row
+                row_list = cursor.fetchmany(fetch_size)
+        except Exception as exception:
+            error_string = (
+                'During the iteration of the SQL expression "{}" occurred the following exception "{}"'
+            ).format(
+                str(sql).replace('\n', ' '),
+                str(exception).replace('\n', ' ')
+            )
+            self.logger.error(error_string)
+            raise exception
+        finally:
+            cursor.close()
+
+
+class MySQLDatabaseAccess(DBAPIDatabaseAccess):
+    """
+    MySQL database access wrapper.
+    THis class implements the SQL database access interface.
+    it is used to execute Insert, update statements onto the database or fetch rows of data with the select statement.
+    This wrapper is to be used everywhere, where a interface to the mysql database is needed.
+    """
+    def __init__(self):
+        # Getting the database access from the singleton
+        DBAPIDatabaseAccess.__init__(self, Db.get_instance(), MySQLDialect(), 'MYSQLDatabaseAccess')
+
+
+class SQLiteDb:
+    """
+    The singleton class which manages the connection pool for the embedded SQLite database.
+    On the first call to the get instance method the database file given by the "path" of the "SQLITE" section in the
+    config is opened (in the project folder on default) and all the tables are created, if they do not exist yet.
+    The database is used in the WAL journal mode, so that the connections of the other threads and processes can read,
+    while one of them is writing.
+    """
+    _instance = None
+
+    @staticmethod
+    def get_instance():
+        if SQLiteDb._instance is None:
+            SQLiteDb.new_instance()
+
+        return SQLiteDb._instance
+
+    @staticmethod
+    def new_instance():
+        from ScopusWp.install import SQLITE_SQL, MIGRATION_COLUMNS, MIGRATION_TIMESTAMPS
+
+        config = Config.get_instance()
+        path = config.get('SQLITE', 'path', fallback='')
+        if path == '':
+            path = os.path.join(PROJECT_PATH, 'scopus.db')
+
+        # The declared types are parsed, so that the datetime columns are returned as datetime objects, just like
+        # they are by the MySQL driver. Each connection keeps the compiled versions of the most recently used
+        # statements. A connection waits for the write lock of another connection, instead of failing right away
+        def connect():
+            connection = sqlite3.connect(
+                path,
+                timeout=30,
+                detect_types=sqlite3.PARSE_DECLTYPES,
+                check_same_thread=False,
+                cached_statements=config.getint('DATABASE', 'statement_cache_size', fallback=256)
+            )
+            connection.execute('PRAGMA journal_mode=WAL;')
+            connection.execute('PRAGMA synchronous=NORMAL;')
+            return connection
+
+        def ping(connection):
+            connection.execute('SELECT 1;')
+
+        connector = connect()
+
+        # Creating all the tables with the table names given in the config
+        table_name_dict = {
+            'publication_cache': config.get('MYSQL', 'publication_cache_table', fallback='publication_cache'),
+            'author_cache': config.get('MYSQL', 'author_cache_table', fallback='author_cache'),
+            'reference': config.get('MYSQL', 'post_reference_table', fallback='reference'),
+            'comment_reference': config.get('MYSQL', 'comment_reference_table', fallback='comment_reference')
+        }
+        schema_sql = SQLITE_SQL.format(
+            publication_cache_table=table_name_dict['publication_cache'],
+            author_cache_table=table_name_dict['author_cache'],
+            post_reference_table=table_name_dict['reference'],
+            comment_reference_table=table_name_dict['comment_reference']
+        )
+        connector.executescript(schema_sql)
+
+        # Adding the columns, which are missing in database files created by an older version
+        for table_name, column_name, _, column_definition in MIGRATION_COLUMNS:
+            database_name = table_name_dict.get(table_name, table_name)
+            column_name_list = [row[1] for row in connector.execute('PRAGMA table_info({});'.format(database_name))]
+            if column_name not in column_name_list:
+                sql = 'ALTER TABLE {} ADD COLUMN {} {};'.format(database_name, column_name, column_definition)
+                connector.execute(sql)
+                # The existing entries count as fetched at the time of the migration
+                if (table_name, column_name) in MIGRATION_TIMESTAMPS:
+                    sql = 'UPDATE {0} SET {1}=? WHERE {1} IS NULL;'.format(database_name, column_name)
+                    connector.execute(sql, (datetime.datetime.now().replace(microsecond=0), ))
+        connector.commit()
+
+        pool = ConnectionPool(
+            connect,
+            ping,
+            size=config.getint('DATABASE', 'pool_size', fallback=8),
+            health_check_interval=config.getfloat('DATABASE', 'health_check_interval', fallback=30)
+        )
+        # The connection, that created the tables is the first idle connection of the pool
+        pool.idle_list.append(connector)
+        SQLiteDb._instance = pool
+
+
+class SQLiteDatabaseAccess(DBAPIDatabaseAccess):
+    """
+    SQLite database access wrapper.
+    Implements the SQL database access interface for the embedded SQLite database, which can be used instead of the
+    MySQL server by setting the "backend" of the "DATABASE" section in the config to "sqlite".
+    """
+    def __init__(self):
+        DBAPIDatabaseAccess.__init__(self, SQLiteDb.get_instance(), SQLiteDialect(), 'SQLiteDatabaseAccess')
+
+
+class LMDBDb:
+    """
+    The singleton class which manages the environment of the memory mapped LMDB key value store.
+    On the first call to the get instance method the environment folder given by the "path" of the "LMDB" section in
+    the config is opened (the folder "cache.lmdb" in the project folder on default). An environment can only be opened
+    once per process, but any number of processes can open it at the same time and read from it in parallel.
+    """
+    _instance = None
+
+    @staticmethod
+    def get_instance():
+        if LMDBDb._instance is None:
+            LMDBDb.new_instance()
+
+        return LMDBDb._instance
+
+    @staticmethod
+    def new_instance():
+        if lmdb is None:
+            raise ImportError('The LMDB cache backend needs the "lmdb" package to be installed')
+
+        config = Config.get_instance()
+        path = config.get('LMDB', 'path', fallback='')
+        if path == '':
+            path = os.path.join(PROJECT_PATH, 'cache.lmdb')
+        # The map size is the maximum size the store can grow to, it is only reserved as address space, not memory
+        map_size = config.getint('LMDB', 'map_size', fallback=4 * 1024 ** 3)
+
+        environment = lmdb.open(
+            path,
+            map_size=map_size,
+            max_dbs=8,
+            max_readers=126,
+            readahead=False
+        )
+        LMDBDb._instance = environment
+
+
+def create_database_access():
+    """
+    Creates the database access wrapper for the backend given by the "backend" of the "DATABASE" section in the
+    config, which is either "mysql" (default) or "sqlite".
+
+    :return: The SQLDatabaseAccessInterface object
+    """
+    config = Config.get_instance()
+    backend = config.get('DATABASE', 'backend', fallback='mysql')
+
+    if backend == 'mysql':
+        return MySQLDatabaseAccess()
+    elif backend == 'sqlite':
+        return SQLiteDatabaseAccess()
+    else:
+        raise ValueError('The database backend "{}" is not supported'.format(backend))
+
+
+class WriteBehindQueue(threading.Thread):
+    """
+    The background thread, which persists the writes of the controllers, while the calling thread goes on with
+    requesting the next objects from the network.
+
+    Every kind of write is registered with a function, that writes a whole list of items at once (a bulk insert) and
+    a function, that commits those writes. The items are put into a bounded queue, so that the calling thread is
+    slowed down, once the thread can not keep up. The thread takes up to "batch_size" items from the queue, waiting
+    at most "linger_seconds" for more to arrive, applies them with one call per kind and commits them.
+
+    The writes are done with the own database connection of the thread. Whoever reads the written data has to flush
+    the queue first. An exception raised by a write is raised again by the next call to put, flush or close in the
+    thread, which created the queue, as the items of other threads putting into the queue have nothing to do with it.
+    The amount of items, whose writes failed, is counted. If the queue is not enabled, the items are written and
+    committed right away in the calling thread. Once the queue has been closed or its thread has died, nothing would
+    write the items anymore, so that put and flush raise a RuntimeError.
+
+    Before handing over items, the calling thread commits its own pending operations with the commit function or, if
+    there is none, with the registered save functions. On SQLite the writing thread would otherwise wait for the
+    write lock held by the open transaction of the calling thread, while the calling thread waits for the queue.
+    """
+    FLUSH = object()
+
+    def __init__(self, queue_size=1000, batch_size=100, linger_seconds=0.5, enabled=True, commit_function=None):
+        threading.Thread.__init__(self, daemon=True)
+
+        self.batch_size = batch_size
+        self.linger_seconds = linger_seconds
+        self.enabled = enabled
+        self.commit_function = commit_function
+
+        self.queue = queue.Queue(maxsize=queue_size)
+        # The tuples of the apply and the save function with the string kinds as keys
+        self.function_dict = {}
+        # The exception raised by the last failed write, which has not been reported yet, the thread it is reported
+        # to and the amount of all the items, whose writes failed
+        self.exception = None
+        self.owner_thread = threading.current_thread()
+        self.failed_count = 0
+        self.lock = threading.Lock()
+        self.closed = False
+
+        self.logger = logging.getLogger('WriteBehind')
+
+        if self.enabled:
+            self.start()
+
+    def register(self, kind, apply_function, save_function):
+        """
+        Registers a kind of write.
+
+        :param kind: The string name of the kind
+        :param apply_function: The function, which writes a list of items
+        :param save_function: The function without arguments, which commits the written items
+        :return: void
+        """
+        self.function_dict[kind] = (apply_function, save_function)
+
+    def put(self, kind, item):
+        """
+        Puts an item to be written into the queue. Blocks, while the queue is full.
+
+        :param kind: The string name of the registered kind
+        :param item: The item, which is passed to the apply function of the kind
+        :return: void
+        """
+        owner = threading.current_thread() is self.owner_thread
+        if owner:
+            self._raise_exception()
+        if kind not in self.function_dict.keys():
+            raise KeyError('The write kind "{}" is not registered'.format(kind))
+
+        if self.enabled:
+            self._check_running()
+            self._commit_caller()
+            self.queue.put((kind, item))
+        else:
+            self._apply([(kind, item)])
+            if owner:
+                self._raise_exception()
+
+    def flush(self):
+        """
+        Blocks until all the items, that have been put into the queue so far have been written and committed.
+
+        :return: void
+        """
+        if self.enabled:
+            self._check_running()
+            self._commit_caller()
+            # The marker ends the waiting for further items of the current batch right away
+            self.queue.put(self.FLUSH)
+            self.queue.join()
+        self._raise_exception()
+
+    def close(self):
+        """
+        Writes all the remaining items and stops the thread.
+
+        :return: void
+        """
+        if self.enabled and not self.closed and self.is_alive():
+            self.queue.put(None)
+            self.join()
+        self.closed = True
+        self._raise_exception()
+
+    def run(self):
+        running = True
+        while running:
+            item_list = [self.queue.get()]
+            # Collecting the items for the batch, until either the batch is full, the time is up or one of the markers
+            # has been taken from the queue
+            end_time = time.monotonic() + self.linger_seconds
+            while len(item_list) < self.batch_size and item_list[-1] is not None and item_list[-1] is not self.FLUSH:
+                try:
+                    item_list.append(self.queue.get(timeout=max(0, end_time - time.monotonic())))
+                except queue.Empty:
+                    break
+
+            running = None not in item_list
+            self._apply(list(filter(lambda x: x is not None and x is not self.FLUSH, item_list)))
+            for _ in item_list:
+                self.queue.task_done()
+
+    def _apply(self, item_list):
+        # Grouping the items by their kind, in the order the kinds first appear in the batch
+        kind_dict = collections.OrderedDict()
+        for kind, item in item_list:
+            kind_dict.setdefault(kind, []).append(item)
+
+        for kind, _item_list in kind_dict.items():
+            apply_function, save_function = self.function_dict[kind]
+            try:
+                apply_function(_item_list)
+                save_function()
+            except Exception as exception:
+                self.logger.error('Writing {} items of the kind "{}" failed with "{}"'.format(
+                    len(_item_list),
+                    kind,
+                    str(exception).replace('\n', ' ')
+                ))
+                with self.lock:
+                    self.failed_count += len(_item_list)
+                    if self.exception is None:
+                        self.exception = exception
+
+    def _check_running(self):
+        if self.closed:
+            raise RuntimeError('The write queue has been closed')
+        if not self.is_alive():
+            raise RuntimeError('The thread of the write queue is not running anymore')
+
+    def _commit_caller(self):
+        if self.commit_function is not None:
+            self.commit_function()
+            return
+        for _, save_function in self.function_dict.values():
+            save_function()
+
+    def _raise_exception(self):
+        with self.lock:
+            exception = self.exception
+            self.exception = None
+        if exception is not None:
+            raise exception
+
+
+def create_write_queue():
+    """
+    Creates the write behind queue with the "write_behind", "write_queue_size", "write_batch_size" and
+    "write_linger_seconds" of the "DATABASE" section in the config. The calling threads commit their pending
+    operations of the database backend, before they hand over items.
+
+    :return: The WriteBehindQueue object
+    """
+    config = Config.get_instance()
+    write_queue = WriteBehindQueue(
+        queue_size=config.getint('DATABASE', 'write_queue_size', fallback=1000),
+        batch_size=config.getint('DATABASE', 'write_batch_size', fallback=100),
+        linger_seconds=config.getfloat('DATABASE', 'write_linger_seconds', fallback=0.5),
+        enabled=config.getboolean('DATABASE', 'write_behind', fallback=True),
+        commit_function=create_database_access().save_pending
+    )
+    return write_queue
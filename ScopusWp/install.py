@@ -4,7 +4,12 @@ import configparser
 import pathlib
 import pickle
 import os
-import MySQLdb
+
+# The MySQL driver is not needed, when the embedded SQLite backend is used
+try:
+    import MySQLdb
+except ImportError:
+    MySQLdb = None
 
 # THE TEMPLATES FOR THE NON CODE FILES
 
@@ -27,11 +32,108 @@ CONFIG_INI_TEMPLATE = (
     '; AMOUNT OF DAYS BETWEEN UPDATE\n'
     'update_expiration = \n'
     '\n'
+    '[DATABASE]\n'
+    '; THE DATABASE BACKEND, EITHER "mysql" OR THE EMBEDDED "sqlite"\n'
+    'backend = mysql\n'
+    '; THE STORAGE OF THE SCOPUS CACHE, EITHER THE "sql" DATABASE OR THE MEMORY MAPPED "lmdb"\n'
+    'cache_backend = sql\n'
+    '; AMOUNT OF OPERATIONS AND SECONDS AFTER WHICH THE OPEN TRANSACTION IS COMMITTED\n'
+    'commit_interval = 500\n'
+    'commit_seconds = 10\n'
+    '; AMOUNT OF ROWS FETCHED AT ONCE, WHEN ITERATING OVER A WHOLE TABLE\n'
+    'fetch_size = 1000\n'
+    '; AMOUNT OF PARAMETERIZED STATEMENTS KEPT PREPARED\n'
+    'statement_cache_size = 256\n'
+    '; MAXIMUM AMOUNT OF DATABASE CONNECTIONS, ONE PER THREAD\n'
+    'pool_size = 8\n'
+    '; SECONDS A CONNECTION MAY BE IDLE, BEFORE IT IS CHECKED WITH A PING\n'
+    'health_check_interval = 30\n'
+    '; WHETHER TO WRITE THE LOADED OBJECTS IN A BACKGROUND THREAD, WHILE THE NEXT ONES ARE REQUESTED\n'
+    'write_behind = true\n'
+    '; MAXIMUM AMOUNT OF WRITES WAITING IN THE QUEUE, BEFORE THE REQUESTS ARE SLOWED DOWN\n'
+    'write_queue_size = 1000\n'
+    '; MAXIMUM AMOUNT OF WRITES COMMITTED AT ONCE AND THE SECONDS TO WAIT FOR A BATCH TO FILL UP\n'
+    'write_batch_size = 100\n'
+    'write_linger_seconds = 0.5\n'
+    '\n'
+    '[CACHE]\n'
+    '; AMOUNT OF PUBLICATIONS AND AUTHORS EACH, THAT ARE KEPT IN MEMORY IN FRONT OF THE CACHE DATABASE\n'
+    'lru_size = 1000\n'
+    '; DAYS AFTER WHICH THE CACHED PUBLICATIONS AND AUTHORS ARE REQUESTED AGAIN, 0 FOR NEVER\n'
+    'publication_ttl = 30\n'
+    'author_ttl = 7\n'
+    '; WHETHER TO RENEW THE RECENTLY READ ENTRIES IN THE BACKGROUND, WITHIN THE MARGIN OF DAYS BEFORE THEY EXPIRE\n'
+    'refresh_ahead = false\n'
+    'refresh_margin = 1\n'
+    '; SECONDS BETWEEN THE CHECKS FOR ENTRIES TO RENEW AND THE MAX AMOUNT OF ENTRIES SCHEDULED PER CHECK\n'
+    'refresh_interval = 60\n'
+    'refresh_batch_size = 50\n'
+    '; WHETHER TO KEEP THE IDS OF ALL THE CACHED ENTRIES IN MEMORY, TO CHECK FOR CACHED IDS WITHOUT A QUERY\n'
+    'id_index = true\n'
+    '; WHETHER TO ALSO USE A BLOOM FILTER FOR THE ID INDEX\n'
+    'bloom_filter = false\n'
+    '; MAXIMUM AMOUNT OF CACHED PUBLICATIONS, 0 FOR NO LIMIT. THE PUBLICATIONS OF THE OBSERVED AUTHORS AND THE\n'
+    '; POSTED PUBLICATIONS ARE NEVER EVICTED\n'
+    'publication_capacity = 0\n'
+    '; FRACTION OF THE CAPACITY, THAT IS ADDITIONALLY EVICTED, ONCE THE CAPACITY IS EXCEEDED\n'
+    'eviction_fraction = 0.1\n'
+    '; AMOUNT OF CHANGED PUBLICATIONS, AFTER WHICH THE IN-MEMORY CITATION GRAPH IS REBUILT\n'
+    'citation_graph_merge_size = 4096\n'
+    '\n'
+    '[PIPELINE]\n'
+    '; MAXIMUM AMOUNT OF ITEMS WAITING BETWEEN TWO STAGES OF THE CACHE LOADING, BEFORE THE EARLIER ONE SLOWS DOWN\n'
+    'queue_size = 100\n'
+    '; AMOUNT OF THREADS OF EVERY STAGE: LOADING THE AUTHOR PROFILES, LISTING THEIR PUBLICATIONS, LOADING THE\n'
+    '; PUBLICATIONS, LISTING THEIR CITATIONS AND LOADING THE CITING PUBLICATIONS\n'
+    'authors_concurrency = 2\n'
+    'publication_ids_concurrency = 1\n'
+    'publications_concurrency = 4\n'
+    'citations_concurrency = 1\n'
+    'citation_publications_concurrency = 4\n'
+    '\n'
+    '[CRAWL]\n'
+    '; HOW OFTEN THE FAILED REQUESTS OF A BULK LOAD ARE RETRIED AND THE SECONDS BEFORE THE FIRST RETRY, WHICH DOUBLE\n'
+    '; WITH EVERY FURTHER RETRY UP TO THE MAXIMUM\n'
+    'max_retries = 3\n'
+    'backoff_seconds = 2\n'
+    'max_backoff_seconds = 60\n'
+    '; MAXIMUM DEPTH AND AMOUNT OF PUBLICATIONS OF THE CITATION CLOSURE AND THE AMOUNT OF PARALLEL REQUESTS\n'
+    'closure_max_depth = 2\n'
+    'closure_max_size = 10000\n'
+    'closure_concurrency = 4\n'
+    '; WHETHER TO EXPLORE THE AFFILIATIONS OF AUTHORS FROM THE SEARCH RESULTS INSTEAD OF ALL OF THEIR PUBLICATIONS\n'
+    '; AND THE AMOUNT OF AUTHORS EXPLORED AT ONCE\n'
+    'affiliation_search = true\n'
+    'affiliation_concurrency = 4\n'
+    '\n'
+    '[PROGRESS]\n'
+    '; SECONDS BETWEEN THE REPORTS OF A LONG RUN AND THE SECONDS, OVER WHICH THE ITEMS PER SECOND ARE MEASURED\n'
+    'interval = 2\n'
+    'rate_window = 60\n'
+    '; WHETHER TO SHOW THE PROGRESS LINE, IF THE OUTPUT IS A TERMINAL\n'
+    'terminal = true\n'
+    '; PATH OF THE JSON STATUS FILE REWRITTEN WITH EVERY REPORT, NO STATUS FILE IS WRITTEN IF EMPTY\n'
+    'status_path = \n'
+    '\n'
+    '[SQLITE]\n'
+    '; PATH OF THE SQLITE DATABASE FILE, ON DEFAULT "scopus.db" IN THE PROJECT FOLDER\n'
+    'path = \n'
+    '\n'
+    '[LMDB]\n'
+    '; PATH OF THE LMDB FOLDER, ON DEFAULT "cache.lmdb" IN THE PROJECT FOLDER\n'
+    'path = \n'
+    '; MAXIMUM SIZE OF THE LMDB CACHE IN BYTES\n'
+    'map_size = 4294967296\n'
+    '\n'
     '[MYSQL]\n'
     'host = localhost\n'
     'database = \n'
     'username = \n'
     'password = \n'
+    '; AMOUNT OF ROWS PER BULK INSERT STATEMENT\n'
+    'bulk_chunk_size = 500\n'
+    '; WHETHER TO ALSO WRITE THE NORMALIZED AUTHOR, AFFILIATION, KEYWORD AND CITATION TABLES\n'
+    'relation_tables = false\n'
     '\n'
     '[LOGGING]\n'
     'folder = logs\n'
@@ -64,12 +166,12 @@ ID_JSON_TEMPLATE = (
 REFERENCE_SQL = (
     'CREATE TABLE reference '
     '('
-    'id BIGINT PRIMARY KEY,'
+    'internal_id BIGINT PRIMARY KEY,'
     'wordpress_id BIGINT,'
     'scopus_id BIGINT,'
     'comments_updated_datetime DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP'
     ') ENGINE INNODB;'
-    'CREATE UNIQUE INDEX reference_id_uindex ON reference (id);'
+    'CREATE UNIQUE INDEX reference_id_uindex ON reference (internal_id);'
     'COMMIT;'
 )
 
@@ -91,13 +193,15 @@ PUBLICATIONS_SQL = (
     'eid VARCHAR(64),'
     'doi VARCHAR(64),'
     'creator TEXT,'
+    'title TEXT,'
     'description LONGTEXT,'
     'journal TEXT,'
     'volume VARCHAR(64),'
     'date VARCHAR(64),'
     'authors LONGTEXT,'
     'keywords TEXT,'
-    'citations TEXT'
+    'citations TEXT,'
+    'content_hash CHAR(32)'
     ') ENGINE INNODB;'
     'CREATE UNIQUE INDEX publications_scopus_id_uindex ON publications (scopus_id);'
     'CREATE UNIQUE INDEX publications_eid_uindex ON publications (eid);'
@@ -111,17 +215,20 @@ PUBLICATION_CACHE_SQL = (
     'eid VARCHAR(64),'
     'doi VARCHAR(64),'
     'creator TEXT,'
+    'title TEXT,'
     'description LONGTEXT,'
     'journal TEXT,'
     'volume VARCHAR(64),'
     'date VARCHAR(64),'
     'authors LONGTEXT,'
     'keywords TEXT,'
-    'citations TEXT'
+    'citations TEXT,'
+    'content_hash CHAR(32),'
+    'fetched_at DATETIME,'
+    'last_accessed DATETIME'
     ') ENGINE INNODB;'
-    'CREATE UNIQUE INDEX publications_scopus_id_uindex ON publications (scopus_id);'
-    'CREATE UNIQUE INDEX publications_eid_uindex ON publications (eid);'
-    'CREATE UNIQUE INDEX publications_doi_unidex ON publications (doi);'
+    'CREATE INDEX publication_cache_eid_index ON publication_cache (eid);'
+    'CREATE INDEX publication_cache_doi_index ON publication_cache (doi);'
     'COMMIT;'
 )
 
@@ -133,12 +240,178 @@ AUTHOR_CACHE_SQL = (
     'h_index INT,'
     'citation_count INT,'
     'document_count INT,'
-    'publications TEXT'
+    'publications TEXT,'
+    'fetched_at DATETIME,'
+    'last_accessed DATETIME'
     ') ENGINE INNODB;'
     'CREATE UNIQUE INDEX author_cache_author_id_uindex ON author_cache (author_id);'
     'COMMIT;'
 )
 
+# THE OPTIONAL NORMALIZED SCHEMA FOR THE RELATIONS OF THE CACHED PUBLICATIONS
+
+PUBLICATION_AUTHOR_SQL = (
+    'CREATE TABLE publication_author ('
+    'scopus_id BIGINT NOT NULL,'
+    'author_id BIGINT NOT NULL,'
+    'position INT,'
+    'PRIMARY KEY (scopus_id, author_id)'
+    ') ENGINE INNODB;'
+    'CREATE INDEX publication_author_author_id_index ON publication_author (author_id);'
+    'COMMIT;'
+)
+
+AUTHOR_AFFILIATION_SQL = (
+    'CREATE TABLE author_affiliation ('
+    'author_id BIGINT NOT NULL,'
+    'affiliation_id BIGINT NOT NULL,'
+    'scopus_id BIGINT NOT NULL,'
+    'PRIMARY KEY (author_id, affiliation_id, scopus_id)'
+    ') ENGINE INNODB;'
+    'CREATE INDEX author_affiliation_affiliation_id_index ON author_affiliation (affiliation_id);'
+    'CREATE INDEX author_affiliation_scopus_id_index ON author_affiliation (scopus_id);'
+    'COMMIT;'
+)
+
+PUBLICATION_KEYWORD_SQL = (
+    'CREATE TABLE publication_keyword ('
+    'scopus_id BIGINT NOT NULL,'
+    'keyword VARCHAR(255) NOT NULL,'
+    'PRIMARY KEY (scopus_id, keyword)'
+    ') ENGINE INNODB;'
+    'CREATE INDEX publication_keyword_keyword_index ON publication_keyword (keyword);'
+    'COMMIT;'
+)
+
+CITATION_SQL = (
+    'CREATE TABLE citation ('
+    'citing_id BIGINT NOT NULL,'
+    'cited_id BIGINT NOT NULL,'
+    'PRIMARY KEY (citing_id, cited_id)'
+    ') ENGINE INNODB;'
+    'CREATE INDEX citation_cited_id_index ON citation (cited_id);'
+    'COMMIT;'
+)
+
+# THE SCHEMA FOR THE EMBEDDED SQLITE BACKEND. THE TABLE NAMES IN BRACKETS ARE TAKEN FROM THE CONFIG
+
+SQLITE_SQL = (
+    'CREATE TABLE IF NOT EXISTS {publication_cache_table} ('
+    'scopus_id INTEGER PRIMARY KEY NOT NULL,'
+    'eid TEXT,'
+    'doi TEXT,'
+    'creator TEXT,'
+    'title TEXT,'
+    'description TEXT,'
+    'journal TEXT,'
+    'volume TEXT,'
+    'date TEXT,'
+    'authors TEXT,'
+    'keywords TEXT,'
+    'citations TEXT,'
+    'content_hash TEXT,'
+    'fetched_at TIMESTAMP,'
+    'last_accessed TIMESTAMP'
+    ');'
+    'CREATE TABLE IF NOT EXISTS publications ('
+    'scopus_id INTEGER PRIMARY KEY NOT NULL,'
+    'eid TEXT,'
+    'doi TEXT,'
+    'creator TEXT,'
+    'title TEXT,'
+    'description TEXT,'
+    'journal TEXT,'
+    'volume TEXT,'
+    'date TEXT,'
+    'authors TEXT,'
+    'keywords TEXT,'
+    'citations TEXT,'
+    'content_hash TEXT'
+    ');'
+    'CREATE INDEX IF NOT EXISTS {publication_cache_table}_eid_index ON {publication_cache_table} (eid);'
+    'CREATE INDEX IF NOT EXISTS {publication_cache_table}_doi_index ON {publication_cache_table} (doi);'
+    'CREATE INDEX IF NOT EXISTS publications_eid_index ON publications (eid);'
+    'CREATE INDEX IF NOT EXISTS publications_doi_index ON publications (doi);'
+    'CREATE TABLE IF NOT EXISTS {author_cache_table} ('
+    'author_id INTEGER PRIMARY KEY NOT NULL,'
+    'first_name TEXT,'
+    'last_name TEXT,'
+    'h_index INTEGER,'
+    'citation_count INTEGER,'
+    'document_count INTEGER,'
+    'publications TEXT,'
+    'fetched_at TIMESTAMP,'
+    'last_accessed TIMESTAMP'
+    ');'
+    'CREATE TABLE IF NOT EXISTS {post_reference_table} ('
+    'internal_id INTEGER PRIMARY KEY,'
+    'wordpress_id INTEGER,'
+    'scopus_id INTEGER,'
+    'comments_updated_datetime TIMESTAMP DEFAULT CURRENT_TIMESTAMP'
+    ');'
+    'CREATE TABLE IF NOT EXISTS {comment_reference_table} ('
+    'internal_id INTEGER PRIMARY KEY,'
+    'wordpress_post_id INTEGER,'
+    'wordpress_comment_id INTEGER,'
+    'scopus_id INTEGER'
+    ');'
+    'CREATE TABLE IF NOT EXISTS publication_author ('
+    'scopus_id INTEGER NOT NULL,'
+    'author_id INTEGER NOT NULL,'
+    'position INTEGER,'
+    'PRIMARY KEY (scopus_id, author_id)'
+    ');'
+    'CREATE INDEX IF NOT EXISTS publication_author_author_id_index ON publication_author (author_id);'
+    'CREATE TABLE IF NOT EXISTS author_affiliation ('
+    'author_id INTEGER NOT NULL,'
+    'affiliation_id INTEGER NOT NULL,'
+    'scopus_id INTEGER NOT NULL,'
+    'PRIMARY KEY (author_id, affiliation_id, scopus_id)'
+    ');'
+    'CREATE INDEX IF NOT EXISTS author_affiliation_affiliation_id_index ON author_affiliation (affiliation_id);'
+    'CREATE INDEX IF NOT EXISTS author_affiliation_scopus_id_index ON author_affiliation (scopus_id);'
+    'CREATE TABLE IF NOT EXISTS publication_keyword ('
+    'scopus_id INTEGER NOT NULL,'
+    'keyword TEXT NOT NULL,'
+    'PRIMARY KEY (scopus_id, keyword)'
+    ');'
+    'CREATE INDEX IF NOT EXISTS publication_keyword_keyword_index ON publication_keyword (keyword);'
+    'CREATE TABLE IF NOT EXISTS citation ('
+    'citing_id INTEGER NOT NULL,'
+    'cited_id INTEGER NOT NULL,'
+    'PRIMARY KEY (citing_id, cited_id)'
+    ');'
+    'CREATE INDEX IF NOT EXISTS citation_cited_id_index ON citation (cited_id);'
+)
+
+# THE COLUMNS, THAT HAVE BEEN ADDED TO THE TABLES AFTER THEIR FIRST RELEASE, AS TUPLES OF THE TABLE (PLACEHOLDER FOR
+# THE CONFIG NAME), COLUMN NAME, MYSQL TYPE AND SQLITE TYPE. THOSE ARE ADDED TO EXISTING TABLES ON SETUP
+
+MIGRATION_COLUMNS = [
+    ('publication_cache', 'content_hash', 'CHAR(32)', 'TEXT'),
+    ('publications', 'content_hash', 'CHAR(32)', 'TEXT'),
+    ('publication_cache', 'fetched_at', 'DATETIME', 'TIMESTAMP'),
+    ('publication_cache', 'last_accessed', 'DATETIME', 'TIMESTAMP'),
+    ('author_cache', 'fetched_at', 'DATETIME', 'TIMESTAMP'),
+    ('author_cache', 'last_accessed', 'DATETIME', 'TIMESTAMP')
+]
+
+# THE MIGRATED COLUMNS, WHICH ARE SET TO THE TIME OF THE MIGRATION FOR THE EXISTING ROWS, AS TUPLES OF THE TABLE AND
+# COLUMN NAME. OTHERWISE ALL THE ENTRIES CACHED BEFORE WOULD EXPIRE AT ONCE AND BE REQUESTED FROM SCOPUS AGAIN
+
+MIGRATION_TIMESTAMPS = [
+    ('publication_cache', 'fetched_at'),
+    ('author_cache', 'fetched_at')
+]
+
+# THE INDEXES, THAT HAVE BEEN ADDED AFTER THE FIRST RELEASE, AS TUPLES OF THE TABLE, INDEX NAME AND COLUMN NAME. THE
+# CACHE TABLE OF OLDER VERSIONS HAS NO INDEX ON THE SECONDARY IDS (THE INDEXES OF ITS SETUP TARGETED THE WRONG TABLE)
+
+MIGRATION_INDEXES = [
+    ('publication_cache', 'publication_cache_eid_index', 'eid'),
+    ('publication_cache', 'publication_cache_doi_index', 'doi')
+]
+
 
 class ProjectPathInputController:
 
@@ -364,6 +637,80 @@ class SQLSetupController:
         if not self.database_exists('comment_reference'):
             self.access.execute(COMMENT_REFERENCE_SQL)
 
+        # The tables of the normalized schema, which are only written if enabled with "relation_tables" in the config
+        if not self.database_exists('publication_author'):
+            self.access.execute(PUBLICATION_AUTHOR_SQL)
+
+        if not self.database_exists('author_affiliation'):
+            self.access.execute(AUTHOR_AFFILIATION_SQL)
+
+        if not self.database_exists('publication_keyword'):
+            self.access.execute(PUBLICATION_KEYWORD_SQL)
+
+        if not self.database_exists('citation'):
+            self.access.execute(CITATION_SQL)
+
+        # Tables, that were created by an older version of the setup do not have the newer columns yet
+        for database_name, column_name, column_definition, _ in MIGRATION_COLUMNS:
+            if not self.column_exists(database_name, column_name):
+                self.add_column(database_name, column_name, column_definition)
+                if (database_name, column_name) in MIGRATION_TIMESTAMPS:
+                    self.fill_timestamp_column(database_name, column_name)
+
+        for database_name, index_name, column_name in MIGRATION_INDEXES:
+            if not self.index_exists(database_name, index_name):
+                self.add_index(database_name, index_name, column_name)
+
+    def column_exists(self, database_name, column_name):
+        try:
+            sql = (
+                'SELECT {column} FROM {database} LIMIT 1;'
+            ).format(database=database_name, column=column_name)
+            self.access.execute(sql)
+            return True
+        except:
+            return False
+
+    def add_column(self, database_name, column_name, column_definition):
+        sql = (
+            'ALTER TABLE {database} ADD COLUMN {column} {definition};'
+        ).format(
+            database=database_name,
+            column=column_name,
+            definition=column_definition
+        )
+        self.access.execute(sql)
+        print('ADDED COLUMN "{}" TO TABLE "{}"'.format(column_name, database_name))
+
+    def fill_timestamp_column(self, database_name, column_name):
+        sql = (
+            'UPDATE {database} SET {column}=NOW() WHERE {column} IS NULL;'
+        ).format(
+            database=database_name,
+            column=column_name
+        )
+        self.access.execute(sql)
+        Db.get_instance().commit()
+        print('SET COLUMN "{}" OF TABLE "{}" TO THE TIME OF THE MIGRATION'.format(column_name, database_name))
+
+    def index_exists(self, database_name, index_name):
+        sql = (
+            'SHOW INDEX FROM {database} WHERE Key_name = %s;'
+        ).format(database=database_name)
+        self.access.execute(sql, (index_name, ))
+        return len(self.access.fetchall()) > 0
+
+    def add_index(self, database_name, index_name, column_name):
+        sql = (
+            'CREATE INDEX {index} ON {database} ({column});'
+        ).format(
+            index=index_name,
+            database=database_name,
+            column=column_name
+        )
+        self.access.execute(sql)
+        print('ADDED INDEX "{}" TO TABLE "{}"'.format(index_name, database_name))
+
     def database_exists(self, database_name):
         try:
             sql = (
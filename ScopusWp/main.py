@@ -1,5 +1,7 @@
 from ScopusWp.controller import TopController
+from ScopusWp.scopus.controller import ScopusTopController
 
+import datetime
 import optparse
 
 # TODO: Make a fail proof for the citation comment wordpress not well formed
@@ -11,12 +13,20 @@ import optparse
 def main():
 
     parser = optparse.OptionParser()
+    parser.add_option('-f', '--file', dest='path', help='The snapshot file for the export and import of the cache')
+    parser.add_option('--since', dest='since', help='Only export the entries fetched since the date YYYY-MM-DD')
+    parser.add_option('-c', '--crawl', dest='crawl', default='publications',
+                      help='The crawl to be resumed: publications, publications_reload or affiliations')
     (options, args) = parser.parse_args()
 
+    # Without a command the publications are updated, as it was done before there were any commands
+    if len(args) == 0:
+        args = ['publications']
+
     if len(args) != 1:
         raise ValueError('Incorrect amount of arguments passed to ScopusWp')
 
-    if args[0] not in ['publications', 'citations', 'wipe']:
+    if args[0] not in ['publications', 'citations', 'wipe', 'export', 'import', 'resume']:
         raise ValueError('Incorrect argument passed to Scopus Wp')
 
     if args[0] == 'publications':
@@ -38,11 +48,31 @@ def main():
         controller.wipe_website()
         controller.close()
 
+    elif args[0] in ['export', 'import']:
+        if options.path is None:
+            raise ValueError('The snapshot file has to be given with the --file option')
+
+        controller = ScopusTopController()
+        try:
+            if args[0] == 'export':
+                since = None
+                if options.since is not None:
+                    since = datetime.datetime.strptime(options.since, '%Y-%m-%d')
+                count_dict = controller.export_cache_snapshot(options.path, since)
+            else:
+                count_dict = controller.import_cache_snapshot(options.path)
+            print('{} publications and {} author profiles'.format(count_dict['publications'], count_dict['authors']))
+        finally:
+            controller.close()
+
+    elif args[0] == 'resume':
+        controller = ScopusTopController()
+        try:
+            result_dict = controller.resume_crawl(options.crawl)
+            print('{} completed'.format(len(result_dict)))
+        finally:
+            controller.close()
+
 
 if __name__ == '__main__':
-    #main()
-    controller = TopController()
-    try:
-        controller.update_publications_website()
-    finally:
-        controller.close()
+    main()
@@ -0,0 +1,344 @@
+from ScopusWp.config import Config
+
+import collections
+import datetime
+import threading
+import logging
+import json
+import time
+import sys
+import os
+
+
+def _format_duration(seconds):
+    if seconds is None:
+        return '?'
+    seconds = int(seconds)
+    return '{}:{:02d}:{:02d}'.format(seconds // 3600, (seconds % 3600) // 60, seconds % 60)
+
+
+def _int_header(headers, name):
+    try:
+        return int(headers[name])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class ProgressTask:
+    """
+    The progress of one long running operation, like loading the observed authors into the cache or updating the
+    citations on the website.
+
+    The total amount of items does not have to be known at the start, it can grow while the task is running, for
+    example with every publication found for an author. The rate in items per second is taken over the last
+    "rate_window" seconds, so that it follows the current speed of the requests and not the average of the whole run,
+    and the ETA is the time the remaining items take at that rate.
+    """
+    def __init__(self, reporter, name, total=0, rate_window=60):
+        self.reporter = reporter  # type: ProgressReporter
+        self.name = name
+        self.total = total
+        self.rate_window = rate_window
+
+        self.completed = 0
+        self.failed = 0
+        self.started = time.time()
+        self.finished = None
+        self.lock = threading.Lock()
+
+        # The (time, completed) samples, over which the current rate is measured
+        self.sample_deque = collections.deque([(self.started, 0)])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.finish()
+
+    def add_total(self, amount=1):
+        with self.lock:
+            self.total += amount
+
+    def advance(self, amount=1, failed=False):
+        """
+        Counts the given amount of items as done.
+
+        :param amount: The int amount of items
+        :param failed: Whether the items failed. Failed items are done as well and count as completed
+        :return: void
+        """
+        with self.lock:
+            self.completed += amount
+            if failed:
+                self.failed += amount
+
+    def finish(self):
+        with self.lock:
+            if self.finished is None:
+                self.finished = time.time()
+        self.reporter.finish_task(self)
+
+    def is_finished(self):
+        return self.finished is not None
+
+    def status(self, now=None):
+        """
+        The current state of the task.
+
+        :param now: The time, for which the status is given. On default the current time
+        :return: A dict with the keys "name", "completed", "failed", "total", "elapsed", "rate", "eta" and "finished"
+        """
+        if now is None:
+            now = time.time()
+        with self.lock:
+            completed, failed, total, finished = self.completed, self.failed, self.total, self.finished
+            if finished is not None:
+                now = finished
+
+            # Dropping the samples, which are older than the window, but keeping at least one to measure against
+            self.sample_deque.append((now, completed))
+            while len(self.sample_deque) > 2 and now - self.sample_deque[1][0] >= self.rate_window:
+                self.sample_deque.popleft()
+            sample_time, sample_completed = self.sample_deque[0]
+
+        if now > sample_time:
+            rate = (completed - sample_completed) / (now - sample_time)
+        else:
+            rate = 0.0
+
+        eta = None
+        if finished is not None:
+            eta = 0.0
+        elif rate > 0 and total >= completed:
+            eta = (total - completed) / rate
+
+        return {
+            'name': self.name,
+            'completed': completed,
+            'failed': failed,
+            'total': total,
+            'elapsed': now - self.started,
+            'rate': rate,
+            'eta': eta,
+            'finished': finished is not None
+        }
+
+
+class ProgressReporter:
+    """
+    A singleton class, which collects the telemetry of the long running operations and reports it every "interval"
+    seconds (all the options from the "PROGRESS" section of the config).
+
+    The loops report their progress into ProgressTask objects, the requests to scopus report, when they start and end,
+    which also gives the remaining quota of the API key from the rate limit headers of the responses, and the lookups
+    in the cache report whether they were hits or misses. While a task is running, a thread rewrites a single status
+    line on the terminal, if the output is one, and the JSON status file at "status_path", if given, which is replaced
+    as a whole, so that a monitoring never reads a half written file.
+    """
+    _instance = None
+
+    QUOTA_LIMIT_HEADER = 'X-RateLimit-Limit'
+    QUOTA_REMAINING_HEADER = 'X-RateLimit-Remaining'
+    QUOTA_RESET_HEADER = 'X-RateLimit-Reset'
+
+    @staticmethod
+    def get_instance():
+        if ProgressReporter._instance is None:
+            ProgressReporter.new_instance()
+
+        return ProgressReporter._instance
+
+    @staticmethod
+    def new_instance():
+        config = Config.get_instance()
+        ProgressReporter._instance = ProgressReporter(
+            status_path=config.get('PROGRESS', 'status_path', fallback=''),
+            interval=config.getfloat('PROGRESS', 'interval', fallback=2),
+            terminal=config.getboolean('PROGRESS', 'terminal', fallback=True),
+            rate_window=config.getfloat('PROGRESS', 'rate_window', fallback=60)
+        )
+
+    def __init__(self, status_path='', interval=2, terminal=True, rate_window=60, stream=None):
+        self.status_path = status_path
+        self.interval = interval
+        self.terminal = terminal
+        self.rate_window = rate_window
+        self.stream = sys.stderr if stream is None else stream
+
+        # The tasks by their names. Finished tasks stay in the status, until a task of the same name is started
+        self.task_dict = collections.OrderedDict()
+
+        self.in_flight = 0
+        self.request_count = 0
+        self.request_failed_count = 0
+        self.quota_limit = None
+        self.quota_remaining = None
+        self.quota_reset = None
+
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        self.lock = threading.RLock()
+        self.thread = None  # type: threading.Thread
+        self.stop_event = threading.Event()
+        self.line_length = 0
+
+        self.logger = logging.getLogger('Progress')
+
+    def task(self, name, total=0):
+        """
+        Starts a new task and the reporting thread, if it is not running already.
+
+        :param name: The string name of the task
+        :param total: The int amount of items known at the start
+        :return: The ProgressTask, to be used as a context manager, which finishes it at the end
+        """
+        task = ProgressTask(self, name, total, self.rate_window)
+        with self.lock:
+            self.task_dict.pop(name, None)
+            self.task_dict[name] = task
+            if self.thread is None:
+                # Every thread gets its own stop event, so that a new thread is not stopped by the old one
+                self.stop_event = threading.Event()
+                self.thread = threading.Thread(target=self._run, args=(self.stop_event,), name='progress', daemon=True)
+                self.thread.start()
+        return task
+
+    def finish_task(self, task):
+        with self.lock:
+            running = any(not x.is_finished() for x in self.task_dict.values())
+            thread = None if running else self.thread
+            if thread is not None:
+                self.thread = None
+                self.stop_event.set()
+
+        # The last report of the finished tasks is done by the thread, before it stops
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def request_started(self):
+        with self.lock:
+            self.in_flight += 1
+
+    def request_finished(self, response=None):
+        """
+        Counts the end of a request and takes the remaining quota from the headers of its response.
+
+        :param response: The requests Response or None, if the request failed
+        :return: void
+        """
+        with self.lock:
+            self.in_flight -= 1
+            self.request_count += 1
+            if response is None or response.status_code >= 400:
+                self.request_failed_count += 1
+            if response is None:
+                return
+
+            headers = response.headers
+            remaining = _int_header(headers, self.QUOTA_REMAINING_HEADER)
+            if remaining is not None:
+                self.quota_remaining = remaining
+                self.quota_limit = _int_header(headers, self.QUOTA_LIMIT_HEADER)
+                self.quota_reset = _int_header(headers, self.QUOTA_RESET_HEADER)
+
+    def record_cache(self, hit, amount=1):
+        with self.lock:
+            if hit:
+                self.cache_hits += amount
+            else:
+                self.cache_misses += amount
+
+    def status(self):
+        """
+        The telemetry of all the tasks, the requests, the quota and the cache.
+
+        :return: The dict, which is written to the status file
+        """
+        now = time.time()
+        with self.lock:
+            task_list = list(self.task_dict.values())
+            lookup_count = self.cache_hits + self.cache_misses
+            status_dict = {
+                'updated': datetime.datetime.fromtimestamp(now).isoformat(),
+                'tasks': [],
+                'requests': {
+                    'in_flight': self.in_flight,
+                    'total': self.request_count,
+                    'failed': self.request_failed_count
+                },
+                'quota': {
+                    'limit': self.quota_limit,
+                    'remaining': self.quota_remaining,
+                    'reset': self.quota_reset
+                },
+                'cache': {
+                    'hits': self.cache_hits,
+                    'misses': self.cache_misses,
+                    'hit_rate': self.cache_hits / lookup_count if lookup_count != 0 else None
+                }
+            }
+        status_dict['tasks'] = [task.status(now) for task in task_list]
+        return status_dict
+
+    def report(self, final=False):
+        status_dict = self.status()
+        if self.status_path != '':
+            try:
+                self._write_status(status_dict)
+            except OSError as error:
+                self.logger.warning('Could not write the status file "{}": {}'.format(self.status_path, str(error)))
+        if self.terminal and self.stream.isatty():
+            self._write_terminal(status_dict, final)
+
+    def _run(self, stop_event):
+        while not stop_event.wait(self.interval):
+            self.report()
+        self.report(final=True)
+
+    def _write_status(self, status_dict):
+        # Writing into a temporary file first, which then replaces the old status in one step
+        temp_path = '{}.tmp'.format(self.status_path)
+        with open(temp_path, mode='w') as file:
+            json.dump(status_dict, file, indent=4)
+        os.replace(temp_path, self.status_path)
+
+    def _write_terminal(self, status_dict, final):
+        line = self.format_line(status_dict)
+        # Overwriting the previous line, padded to its length, and ending the line with the last report
+        padding = ' ' * max(0, self.line_length - len(line))
+        self.line_length = 0 if final else len(line)
+        self.stream.write('\r' + line + padding + ('\n' if final else ''))
+        self.stream.flush()
+
+    @staticmethod
+    def format_line(status_dict):
+        """
+        The single line for the terminal.
+
+        :param status_dict: The dict of the status method
+        :return: The string line
+        """
+        part_list = []
+        for task_dict in status_dict['tasks']:
+            if task_dict['finished']:
+                continue
+            total_string = '/{}'.format(task_dict['total']) if task_dict['total'] != 0 else ''
+            part_list.append('{} {}{} {:.1f}/s ETA {}'.format(
+                task_dict['name'],
+                task_dict['completed'],
+                total_string,
+                task_dict['rate'],
+                _format_duration(task_dict['eta'])
+            ))
+        if len(part_list) == 0:
+            part_list.append('done')
+
+        part_list.append('in flight {}'.format(status_dict['requests']['in_flight']))
+        quota_dict = status_dict['quota']
+        if quota_dict['remaining'] is not None:
+            part_list.append('quota {}/{}'.format(quota_dict['remaining'], quota_dict['limit']))
+        hit_rate = status_dict['cache']['hit_rate']
+        if hit_rate is not None:
+            part_list.append('cache {:.0%}'.format(hit_rate))
+        return ' | '.join(part_list)
@@ -1,7 +1,7 @@
 from ScopusWp.config import PATH, PROJECT_PATH
 from ScopusWp.config import Config
 
-from ScopusWp.database import MySQLDatabaseAccess
+from ScopusWp.database import create_database_access
 
 from ScopusWp.data import Publication
 
@@ -134,6 +134,16 @@ class ReferenceController:
         """
         return self.reference_model.select_all()
 
+    def iter_all_references(self, fetch_size=None):
+        """
+        A generator over all the entries in the reference database, see select_all_references for the tuple format.
+        Only a batch of the given size is kept in memory at a time.
+
+        :param fetch_size: The int amount of rows to be fetched from the database at once
+        :return: A generator of tuples
+        """
+        return self.reference_model.iter_all(fetch_size)
+
     def insert_reference(self, internal_id, wordpress_id, scopus_id):
         self.reference_model.insert(internal_id, wordpress_id, scopus_id)
 
@@ -216,35 +226,29 @@ class PostReferenceModel:
         self.id_manager = IDManagerSingleton.get_instance()  # type: IDManagerSingleton
 
         # The actual data base access
-        self.database_access = MySQLDatabaseAccess()
+        self.database_access = create_database_access()
 
         self.config = Config.get_instance()
         self.database_name = self.config['MYSQL']['post_reference_table']
 
     def wipe(self):
-        sql = (
-            'TRUNCATE TABLE {database};'
-            'COMMIT;'
-        ).format(
-            database=self.database_name
-        )
+        sql = self.database_access.dialect.truncate_sql(self.database_name)
         self.database_access.execute(sql)
+        self.database_access.save()
 
     def update_comments_updated_datetime(self, scopus_id, datetime_object):
         # TODO: Make general and scopus id usable
         sql = (
             'UPDATE {database} '
             'SET '
-            'comments_updated_datetime = {comments_updated} '
+            'comments_updated_datetime = %s '
             'WHERE '
-            'scopus_id = {scopus_id}'
+            'scopus_id = %s'
         ).format(
-            database=self.database_name,
-            comments_updated=datetime_object.strftime(DATETIME_FORMAT),
-            scopus_id=scopus_id
+            database=self.database_name
         )
 
-        self.database_access.execute(sql)
+        self.database_access.execute(sql, (datetime_object, int(scopus_id)))
 
     def save(self):
         self.database_access.save()
@@ -269,6 +273,26 @@ class PostReferenceModel:
         row_list = self.database_access.select(sql)
         return row_list
 
+    def iter_all(self, fetch_size=None):
+        """
+        A generator over all the reference tuples in the reference database, which are fetched with a server side
+        cursor in batches of the given size.
+
+        :param fetch_size: The int amount of rows to be fetched at once
+        :return: A generator of tuples with the internal id, wordpress id, scopus id and comments updated datetime
+        """
+        sql = (
+            'SELECT '
+            'internal_id, '
+            'wordpress_id,'
+            'scopus_id,'
+            'comments_updated_datetime '
+            'FROM {database} '
+        ).format(
+            database=self.database_name
+        )
+        return self.database_access.iter_select(sql, fetch_size=fetch_size)
+
     def select(self, internal_id):
         sql = (
             'SELECT '
@@ -277,43 +301,26 @@ class PostReferenceModel:
             'scopus_id,'
             'comments_updated_datetime '
             'FROM {database} '
-            'WHERE id={internal_id}'
+            'WHERE internal_id=%s'
         ).format(
-            database=self.database_name,
-            internal_id=internal_id
+            database=self.database_name
         )
 
-        row_list = self.database_access.select(sql)
+        row_list = self.database_access.select(sql, (internal_id, ))
         return row_list[0]
         # TODO: an if decision if actually exists and possibly exception
 
     def insert(self, internal_id, wordpress_id, scopus_id):
-        sql = (
-            'INSERT INTO {database}'
-            '('
-            'internal_id, '
-            'wordpress_id, '
-            'scopus_id '
-            ')'
-            'VALUES'
-            '('
-            '{internal_id},'
-            '{wordpress_id}, '
-            '{scopus_id}'
-            ') '
-            'ON DUPLICATE KEY UPDATE '
-            'internal_id = {internal_id},'
-            'wordpress_id = {wordpress_id},'
-            'scopus_id = {scopus_id};'
-            'COMMIT;'
-        ).format(
-            database=self.database_name,
-            internal_id=internal_id,
-            wordpress_id=wordpress_id,
-            scopus_id=scopus_id
+        # The datetime of the comments update is set explicitly, because an upsert with unchanged values would not
+        # trigger the "ON UPDATE CURRENT_TIMESTAMP" of the column
+        sql = self.database_access.dialect.upsert_sql(
+            self.database_name,
+            ['internal_id', 'wordpress_id', 'scopus_id', 'comments_updated_datetime'],
+            ['internal_id']
         )
+        row = (internal_id, wordpress_id, scopus_id, datetime.datetime.now().replace(microsecond=0))
 
-        self.database_access.execute(sql)
+        self.database_access.execute(sql, row)
 
     def search_by_wordpress(self, wordpress_id):
         sql = (
@@ -324,13 +331,12 @@ class PostReferenceModel:
             'comments_updated_datetime '
             'FROM {database} '
             'WHERE '
-            'wordpress_id={wordpress_id}'
+            'wordpress_id=%s'
         ).format(
-            database=self.database_name,
-            wordpress_id=wordpress_id
+            database=self.database_name
         )
 
-        row_list = self.database_access.select(sql)
+        row_list = self.database_access.select(sql, (wordpress_id, ))
         return row_list[0]
 
     def search_by_scopus(self, scopus_id):
@@ -349,13 +355,12 @@ class PostReferenceModel:
             'comments_updated_datetime '
             'FROM {database} '
             'WHERE '
-            'scopus_id={scopus_id}'
+            'scopus_id=%s'
         ).format(
-            database=self.database_name,
-            scopus_id=scopus_id
+            database=self.database_name
         )
 
-        row_list = self.database_access.select(sql)
+        row_list = self.database_access.select(sql, (scopus_id, ))
         return row_list[0]
 
 
@@ -367,7 +372,7 @@ class CommentReferenceModel:
         # Getting the database table name for the comment reference table
         self.database_name = self.config['MYSQL']['comment_reference_table']
 
-        self.database_access = MySQLDatabaseAccess()
+        self.database_access = create_database_access()
 
     def insert(self, internal_id, wordpress_post_id, wordpress_citation_id, scopus_id):
         """
@@ -379,36 +384,14 @@ class CommentReferenceModel:
         :param scopus_id: The scopus id of the publication, which was posted as the comment
         :return: void
         """
-        sql = (
-            'INSERT INTO {database}'
-            '('
-            'internal_id,'
-            'wordpress_post_id,'
-            'wordpress_comment_id,'
-            'scopus_id'
-            ')'
-            'VALUES'
-            '('
-            '{internal_id},'
-            '{wordpress_post_id},'
-            '{wordpress_citation_id},'
-            '{scopus_id}'
-            ')'
-            'ON DUPLICATE KEY UPDATE '
-            'internal_id = {internal_id},'
-            'wordpress_post_id = {wordpress_post_id},'
-            'wordpress_comment_id = {wordpress_citation_id},'
-            'scopus_id = {scopus_id};'
-            'COMMIT;'
-        ).format(
-            database=self.database_name,
-            internal_id=internal_id,
-            wordpress_post_id=wordpress_post_id,
-            wordpress_citation_id=wordpress_citation_id,
-            scopus_id=scopus_id
+        sql = self.database_access.dialect.upsert_sql(
+            self.database_name,
+            ['internal_id', 'wordpress_post_id', 'wordpress_comment_id', 'scopus_id'],
+            ['internal_id']
         )
+        row = (internal_id, wordpress_post_id, wordpress_citation_id, scopus_id)
 
-        self.database_access.execute(sql)
+        self.database_access.execute(sql, row)
 
     def select(self, internal_id):
         """
@@ -424,13 +407,12 @@ class CommentReferenceModel:
             'wordpress_comment_id,'
             'scopus_id '
             'FROM {database} '
-            'WHERE internal_id={internal_id};'
+            'WHERE internal_id=%s;'
         ).format(
-            database=self.database_name,
-            internal_id=internal_id
+            database=self.database_name
         )
 
-        row_list = self.database_access.select(sql)
+        row_list = self.database_access.select(sql, (internal_id, ))
 
         if len(row_list) != 1:
             # TODO: Think of whether to throw an error or w/e
@@ -459,6 +441,27 @@ class CommentReferenceModel:
 
         return row_list
 
+    def iter_all(self, fetch_size=None):
+        """
+        A generator over all the comment reference tuples, which are fetched with a server side cursor in batches of
+        the given size.
+
+        :param fetch_size: The int amount of rows to be fetched at once
+        :return: A generator of tuples (internal id, wordpress post id, wordpress comment id, scopus id)
+        """
+        sql = (
+            'SELECT '
+            'internal_id,'
+            'wordpress_post_id,'
+            'wordpress_comment_id,'
+            'scopus_id '
+            'FROM {database} '
+        ).format(
+            database=self.database_name
+        )
+
+        return self.database_access.iter_select(sql, fetch_size=fetch_size)
+
     def select_by_wordpress_post_id(self, wordpress_post_id):
         """
         Gets a specific comment reference tuple, by the wordpress id of the post, on which the comment was posted to.
@@ -474,13 +477,12 @@ class CommentReferenceModel:
             'scopus_id '
             'FROM {database} '
             'WHERE '
-            'wordpress_post_id={wordpress_post_id}'
+            'wordpress_post_id=%s'
         ).format(
-            database=self.database_name,
-            wordpress_post_id=wordpress_post_id
+            database=self.database_name
         )
 
-        row_list = self.database_access.select(sql)
+        row_list = self.database_access.select(sql, (wordpress_post_id, ))
 
         return row_list
 
@@ -490,11 +492,7 @@ class CommentReferenceModel:
 
         :return: void
         """
-        sql = (
-            'TRUNCATE {database};'
-            'COMMIT;'
-        ).format(
-            database=self.database_name
-        )
+        sql = self.database_access.dialect.truncate_sql(self.database_name)
 
         self.database_access.execute(sql)
+        self.database_access.save()
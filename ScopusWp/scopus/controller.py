@@ -5,13 +5,27 @@ from ScopusWp.scopus.observe import ScopusObservationController
 from ScopusWp.scopus.persistency import ScopusBackupController, ScopusCacheController
 from ScopusWp.scopus.persistency import ScopusPublicationPickleCacheModel, ScopusAuthorPickleCacheModel
 from ScopusWp.scopus.persistency import ScopusPublicationDatabaseCacheModel, ScopusAuthorDatabaseCacheModel
-from ScopusWp.scopus.persistency import TempPersistentSequenceModel
+from ScopusWp.scopus.persistency import ScopusPublicationLMDBCacheModel, ScopusAuthorLMDBCacheModel
+from ScopusWp.scopus.persistency import ScopusPublicationRelationModel
+from ScopusWp.scopus.persistency import ScopusCrawlJournal
+from ScopusWp.scopus.persistency import ScopusCacheSnapshotController
+from ScopusWp.scopus.persistency import ScopusCitationGraphController
+from ScopusWp.scopus.persistency import CACHE_MISS
 
 from ScopusWp.scopus.scopus import ScopusController
 
-from ScopusWp.config import PATH
+from ScopusWp.database import create_write_queue, create_database_access
 
+from ScopusWp.config import PATH, Config
+
+from ScopusWp.progress import ProgressReporter, ProgressTask
+
+import collections
+import datetime
+import threading
 import logging
+import queue
+import time
 
 # TODO: Implement massive logging
 
@@ -23,19 +37,806 @@ import logging
 # todo: Logging mal richtig angehen
 
 
+class ScopusCacheRefreshWorker(threading.Thread):
+    """
+    The background thread, which renews the hot entries of the cache before they expire.
+
+    The worker only requests the scheduled publications and author profiles from the scopus website. The results are
+    written into the cache by the thread owning the cache controller, when it drains the worker, so that the database
+    connection is never used by two threads at the same time.
+    """
+    PUBLICATION = 'publication'
+    AUTHOR = 'author'
+
+    def __init__(self, scopus_controller=None):
+        threading.Thread.__init__(self, daemon=True)
+
+        if scopus_controller is None:
+            scopus_controller = ScopusController()
+        self.scopus_controller = scopus_controller
+
+        self.request_queue = queue.Queue()
+        self.result_queue = queue.Queue()
+
+        # The ids, that are either waiting to be requested or whose results have not been drained yet. Those are not
+        # scheduled a second time
+        self.scheduled_set = set()
+        self.lock = threading.Lock()
+
+        self.logger = logging.getLogger('ScopusRefresh')
+
+    def schedule(self, kind, id_list):
+        """
+        Schedules the given ids to be requested from scopus.
+
+        :param kind: Either PUBLICATION or AUTHOR
+        :param id_list: The list of int scopus/author ids
+        :return: The int amount of ids, that were not already scheduled
+        """
+        count = 0
+        with self.lock:
+            for _id in id_list:
+                if (kind, int(_id)) not in self.scheduled_set:
+                    self.scheduled_set.add((kind, int(_id)))
+                    self.request_queue.put((kind, int(_id)))
+                    count += 1
+        return count
+
+    def run(self):
+        while True:
+            item = self.request_queue.get()
+            # None is the signal to stop the worker
+            if item is None:
+                break
+
+            kind, _id = item
+            try:
+                if kind == self.PUBLICATION:
+                    result = self.scopus_controller.get_publication(_id)
+                else:
+                    result = self.scopus_controller.get_author_profile(_id)
+                self.result_queue.put((kind, _id, result))
+            except Exception as exception:
+                self.logger.warning('Renewing the {} {} failed with "{}"'.format(kind, _id, str(exception)))
+                with self.lock:
+                    self.scheduled_set.discard(item)
+
+    def drain(self):
+        """
+        Takes all the results, that have been requested so far.
+
+        :return: A tuple of the list of ScopusPublications and the list of ScopusAuthorProfiles
+        """
+        publication_list = []
+        author_profile_list = []
+        while True:
+            try:
+                kind, _id, result = self.result_queue.get_nowait()
+            except queue.Empty:
+                break
+
+            with self.lock:
+                self.scheduled_set.discard((kind, _id))
+            if kind == self.PUBLICATION:
+                publication_list.append(result)
+            else:
+                author_profile_list.append(result)
+        return publication_list, author_profile_list
+
+    def stop(self, timeout=None):
+        """
+        Stops the worker after the request, which is currently running. The ids still waiting are dropped.
+
+        :param timeout: The float amount of seconds to wait for the thread to finish
+        :return: void
+        """
+        while True:
+            try:
+                self.request_queue.get_nowait()
+            except queue.Empty:
+                break
+        self.request_queue.put(None)
+        self.join(timeout)
+
+
+class ScopusCrawl:
+    """
+    A bulk crawl, which calls a function for every id of a set and records the progress in a ScopusCrawlJournal in
+    the temp folder, so that it can be resumed, after it has stopped with a crash or a lost connection.
+
+    The ids, for which the function raises an exception, are tried again after all the other ids, up to "max_retries"
+    times, waiting "backoff_seconds" before the first retry and twice as long before every further one, but at most
+    "max_backoff_seconds" (all from the "CRAWL" section of the config). The ids, that still fail are kept in the
+    journal for the next resume. Once all the ids are completed, the journal is removed.
+
+    The optional filter function reduces a list of ids to those, which still have to be crawled, as told by the
+    storage the crawl writes to, so that the ids completed in the journal are crawled again, if their results were
+    lost. The optional save function is called, before the journal is removed. With a concurrency greater than 1, the
+    function is called by that many threads of a ScopusPipelineStage at the same time. The attempts are reported to
+    the ProgressReporter as a task with the name of the crawl.
+    """
+    def __init__(self, name, function, filter_function=None, save_function=None, folder_path=None, concurrency=1):
+        self.name = name
+        self.function = function
+        self.filter_function = filter_function
+        self.save_function = save_function
+        self.concurrency = concurrency
+
+        config = Config.get_instance()
+        self.max_retries = config.getint('CRAWL', 'max_retries', fallback=3)
+        self.backoff_seconds = config.getfloat('CRAWL', 'backoff_seconds', fallback=2)
+        self.max_backoff_seconds = config.getfloat('CRAWL', 'max_backoff_seconds', fallback=60)
+
+        if folder_path is None:
+            folder_path = PATH + '/temp'
+        self.journal = ScopusCrawlJournal(name, folder_path)
+        self.progress_task = None  # type: ProgressTask
+
+        self.logger = logging.getLogger('ScopusCrawl')
+
+    def run(self, id_list):
+        """
+        Adds the given ids to the crawl and then resumes it. Ids, which have already been completed by an earlier
+        crawl, that has not finished yet, are not crawled again.
+
+        :param id_list: The list of ids
+        :return: The dict with the completed ids as keys and the results of the function as values
+        """
+        self.journal.load()
+        self.journal.plan(id_list)
+        return self.resume()
+
+    def resume(self):
+        """
+        Continues the crawl: first the ids, which have not been tried yet, then the failed ones with the backoff.
+
+        :return: The dict with the completed ids as keys and the results of the function as values
+        """
+        self.journal.load()
+        self.progress_task = ProgressReporter.get_instance().task(self.name)
+        try:
+            self._attempt_multiple(self._remaining_ids(failed=False))
+
+            for retry in range(self.max_retries):
+                failed_id_list = self._remaining_ids(failed=True)
+                if len(failed_id_list) == 0:
+                    break
+                time.sleep(min(self.backoff_seconds * 2 ** retry, self.max_backoff_seconds))
+                self._attempt_multiple(failed_id_list)
+
+            result_dict = self.journal.results
+            if self.journal.is_finished():
+                if self.save_function is not None:
+                    self.save_function()
+                self.journal.wipe()
+            else:
+                self.logger.warning('The crawl "{}" stopped with {} failed ids, continue it with resume'.format(
+                    self.name,
+                    len(self.journal.failed_ids())
+                ))
+            return result_dict
+        finally:
+            self.progress_task.finish()
+            self.journal.close()
+
+    def _remaining_ids(self, failed):
+        if failed:
+            id_list = self.journal.failed_ids()
+        elif self.filter_function is None:
+            return self.journal.pending_ids()
+        else:
+            id_list = list(filter(lambda x: not self.journal.is_failed(x), self.journal.planned_ids()))
+
+        if self.filter_function is None:
+            return id_list
+
+        # The ids, which are not left according to the filter, are done already
+        remaining_id_set = set(self.filter_function(id_list))
+        for _id in id_list:
+            if _id not in remaining_id_set and not self.journal.is_completed(_id):
+                self.journal.complete(_id)
+        return list(filter(lambda x: x in remaining_id_set, id_list))
+
+    def _attempt_multiple(self, id_list):
+        self.progress_task.add_total(len(id_list))
+        if self.concurrency <= 1:
+            for _id in id_list:
+                self._attempt(_id)
+            return
+
+        stage = ScopusPipelineStage(self.name, lambda x, emit: self._attempt(x), self.concurrency, 2 * self.concurrency)
+        stage.start()
+        for _id in id_list:
+            stage.put(_id)
+        stage.close()
+        stage.join()
+
+    def _attempt(self, _id):
+        try:
+            self.journal.complete(_id, self.function(_id))
+            self.progress_task.advance()
+        except Exception as exception:
+            self.journal.fail(_id, str(exception))
+            self.progress_task.advance(failed=True)
+            self.logger.warning('The crawl "{}" failed for "{}" with "{}"'.format(self.name, _id, str(exception)))
+
+
+class ScopusPipelineStage:
+    """
+    One stage of the ScopusCachePipeline.
+
+    The items put into the bounded queue of the stage are worked off by the given amount of threads. The function of
+    the stage is called with every item and the emit method of the stage, which puts the results into the queue of the
+    next stage. Once the queue of the next stage is full, emitting blocks, which holds back this stage and in turn the
+    ones before. An item, for which the function fails, is logged and counted, but does not stop the stage.
+    Closing the stage lets the threads finish the remaining items, after which the next stage is closed as well.
+    If the stage has a progress task, every processed or failed item advances it.
+    """
+    STOP = object()
+
+    def __init__(self, name, function, concurrency=1, queue_size=100, release_function=None):
+        self.name = name
+        self.function = function
+        self.concurrency = max(1, concurrency)
+        self.release_function = release_function
+
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.next_stage = None  # type: ScopusPipelineStage
+        self.progress_task = None  # type: ProgressTask
+
+        self.thread_list = []
+        self.active_count = 0
+        self.lock = threading.Lock()
+
+        self.processed_count = 0
+        self.failed_count = 0
+
+        self.logger = logging.getLogger('ScopusPipeline')
+
+    def start(self):
+        self.active_count = self.concurrency
+        for index in range(self.concurrency):
+            thread = threading.Thread(target=self._work, name='{}-{}'.format(self.name, index), daemon=True)
+            thread.start()
+            self.thread_list.append(thread)
+
+    def put(self, item):
+        self.queue.put(item)
+
+    def emit(self, item):
+        if self.next_stage is not None:
+            self.next_stage.put(item)
+
+    def close(self):
+        # Every thread stops with the first stop marker it gets, which is after all the items put before
+        for index in range(self.concurrency):
+            self.queue.put(self.STOP)
+
+    def join(self):
+        for thread in self.thread_list:
+            thread.join()
+
+    def _work(self):
+        while True:
+            item = self.queue.get()
+            if item is self.STOP:
+                break
+
+            try:
+                self.function(item, self.emit)
+                with self.lock:
+                    self.processed_count += 1
+                if self.progress_task is not None:
+                    self.progress_task.advance()
+            except Exception as exception:
+                with self.lock:
+                    self.failed_count += 1
+                if self.progress_task is not None:
+                    self.progress_task.advance(failed=True)
+                self.logger.warning('The stage "{}" failed for "{}" with "{}"'.format(self.name, item, str(exception)))
+            finally:
+                if self.release_function is not None:
+                    self.release_function()
+
+        # The last thread to finish closes the next stage
+        with self.lock:
+            self.active_count -= 1
+            last = self.active_count == 0
+        if last and self.next_stage is not None:
+            self.next_stage.close()
+
+
+class ScopusCachePipeline:
+    """
+    Loads the observed authors and their publications into the cache as a pipeline of stages.
+
+    The stages are the refresh of the author profiles, the expansion of the profiles into the ids of the publications,
+    the fetch of those publications, the expansion of the publications into their citing publications with the
+    citation graph and the fetch of the citing publications. Each stage runs with its own amount of threads, given by
+    "<stage>_concurrency" in the "PIPELINE" section of the config, and is connected to the next one by a queue of the
+    size "queue_size", so that the later stages already work, while the earlier ones are still requesting.
+    The persistence is the last stage of every fetch: the fetched objects are put into the write queue of the top
+    controller, which blocks as well, once it is full.
+
+    Only the objects, which are not already in the cache are requested, unless reload is set. Every publication is
+    requested at most once, even if it is both published by an observed author and citing one.
+    The authors and publications are reported to the ProgressReporter as the task "load_cache_observed", whose total
+    grows with every publication handed to a fetch stage.
+    """
+    AUTHORS = 'authors'
+    PUBLICATION_IDS = 'publication_ids'
+    PUBLICATIONS = 'publications'
+    CITATIONS = 'citations'
+    CITATION_PUBLICATIONS = 'citation_publications'
+
+    # The stages, whose items are counted by the progress task
+    FETCH_STAGES = (AUTHORS, PUBLICATIONS, CITATION_PUBLICATIONS)
+
+    DEFAULT_CONCURRENCY = {
+        AUTHORS: 2,
+        PUBLICATION_IDS: 1,
+        PUBLICATIONS: 4,
+        CITATIONS: 1,
+        CITATION_PUBLICATIONS: 4
+    }
+
+    def __init__(self, top_controller, load_citations=True, reload=False, scopus_controller_class=ScopusController):
+        self.top_controller = top_controller  # type: ScopusTopController
+        self.cache_controller = top_controller.cache_controller  # type: ScopusCacheController
+        self.citation_graph_controller = top_controller.citation_graph_controller
+        self.write_queue = top_controller.write_queue
+
+        self.load_citations = load_citations
+        self.reload = reload
+        self.scopus_controller_class = scopus_controller_class
+
+        # The ids of the publications, which have already been handed to one of the fetch stages
+        self.scheduled_set = set()
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.reporter = ProgressReporter.get_instance()
+        self.progress_task = None  # type: ProgressTask
+
+        # The database connection of a worker thread is given back to the pool after every item, so that the amount of
+        # threads is not limited by the size of the pool
+        self.database_access = create_database_access()
+
+        stage_function_list = [
+            (self.AUTHORS, self._refresh_author),
+            (self.PUBLICATION_IDS, self._expand_publication_ids),
+            (self.PUBLICATIONS, self._fetch_publication)
+        ]
+        if load_citations:
+            stage_function_list += [
+                (self.CITATIONS, self._expand_citations),
+                (self.CITATION_PUBLICATIONS, self._fetch_citation_publication)
+            ]
+
+        config = Config.get_instance()
+        queue_size = config.getint('PIPELINE', 'queue_size', fallback=100)
+        self.stage_list = []
+        for name, function in stage_function_list:
+            concurrency = config.getint(
+                'PIPELINE',
+                '{}_concurrency'.format(name),
+                fallback=self.DEFAULT_CONCURRENCY[name]
+            )
+            stage = ScopusPipelineStage(name, function, concurrency, queue_size, self.database_access.release)
+            if len(self.stage_list) != 0:
+                self.stage_list[-1].next_stage = stage
+            self.stage_list.append(stage)
+
+        self.logger = logging.getLogger('ScopusPipeline')
+
+    @property
+    def scopus_controller(self):
+        # Every thread uses its own scopus controller, as those keep the state of the current request
+        scopus_controller = getattr(self.local, 'scopus_controller', None)
+        if scopus_controller is None:
+            scopus_controller = self.scopus_controller_class()
+            self.local.scopus_controller = scopus_controller
+        return scopus_controller
+
+    @property
+    def statistics(self):
+        """
+        The amounts of the items processed and failed by every stage.
+
+        :return: A dict with the stage names as keys and dicts with the keys "processed" and "failed" as values
+        """
+        statistics_dict = {}
+        for stage in self.stage_list:
+            statistics_dict[stage.name] = {
+                'processed': stage.processed_count,
+                'failed': stage.failed_count
+            }
+        return statistics_dict
+
+    def run(self, author_id_list):
+        """
+        Puts the given author ids into the first stage and waits until all the stages and the write queue are done.
+
+        :param author_id_list: The list of int author ids
+        :return: The statistics dict
+        :raises RuntimeError: If any of the fetched objects could not be written into the cache
+        """
+        # Committing the own pending operations first, so the writing thread does not have to wait for them
+        self.cache_controller.save()
+        author_id_list = list(author_id_list)
+        write_failed_count = self.write_queue.failed_count
+        self.progress_task = self.reporter.task('load_cache_observed', len(author_id_list))
+        for stage in self.stage_list:
+            if stage.name in self.FETCH_STAGES:
+                stage.progress_task = self.progress_task
+            stage.start()
+
+        try:
+            for author_id in author_id_list:
+                self.stage_list[0].put(author_id)
+        finally:
+            try:
+                self.stage_list[0].close()
+                for stage in self.stage_list:
+                    stage.join()
+                # The failures of the writes are raised here and not in the stage threads, which put the objects
+                self.write_queue.flush()
+            finally:
+                self.progress_task.finish()
+
+        # The exception of a failed write may already have been raised to the owner of the write queue before
+        write_failed_count = self.write_queue.failed_count - write_failed_count
+        if write_failed_count != 0:
+            raise RuntimeError('Writing {} objects of the pipeline into the cache failed'.format(write_failed_count))
+
+        self.logger.info('Loaded the observed authors into the cache: {}'.format(self.statistics))
+        return self.statistics
+
+    def _schedule(self, scopus_id):
+        with self.lock:
+            if scopus_id in self.scheduled_set:
+                return False
+            self.scheduled_set.add(scopus_id)
+        self.progress_task.add_total()
+        return True
+
+    def _request_publication(self, scopus_id):
+        publication = self.scopus_controller.get_publication(scopus_id)
+        self.write_queue.put('publication_cache', publication)
+        return publication
+
+    def _refresh_author(self, author_id, emit):
+        author_profile = CACHE_MISS
+        if not self.reload:
+            author_profile = self.cache_controller.lookup_author_profile(author_id)
+            self.reporter.record_cache(author_profile is not CACHE_MISS)
+        if author_profile is CACHE_MISS:
+            author_profile = self.scopus_controller.get_author_profile(author_id)
+            self.write_queue.put('author_cache', author_profile)
+
+        if author_profile is not None:
+            emit(author_profile)
+
+    def _expand_publication_ids(self, author_profile, emit):
+        # The publications of the observed authors are never evicted from the cache
+        scopus_id_list = list(map(int, author_profile.publications))
+        self.cache_controller.pin_publications(scopus_id_list)
+        for scopus_id in scopus_id_list:
+            if self._schedule(scopus_id):
+                emit(scopus_id)
+
+    def _fetch_publication(self, scopus_id, emit):
+        # The cached publications only have to be selected, if their citations are to be expanded
+        if not self.reload and self._cached(scopus_id):
+            if not self.load_citations:
+                return
+            publication = self.cache_controller.select_publication(scopus_id)
+        else:
+            publication = self._request_publication(scopus_id)
+
+        if publication is not None:
+            emit(publication)
+
+    def _expand_citations(self, publication, emit):
+        self.citation_graph_controller.insert_publications([publication])
+        self.citation_graph_controller.save()
+        for scopus_id in self.citation_graph_controller.citing_ids(int(publication)):
+            if self._schedule(scopus_id):
+                emit(scopus_id)
+
+    def _fetch_citation_publication(self, scopus_id, emit):
+        if self.reload or not self._cached(scopus_id):
+            self._request_publication(scopus_id)
+
+    def _cached(self, scopus_id):
+        cached = self.cache_controller.contains_publication(scopus_id)
+        self.reporter.record_cache(cached)
+        return cached
+
+
+class ScopusCitationClosureCrawler:
+    """
+    Loads the publications citing the given publications into the cache, up to a given depth of the citation graph.
+
+    The citation graph is walked breadth first: all the publications of one depth are fetched in parallel by the
+    threads of a ScopusPipelineStage, then their citations are added to the citation graph and the citing
+    publications, which have not been visited yet, form the frontier of the next depth. The walk stops at the maximum
+    depth, with the publications of that depth being loaded, but not expanded, or once the maximum amount of visited
+    publications is reached. The fetched publications are written through the write queue and the write queue is
+    flushed after every depth, so that the cache keeps the progress of the completed depths. The fetched publications
+    are reported to the ProgressReporter as the task "citation_closure".
+    """
+    def __init__(self, top_controller, max_depth=None, max_size=None, reload=False,
+                 scopus_controller_class=ScopusController):
+        self.cache_controller = top_controller.cache_controller  # type: ScopusCacheController
+        self.citation_graph_controller = top_controller.citation_graph_controller
+        self.write_queue = top_controller.write_queue
+
+        config = Config.get_instance()
+        if max_depth is None:
+            max_depth = config.getint('CRAWL', 'closure_max_depth', fallback=2)
+        if max_size is None:
+            max_size = config.getint('CRAWL', 'closure_max_size', fallback=10000)
+        self.max_depth = max_depth
+        self.max_size = max_size
+        self.concurrency = config.getint('CRAWL', 'closure_concurrency', fallback=4)
+        self.reload = reload
+        self.scopus_controller_class = scopus_controller_class
+
+        # The publications fetched for the current depth
+        self.publication_list = []
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.reporter = ProgressReporter.get_instance()
+        self.progress_task = None  # type: ProgressTask
+
+        self.database_access = create_database_access()
+
+        self.logger = logging.getLogger('ScopusClosure')
+
+    @property
+    def scopus_controller(self):
+        scopus_controller = getattr(self.local, 'scopus_controller', None)
+        if scopus_controller is None:
+            scopus_controller = self.scopus_controller_class()
+            self.local.scopus_controller = scopus_controller
+        return scopus_controller
+
+    def run(self, scopus_id_list):
+        """
+        Walks the citation graph starting with the given publications.
+
+        :param scopus_id_list: The list of the int scopus ids of the publications of the depth 0
+        :return: A dict with the int scopus ids of all the visited publications as keys and their int depths as values
+
+        :raises RuntimeError: If any of the fetched publications could not be written into the cache
+        """
+        depth_dict = {}
+        frontier_list = []
+        for scopus_id in map(int, scopus_id_list):
+            if scopus_id not in depth_dict.keys() and len(depth_dict) < self.max_size:
+                depth_dict[scopus_id] = 0
+                frontier_list.append(scopus_id)
+
+        # Committing the own pending operations first, so the writing thread does not have to wait for them
+        self.cache_controller.save()
+        write_failed_count = self.write_queue.failed_count
+        self.progress_task = self.reporter.task('citation_closure')
+        try:
+            self._walk(depth_dict, frontier_list)
+        finally:
+            self.progress_task.finish()
+
+        write_failed_count = self.write_queue.failed_count - write_failed_count
+        if write_failed_count != 0:
+            raise RuntimeError('Writing {} publications of the closure into the cache failed'.format(
+                write_failed_count
+            ))
+        return depth_dict
+
+    def _walk(self, depth_dict, frontier_list):
+        depth = 0
+        while len(frontier_list) != 0:
+            self.progress_task.add_total(len(frontier_list))
+            publication_list = self._fetch_depth(frontier_list)
+            self.write_queue.flush()
+            self.logger.info('Loaded {} publications of the depth {}'.format(len(publication_list), depth))
+
+            if depth >= self.max_depth or len(depth_dict) >= self.max_size:
+                break
+
+            # The citing publications, which have not been visited yet, are the frontier of the next depth
+            self.citation_graph_controller.insert_publications(publication_list)
+            self.citation_graph_controller.save()
+            depth += 1
+            frontier_list = []
+            for scopus_id in self.citation_graph_controller.citing_ids_multiple(list(map(int, publication_list))):
+                if len(depth_dict) >= self.max_size:
+                    break
+                if scopus_id not in depth_dict.keys():
+                    depth_dict[scopus_id] = depth
+                    frontier_list.append(scopus_id)
+
+    def _fetch_depth(self, scopus_id_list):
+        self.publication_list = []
+        stage = ScopusPipelineStage(
+            'closure',
+            self._fetch_publication,
+            self.concurrency,
+            len(scopus_id_list) + self.concurrency,
+            self.database_access.release
+        )
+        stage.progress_task = self.progress_task
+        stage.start()
+        for scopus_id in scopus_id_list:
+            stage.put(scopus_id)
+        stage.close()
+        stage.join()
+        return self.publication_list
+
+    def _fetch_publication(self, scopus_id, emit):
+        cached = not self.reload and self.cache_controller.contains_publication(scopus_id)
+        self.reporter.record_cache(cached)
+        if cached:
+            publication = self.cache_controller.select_publication(scopus_id)
+        else:
+            publication = self.scopus_controller.get_publication(scopus_id)
+            self.write_queue.put('publication_cache', publication)
+
+        if publication is not None:
+            with self.lock:
+                self.publication_list.append(publication)
+
+
 class ScopusTopController:
 
     def __init__(self):
         self.observation_controller = ScopusObservationController()
         self.scopus_controller = ScopusController()
         self.backup_controller = ScopusBackupController()
+
+        # The normalized relation tables are only written, if they are enabled in the config
+        self.config = Config.get_instance()
+        relation_model_class = None
+        if self.config.getboolean('MYSQL', 'relation_tables', fallback=False):
+            relation_model_class = ScopusPublicationRelationModel
+
+        # The cache is either stored in the sql database or in the memory mapped LMDB key value store
+        if self.config.get('DATABASE', 'cache_backend', fallback='sql') == 'lmdb':
+            publication_cache_model_class = ScopusPublicationLMDBCacheModel
+            author_cache_model_class = ScopusAuthorLMDBCacheModel
+        else:
+            publication_cache_model_class = ScopusPublicationDatabaseCacheModel
+            author_cache_model_class = ScopusAuthorDatabaseCacheModel
+
         self.cache_controller = ScopusCacheController(
-            ScopusPublicationDatabaseCacheModel,
-            ScopusAuthorDatabaseCacheModel
+            publication_cache_model_class,
+            author_cache_model_class,
+            relation_model_class
+        )
+
+        # The graph of the citations between the cached publications, for the lookups of the citing publications
+        self.citation_graph_controller = ScopusCitationGraphController()
+
+        # The publications of the observed authors are never evicted from the size bounded cache
+        self.cache_controller.add_pin_function(self._cached_publication_ids_observed)
+
+        # The bulk loading methods leave the writing of the requested objects to a background thread, so that the
+        # next request can already be sent, while the last ones are still being written
+        self.write_queue = create_write_queue()
+        self.write_queue.register(
+            'publication_cache',
+            self.cache_controller.insert_multiple_publications,
+            self.cache_controller.save
+        )
+        self.write_queue.register(
+            'author_cache',
+            self.cache_controller.insert_multiple_author_profiles,
+            self.cache_controller.save
+        )
+        self.write_queue.register(
+            'publication_backup',
+            self.backup_controller.insert_multiple_publications,
+            self.backup_controller.save
         )
 
+        # The time to live of the cache entries, given in days in the config, with 0 meaning they never expire
+        self.publication_max_age = self._max_age('publication_ttl')
+        self.author_max_age = self._max_age('author_ttl')
+
+        # With refresh ahead enabled, the hot entries are renewed in the background, once they are within the margin
+        # before their expiration
+        self.refresh_margin = datetime.timedelta(days=self.config.getfloat('CACHE', 'refresh_margin', fallback=1))
+        self.refresh_interval = self.config.getfloat('CACHE', 'refresh_interval', fallback=60)
+        self.refresh_batch_size = self.config.getint('CACHE', 'refresh_batch_size', fallback=50)
+        self.refresh_time = 0
+        self.refresh_worker = None  # type: ScopusCacheRefreshWorker
+        if self.config.getboolean('CACHE', 'refresh_ahead', fallback=False):
+            self.refresh_worker = ScopusCacheRefreshWorker()
+            self.refresh_worker.start()
+
+        # Whether to explore the affiliations of the authors from the search results of their publications, instead of
+        # from the abstracts of all their publications
+        self.affiliation_search = self.config.getboolean('CRAWL', 'affiliation_search', fallback=True)
+
         self.logger = logging.getLogger('ScopusTop')
 
+    def _cached_publication_ids_observed(self):
+        # Only using the author profiles, which are already cached, as this is called from within the cache
+        scopus_id_set = set()
+        for author_id in self.observation_controller.all_observed_ids():
+            author_profile = self.cache_controller.lookup_author_profile(author_id)
+            if author_profile is not CACHE_MISS:
+                scopus_id_set.update(map(int, author_profile.publications))
+        return list(scopus_id_set)
+
+    def _max_age(self, option):
+        days = self.config.getfloat('CACHE', option, fallback=0)
+        if days <= 0:
+            return None
+        return datetime.timedelta(days=days)
+
+    def close(self):
+        """
+        Writes the remaining items of the write queue, stops the refresh worker and commits all the operations, which
+        are still pending in the open transactions of the cache and the backup.
+
+        :return: void
+        """
+        self.write_queue.close()
+        if self.refresh_worker is not None:
+            self.refresh_worker.stop(timeout=self.refresh_interval)
+            self._save_refreshed()
+            self.refresh_worker = None
+        self.cache_controller.save()
+        self.backup_controller.save()
+        self.citation_graph_controller.save()
+
+    def refresh_ahead(self):
+        """
+        Writes the entries, which have been renewed by the refresh worker in the meantime into the cache and schedules
+        the next hot entries, which are about to expire. The scheduling is only done once per refresh interval.
+
+        :return: void
+        """
+        if self.refresh_worker is None:
+            return
+
+        self._save_refreshed()
+
+        if time.time() - self.refresh_time < self.refresh_interval:
+            return
+        self.refresh_time = time.time()
+
+        if self.publication_max_age is not None:
+            scopus_id_list = self.cache_controller.select_refresh_publication_ids(
+                self.publication_max_age,
+                self.refresh_margin,
+                self.refresh_batch_size
+            )
+            self.refresh_worker.schedule(ScopusCacheRefreshWorker.PUBLICATION, scopus_id_list)
+
+        if self.author_max_age is not None:
+            author_id_list = self.cache_controller.select_refresh_author_ids(
+                self.author_max_age,
+                self.refresh_margin,
+                self.refresh_batch_size
+            )
+            self.refresh_worker.schedule(ScopusCacheRefreshWorker.AUTHOR, author_id_list)
+        self.cache_controller.save()
+
+    def _save_refreshed(self):
+        publication_list, author_profile_list = self.refresh_worker.drain()
+        if len(publication_list) != 0:
+            self.cache_controller.insert_multiple_publications(publication_list)
+        if len(author_profile_list) != 0:
+            self.cache_controller.insert_multiple_author_profiles(author_profile_list)
+        if len(publication_list) + len(author_profile_list) != 0:
+            self.cache_controller.save()
+            self.logger.info('Renewed {} publications and {} author profiles in the cache'.format(
+                len(publication_list),
+                len(author_profile_list)
+            ))
+
     #####################
     # TOP LEVEL METHODS #
     #####################
@@ -53,41 +854,78 @@ class ScopusTopController:
         IN: {('john', 'doe'): [1987623, 1294401]}
         OUT: {('john', 'doe'): {1987623: [8383992, 12387293],
                                 1294401: [2312123]}
+        The exploration is a resumable crawl. Authors, whose requests keep failing, are missing from the returned dict
+        and can be explored later on with resume_crawl.
         :param author_dict: {('first name', 'last name') -> [author ids]}}
         :return: {('first name', 'last name') -> {author id -> [affiliation ids]}}
         """
-        author_affiliation_dict = {}
+        # The ids of the crawl are the name tuples together with the author ids, so that a crawl can be resumed without
+        # the author dict
+        crawl_id_list = []
+        for name_tuple, author_id_list in author_dict.items():
+            crawl_id_list.append((name_tuple, tuple(author_id_list)))
 
-        self.logger.info('loading temp storage for author aff.')
+        self.logger.info('requesting publications for affiliations')
+        result_dict = self._create_crawl('affiliations').run(crawl_id_list)
+        self.logger.info('finished exploring affiliations')
+        return self._affiliation_crawl_results(result_dict)
+
+    def _explore_affiliations(self, crawl_id):
+        # Getting the affiliation id list for each of the author ids of one author
+        affiliation_dict = {}
+        for author_id in crawl_id[1]:
+            if self.affiliation_search:
+                affiliation_dict[author_id] = self.scopus_controller.get_author_affiliations(author_id)
+            else:
+                affiliation_dict[author_id] = self.get_affiliations_author(author_id)
+        return affiliation_dict
+
+    @staticmethod
+    def _affiliation_crawl_results(result_dict):
+        author_affiliation_dict = {}
+        for crawl_id, affiliation_dict in result_dict.items():
+            author_affiliation_dict[crawl_id[0]] = affiliation_dict
+        return author_affiliation_dict
 
-        # The naming function for the storage files
-        def name_function(obj): return ''.join(list(obj.keys())[0])
-        # Creating the temp storage list to save data persistently in case of crash
-        temp_list = TempPersistentSequenceModel('au_aff', PATH + '/temp', name_function)
-        temp_list.load()
+    def _create_crawl(self, name):
+        if name == 'affiliations':
+            # Only the search requests are independent of each other and can be sent for multiple authors at once
+            concurrency = 1
+            if self.affiliation_search:
+                concurrency = self.config.getint('CRAWL', 'affiliation_concurrency', fallback=4)
+            return ScopusCrawl(name, self._explore_affiliations, concurrency=concurrency)
+        elif name == 'publications':
+            return ScopusCrawl(
+                name,
+                self._load_publication,
+                self.cache_controller.missing_publication_ids,
+                self.write_queue.flush
+            )
+        elif name == 'publications_reload':
+            return ScopusCrawl(name, self._load_publication, None, self.write_queue.flush)
+        else:
+            raise ValueError('There is no crawl "{}"'.format(name))
 
-        # Loading the values, that were already saved in the temp list
-        for temp_dict in temp_list:
-            author_affiliation_dict.update(temp_dict)
+    def resume_crawl(self, name):
+        """
+        Continues a crawl, that has stopped because of an error, exactly where it stopped and retries the ids, that
+        have failed.
 
-        self.logger.info('requesting publications for affiliations')
-        for name_tuple, author_id_list in author_dict.items():
-            # Only really processing and requesting for a user, if that user is not already in the dict
-            if name_tuple not in author_affiliation_dict.keys():
-                # Getting the affiliation id list for each of the author ids and saving the list as the value to the key
-                # being the author id
-                affiliation_dict = {}
-                for author_id in author_id_list:
-                    affiliation_id_list = self.get_affiliations_author(author_id)
-                    affiliation_dict[author_id] = affiliation_id_list
-                # Adding the affiliation dict as the value to the name tuple key to the main dict
-                temp_dict = {name_tuple: affiliation_dict}
-                author_affiliation_dict.update(temp_dict)
-                # Saving the temp dict, which represents the main entry for a single author
-                temp_list.append(temp_dict)
+        :param name: The name of the crawl: "publications" for load_publications_cache, "publications_reload" for
+            load_publications_cache with reload or "affiliations" for explore_author_affiliations
+        :return: The dict with the completed ids as keys and the results as values. For the affiliations the same
+            dict as returned by explore_author_affiliations
+        """
+        crawl = self._create_crawl(name)
+        self.cache_controller.save()
+        try:
+            result_dict = crawl.resume()
+        finally:
+            self.write_queue.flush()
 
-        self.logger.info('finished exploring affiliations')
-        return author_affiliation_dict
+        if name == 'affiliations':
+            return self._affiliation_crawl_results(result_dict)
+        return result_dict
 
     def get_affiliations_author(self, author_id):
         """
@@ -138,15 +976,18 @@ class ScopusTopController:
         :param caching: boolean flag if use caching or not
         :return: ScopusAuthorProfile
         """
-        # Checking if the author profile is already in the cache
-        is_cached = self.cache_controller.contains_author_profile(author_id)
-        if is_cached and caching:
-            author_profile = self.cache_controller.select_author_profile(author_id)
-        else:
-            # Actually requesting from scopus website and then writing back into the cache
-            author_profile = self.scopus_controller.get_author_profile(author_id)
-            self.cache_controller.insert_author_profile(author_profile)
-            self.cache_controller.save()
+        # Attempting to get the author profile from the cache with a single query. Expired entries count as misses
+        self.refresh_ahead()
+        if caching:
+            author_profile = self.cache_controller.lookup_author_profile(author_id, self.author_max_age)
+            ProgressReporter.get_instance().record_cache(author_profile is not CACHE_MISS)
+            if author_profile is not CACHE_MISS:
+                return author_profile
+
+        # Actually requesting from scopus website and then writing back into the cache
+        author_profile = self.scopus_controller.get_author_profile(author_id)
+        self.cache_controller.insert_author_profile(author_profile)
+        self.cache_controller.save()
         return author_profile
 
     def get_publication(self, scopus_id, caching=True):
@@ -159,17 +1000,20 @@ class ScopusTopController:
         :param caching: boolean flag if caching enbled or not
         :return: ScopusPublication
         """
-        # Checking if the publication is in the cache and returning the cached value if possible
-        is_cached = self.cache_controller.contains_publication(scopus_id)
-        if is_cached and caching:
-            publication = self.cache_controller.select_publication(scopus_id)
-        else:
-            # If the publication is not cached, getting it from the scopus website
-            publication = self.scopus_controller.get_publication(scopus_id)
-
-            # And then writing it into the cache for the next time
-            self.cache_controller.insert_publication(publication)
-            self.cache_controller.save()
+        # Returning the cached value if possible, which only takes a single query. Expired entries count as misses
+        self.refresh_ahead()
+        if caching:
+            publication = self.cache_controller.lookup_publication(scopus_id, self.publication_max_age)
+            ProgressReporter.get_instance().record_cache(publication is not CACHE_MISS)
+            if publication is not CACHE_MISS:
+                return publication
+
+        # If the publication is not cached, getting it from the scopus website
+        publication = self.scopus_controller.get_publication(scopus_id)
+
+        # And then writing it into the cache for the next time
+        self.cache_controller.insert_publication(publication)
+        self.cache_controller.save()
         return publication
 
     def get_multiple_publications(self, scopus_id_list, caching=True):
@@ -180,10 +1024,33 @@ class ScopusTopController:
         :param caching: The boolean flag of whether to use caching or not
         :return: [ScopusPublication]
         """
-        publication_list = []
-        for scopus_id in scopus_id_list:
-            publication = self.get_publication(scopus_id, caching=caching)
-            publication_list.append(publication)
+        # Splitting the ids into those already in the cache and those, that have to be requested from scopus
+        self.refresh_ahead()
+        if caching:
+            publication_dict, miss_scopus_id_list = self.cache_controller.lookup_multiple_publications(
+                scopus_id_list,
+                self.publication_max_age
+            )
+            reporter = ProgressReporter.get_instance()
+            reporter.record_cache(True, len(publication_dict))
+            reporter.record_cache(False, len(miss_scopus_id_list))
+        else:
+            publication_dict, miss_scopus_id_list = {}, scopus_id_list
+        # Every repeated id is only requested once, keeping the order of the first occurrences
+        miss_scopus_id_list = list(collections.OrderedDict.fromkeys(map(int, miss_scopus_id_list)))
+
+        # Only the misses are requested and then written into the cache all at once
+        miss_publication_list = []
+        for scopus_id in miss_scopus_id_list:
+            publication = self.scopus_controller.get_publication(scopus_id)
+            publication_dict[int(scopus_id)] = publication
+            miss_publication_list.append(publication)
+
+        if len(miss_publication_list) != 0:
+            self.cache_controller.insert_multiple_publications(miss_publication_list)
+            self.cache_controller.save()
+
+        publication_list = list(map(lambda x: publication_dict[int(x)], scopus_id_list))
         return publication_list
 
     def get_publications_observed(self, caching=True):
@@ -241,6 +1108,7 @@ class ScopusTopController:
                 )
             )
 
+        self.cache_controller.pin_publications(publication_id_list)
         return publication_id_list
 
     def request_publication_ids_observed(self):
@@ -255,6 +1123,23 @@ class ScopusTopController:
             scopus_id_list += difference
         return scopus_id_list
 
+    def load_citation_closure(self, scopus_id_list=None, max_depth=None, max_size=None):
+        """
+        Loads the publications, which cite the given publications, directly or through other citing publications, up
+        to the given depth into the cache, see ScopusCitationClosureCrawler.
+
+        :param scopus_id_list: The list of int scopus ids to start with, on default the publications of the observed
+            authors
+        :param max_depth: The int max depth, on default the "closure_max_depth" of the "CRAWL" section of the config
+        :param max_size: The int max amount of publications, on default the "closure_max_size" of the config
+        :return: A dict with the int scopus ids of all the visited publications as keys and their int depths as values
+        """
+        if scopus_id_list is None:
+            scopus_id_list = self.get_publication_ids_observed()
+
+        crawler = ScopusCitationClosureCrawler(self, max_depth, max_size)
+        return crawler.run(scopus_id_list)
+
     def reload_cache_observed(self):
 
         # Loading the cache anew
@@ -262,19 +1147,19 @@ class ScopusTopController:
 
     def load_cache_observed(self, load_citations=True):
         """
-        First loads the observed authors profiles into the cache (requests only those not already in the cache).
-        Based on those author profiles loads the publications of all the observed authors into the cache and if the
+        Loads the observed authors profiles into the cache (requests only those not already in the cache). Based on
+        those author profiles loads the publications of all the observed authors into the cache and if the
         load_citations flag is set (default), all the publications, that have cited those publications will also be
         loaded into the cache.
 
+        The steps run at the same time as the stages of a ScopusCachePipeline, so the publications of the first author
+        are already requested, while the next author profiles are still being loaded.
+
         :param load_citations: boolean flag of whether or not to load the citation publications into the cache as well
-        :return: void
+        :return: The dict with the statistics of the pipeline
         """
-        # Loading the author profiles into the cache
-        self._load_cache_observed_authors()
-
-        # Loading the publications of the observed authors into the cache
-        self._load_cache_observed_publications(load_citations=load_citations)
+        pipeline = ScopusCachePipeline(self, load_citations=load_citations)
+        return pipeline.run(self.observation_controller.all_observed_ids())
 
     def load_publications_cache(self, scopus_id_list, auto_save_interval=10, reload=False):
         """
@@ -283,39 +1168,36 @@ class ScopusTopController:
 
         Although only specifically requests those publications from the web, that are not already in the cache, for
         network performance reasons. All the publications can be requested by setting reload to true.
-        Also the cache auto saves after the specified amount for the auto save interval in case of connection error.
+        The publications are written into the cache by the write queue, in batches of the "write_batch_size" of the
+        config, while the next ones are requested. In case of an error all the publications requested so far are
+        still written. Failed requests are retried with a backoff and the whole load can be continued with
+        resume_crawl, see ScopusCrawl.
 
         :param scopus_id_list: The list of scopus ids, for all the publications to be loaded into the cache
-        :param auto_save_interval: The amount of publications to be fetched from the scopus website, before the
-            cache saves the progress. default on 20
+        :param auto_save_interval: Deprecated, the progress is saved with every batch of the write queue
         :param reload: The boolean value of whether or not to get all the specified publications from the scopus
             website or leave out those, already in the cache
         :return: void
         """
-        # Getting the list of publication ids for those publications, that are still in the cache
-        cache_scopus_id_list = self.cache_controller.select_all_publication_ids()
-
-        # If the reload flag is True, using the whole scopus id list as the list to be requested from the scopus site
-        # else, only using those ids, that are not in the cache already
+        # If the reload flag is True, the whole scopus id list is requested from the scopus site, else only those ids,
+        # that are not in the cache already, as told by the id index of the cache. The progress is kept in a crawl
+        # journal, so a crawl stopped by an error can be continued with resume_crawl
         if reload:
-            difference_scopus_id_list = scopus_id_list
+            crawl = self._create_crawl('publications_reload')
         else:
-            difference_scopus_id_list = list(set(scopus_id_list) - set(cache_scopus_id_list))
-
-        auto_save_count = 0
-        for scopus_id in difference_scopus_id_list:
-            # Auto saving if the count has reached the specified interval and then resetting the counter
-            if auto_save_count == auto_save_interval:
-                self.cache_controller.save()
-                auto_save_count = 0
-
-            # Getting the publication from the scopus website
-            publication = self.scopus_controller.get_publication(scopus_id)
-            self.cache_controller.insert_publication(publication)
-
-            auto_save_count += 1
+            crawl = self._create_crawl('publications')
 
+        # Committing the own pending operations first, so the writing thread does not have to wait for them
         self.cache_controller.save()
+        try:
+            crawl.run(list(map(int, scopus_id_list)))
+        finally:
+            self.write_queue.flush()
+
+    def _load_publication(self, scopus_id):
+        # Getting the publication from the scopus website and leaving the writing to the write queue
+        publication = self.scopus_controller.get_publication(scopus_id)
+        self.write_queue.put('publication_cache', publication)
 
     def load_authors_cache(self, author_id_list, auto_save_interval=10, reload=False):
         """
@@ -325,82 +1207,32 @@ class ScopusTopController:
         On default, only those author profiles, that cannot already be found in the cache will be explicitly
         requested from the scopus website. When reload is True, all the author profiles will be requested and the
         possibly existing cache will be overwritten.
-        Also the cache auto saves after the specified amount for the auto save interval, in case of connection
-        error or exception.
+        The author profiles are written into the cache by the write queue, like with load_publications_cache.
 
         :param author_id_list: The list of author ids for the author profiles to be loaded into the cache
-        :param auto_save_interval: The int amount of author profiles to be requested before the cache saves the
-            progress into persistency.
+        :param auto_save_interval: Deprecated, the progress is saved with every batch of the write queue
         :param reload: The boolean value of whether or not the
         :return: void
         """
-        cache_author_id_list = self.cache_controller.select_all_author_ids()
-
-        # Subtracting the the observed from the cached ids and adding only the left over to the cache
+        # Subtracting the the cached from the observed ids and adding only the left over to the cache
         if reload:
             difference_author_id_list = author_id_list
         else:
-            difference_author_id_list = list(set(author_id_list) - set(cache_author_id_list))
+            difference_author_id_list = self.cache_controller.missing_author_ids(author_id_list)
 
-        auto_save_counter = 0
-        for author_id in difference_author_id_list:
-            # Saving during the process, so progress is not lost after connection error
-            if auto_save_counter == auto_save_interval:
-                self.cache_controller.save()
-                auto_save_counter = 0
-
-            # Requesting the author profile from the scopus website
-            author_profile = self.scopus_controller.get_author_profile(author_id)
-            self.cache_controller.insert_author_profile(author_profile)
-            auto_save_counter += 1
         self.cache_controller.save()
-
-    def _load_cache_observed_authors(self):
-        """
-        Loads the author profiles for all the observed authors into the cache, but only specifically requests those,
-        which are not already in the cache.
-
-        :return: void
-        """
-        # Getting the list of author ids for the observed authors from the observation controller
-        observed_author_id_list = self.observation_controller.all_observed_ids()
-
-        # Loading all those author profiles of the observed authors into the cache
-        self.load_authors_cache(observed_author_id_list)
-
-    def _load_cache_observed_publications(self, load_citations=True):
-        """
-        Loads all the publications of the observed authors into the cache, but only those, that are not already in the
-        cache. Also loads all the publication, that have cited the observed publications into the cache if enabled.
-
-        :param load_citations: boolean flag of whether or not to also load the citation publications into the cache
-        :return: void
-        """
-        # Getting the list of publication ids for all the observed authors from the cache
-        observed_publication_id_list = self.get_publication_ids_observed()
-
-        # Loading all those publications into the cache after having them requested from the scopus website
-        self.load_publications_cache(observed_publication_id_list)
-
-        if load_citations:
-            # Getting the citations scopus id list from every one of those publications
-            citation_scopus_id_list = []
-            for scopus_id in observed_publication_id_list:
-                publication = self.cache_controller.select_publication(scopus_id)
-
-                # Protecting against the unlikely case of corrupted data with double checking for None
-                if publication is not None:
-                    difference = list(set(publication.citations) - set(citation_scopus_id_list))
-                    citation_scopus_id_list += difference
-
-            # Loading all those publications into the cache as well
-            self.load_publications_cache(citation_scopus_id_list)
+        try:
+            for author_id in difference_author_id_list:
+                # Requesting the author profile from the scopus website and leaving the writing to the write queue
+                author_profile = self.scopus_controller.get_author_profile(author_id)
+                self.write_queue.put('author_cache', author_profile)
+        finally:
+            self.write_queue.flush()
 
     def get_citation_publications(self, publication):
         publication_list = self.scopus_controller.get_citation_publications(publication)
-        # Caching all the citation publications
-        for publication in publication_list:
-            self.cache_controller.insert_publication(publication)
+        # Caching all the citation publications with one bulk insert
+        self.cache_controller.insert_multiple_publications(publication_list)
         return publication_list
 
     ######################
@@ -437,10 +1269,10 @@ class ScopusTopController:
         return self.backup_controller.select_all_publications()
 
     def insert_publication_backup(self, publication):
-        self.backup_controller.insert_publication(publication)
+        return self.backup_controller.insert_publication(publication)
 
     def insert_multiple_publication_backup(self, publication_list):
-        self.backup_controller.insert_multiple_publications(publication_list)
+        return self.backup_controller.insert_multiple_publications(publication_list)
 
     #####################
     # THE CACHE METHODS #
@@ -453,10 +1285,64 @@ class ScopusTopController:
         return self.cache_controller.select_multiple_publications(scopus_id_list)
 
     def select_all_publications_cache(self):
-        return self.cache_controller.select_all_publications()
+        """
+        All the publications in the cache. The publications are streamed from the cache in batches of the
+        "fetch_size" of the "DATABASE" section in the config, so the result can only be iterated once.
+
+        :return: A generator of ScopusPublications
+        """
+        return self.cache_controller.iter_all_publications()
+
+    def export_cache_snapshot(self, path, since=None):
+        """
+        Exports the cache into a compressed snapshot file, see ScopusCacheSnapshotController.
+
+        :param path: The string path of the snapshot file
+        :param since: The optional datetime, since which the entries have to be fetched for a delta snapshot
+        :return: A dict with the amount of exported publications and author profiles
+        """
+        self.write_queue.flush()
+        self.cache_controller.save()
+        snapshot_controller = ScopusCacheSnapshotController(self.cache_controller)
+        return snapshot_controller.export_snapshot(path, since)
+
+    def import_cache_snapshot(self, path):
+        """
+        Imports a snapshot file into the cache, see ScopusCacheSnapshotController.
+
+        :param path: The string path of the snapshot file
+        :return: A dict with the amount of imported publications and author profiles
+        """
+        self.write_queue.flush()
+        snapshot_controller = ScopusCacheSnapshotController(self.cache_controller)
+        return snapshot_controller.import_snapshot(path)
 
     def insert_publication_cache(self, publication):
-        self.cache_controller.insert_publication(publication)
+        return self.cache_controller.insert_publication(publication)
+
+    ##############################
+    # THE CITATION GRAPH METHODS #
+    ##############################
+
+    def insert_citations(self, publication_list):
+        """
+        Updates the citation graph with the citation lists of the given publications.
+
+        :param publication_list: The list of ScopusPublications
+        :return: The list of the new edges as tuples (citing id, cited id)
+        """
+        new_edge_list = self.citation_graph_controller.insert_publications(publication_list)
+        self.citation_graph_controller.save()
+        return new_edge_list
+
+    def get_citing_ids(self, scopus_id):
+        return self.citation_graph_controller.citing_ids(scopus_id)
+
+    def get_cited_ids(self, scopus_id):
+        return self.citation_graph_controller.cited_ids(scopus_id)
+
+    def get_missing_citing_ids(self, scopus_id, known_id_list):
+        return self.citation_graph_controller.missing_citing_ids(scopus_id, known_id_list)
 
     def insert_multiple_publications_cache(self, publication_list):
-        self.cache_controller.insert_multiple_publications(publication_list)
+        return self.cache_controller.insert_multiple_publications(publication_list)
@@ -1,3 +1,4 @@
+import hashlib
 import json
 from unidecode import unidecode
 
@@ -136,6 +137,43 @@ class ScopusPublication(ScopusIdentifierInterface, DictionaryConversionInterface
 
         return affiliation_list
 
+    @property
+    def content_hash(self):
+        """
+        The property, that will return a stable hash over the normalized content of the publication.
+
+        The ids are all compared as strings and the order of the citations, keywords and affiliations does not matter,
+        so that two objects of the same publication, that were requested at different times, only produce a different
+        hash if the actual content of the publication has changed.
+        :return: The 32 character hex string md5 hash
+        """
+        author_list = []
+        for author in self.authors:
+            author_list.append([
+                str(author.id),
+                author.first_name,
+                author.last_name,
+                sorted(map(str, author.affiliations))
+            ])
+
+        content_list = [
+            str(self.id),
+            self.eid,
+            self.doi,
+            self.title,
+            self.description,
+            self.date,
+            self.journal,
+            self.volume,
+            str(self.creator.id) if self.creator is not None else '',
+            author_list,
+            sorted(map(str, self.keywords)),
+            sorted(map(str, self.citations))
+        ]
+        content_json_string = json.dumps(content_list, sort_keys=True)
+
+        return hashlib.md5(content_json_string.encode('utf-8')).hexdigest()
+
     def get_id(self):
         """
         Returns the int scopus id of the publication.
@@ -198,6 +236,7 @@ class ScopusPublication(ScopusIdentifierInterface, DictionaryConversionInterface
             author_dict_list.append(author_dict)
 
         dictionary = {
+            'type': 'ScopusPublication',
             'id': self.id,
             'eid': self.eid,
             'doi': self.doi,
@@ -1,21 +1,304 @@
-from ScopusWp.database import MySQLDatabaseAccess
+from ScopusWp.database import create_database_access, placeholders
+from ScopusWp.database import LMDBDb
 
 from ScopusWp.scopus.data import ScopusPublication, ScopusAuthorProfile
 from ScopusWp.scopus.data import from_dict, to_dict
 
 from ScopusWp.config import PATH, Config
 
+import collections
+import datetime
+import hashlib
+import bisect
+import array
 import json
+import math
 import pathlib
 
 import pickle
+import struct
+import threading
+import time
+import zlib
 import os
 
+# numpy is only used to build the arrays of the in-memory citation graph faster, without it the arrays of the standard
+# library are used
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+###############
+#  FUNCTIONS  #
+###############
+
+# The columns of the publication tables, in the order in which the values are given by the publication row function
+PUBLICATION_COLUMNS = [
+    'scopus_id',
+    'eid',
+    'doi',
+    'creator',
+    'title',
+    'description',
+    'journal',
+    'volume',
+    'date',
+    'authors',
+    'keywords',
+    'citations',
+    'content_hash'
+]
+
+# The columns of the author cache table, in the order in which the values are given by the author row function
+AUTHOR_COLUMNS = [
+    'author_id',
+    'first_name',
+    'last_name',
+    'h_index',
+    'citation_count',
+    'document_count',
+    'publications'
+]
+
+
+def has_scopus_id(publication):
+    """
+    Whether the given publication has a scopus id and can therefore be stored. The id may be an int or a numeric
+    string, which is converted with int(), only publications without an id (None or an empty string) are skipped.
+
+    :param publication: The ScopusPublication or None
+    :return: boolean
+    """
+    return publication is not None and publication.id is not None and publication.id != ''
+
+
+def publication_row(publication):
+    """
+    Converts the publication into the tuple of values for the columns of a publication table, in the order of the
+    PUBLICATION_COLUMNS.
+
+    :param publication: The ScopusPublication to convert
+    :return: The tuple of column values
+    """
+    # Turning the creator ScopusAuthor object and the list of ScopusAuthor objects into json strings
+    creator_json_string = json.dumps(to_dict(publication.creator))
+    authors_json_string = json.dumps(to_dict(publication.authors))
+
+    # Turning the keywords list and the citations list of str/int into a json object
+    keywords_json_string = json.dumps(publication.keywords)
+    citations_json_string = json.dumps(publication.citations)
+
+    row = (
+        int(publication.id),
+        publication.eid,
+        publication.doi,
+        creator_json_string,
+        publication.title,
+        publication.description,
+        publication.journal,
+        publication.volume,
+        publication.date,
+        authors_json_string,
+        keywords_json_string,
+        citations_json_string,
+        publication.content_hash
+    )
+    return row
+
+
+def author_profile_row(author_profile):
+    """
+    Converts the author profile into the tuple of values for the columns of the author cache table, in the order of
+    the AUTHOR_COLUMNS.
+
+    :param author_profile: The ScopusAuthorProfile to convert
+    :return: The tuple of column values
+    """
+    publication_list_json = json.dumps(author_profile.publications)
+
+    row = (
+        int(author_profile.id),
+        author_profile.first_name,
+        author_profile.last_name,
+        author_profile.h_index,
+        author_profile.citation_count,
+        author_profile.document_count,
+        publication_list_json
+    )
+    return row
+
+
+def json_column(value):
+    """
+    Loads the json string of a column. Rows written by older versions have all the double quotes of the json replaced
+    by single quotes, those are converted back before loading.
+
+    :param value: The json string
+    :return: The loaded object
+    """
+    try:
+        return json.loads(value)
+    except ValueError:
+        return json.loads(value.replace("'", '"'))
+
+
+def publication_from_row(row):
+    """
+    Creates the publication object from a row of a publication table, whose values are in the order of the
+    PUBLICATION_COLUMNS.
+
+    :param row: The tuple of column values
+    :return: The ScopusPublication object
+    """
+    scopus_id = row[0]
+    eid = row[1]
+    doi = row[2]
+    title = row[4]
+    description = row[5]
+    journal = row[6]
+    volume = row[7]
+    date = row[8]
+
+    creator_dict = json_column(row[3])
+    creator = from_dict(creator_dict)
+
+    author_dict_list = json_column(row[9])
+    author_list = from_dict(author_dict_list)
+
+    keywords_list = json_column(row[10])
+    citations_list = json_column(row[11])
+
+    publication = ScopusPublication(
+        scopus_id,
+        eid,
+        doi,
+        title,
+        description,
+        date,
+        creator,
+        author_list,
+        citations_list,
+        keywords_list,
+        journal,
+        volume
+    )
+    return publication
+
+
+def author_profile_from_row(row):
+    """
+    Creates the author profile object from a row of the author cache table, whose values are in the order of the
+    AUTHOR_COLUMNS.
+
+    :param row: The tuple of column values
+    :return: The ScopusAuthorProfile object
+    """
+    publication_list = list(map(lambda x: int(x), json_column(row[6])))
+
+    author_profile = ScopusAuthorProfile(
+        row[0],
+        row[1],
+        row[2],
+        row[3],
+        row[4],
+        row[5],
+        publication_list
+    )
+    return author_profile
+
+
+def timestamp_now():
+    """
+    The current datetime without the microseconds, as it is stored for the timestamps of the cache entries.
+
+    :return: datetime object
+    """
+    return datetime.datetime.now().replace(microsecond=0)
+
+
+def is_expired(fetched_at, max_age):
+    """
+    Whether a cache entry, which was fetched at the given time has expired.
+
+    :param fetched_at: The datetime the entry was fetched at, None if unknown
+    :param max_age: The timedelta after which an entry expires. None if entries never expire
+    :return: boolean
+    """
+    if max_age is None:
+        return False
+    # Entries without a fetch time (cached by an older version into a backend without a migration) count as fresh,
+    # so that they are not all requested again at once. The refresh ahead renews them, once they are read
+    if fetched_at is None:
+        return False
+    return timestamp_now() - fetched_at >= max_age
+
+
+def select_ids_by_column(database_access, database_name, column, value_list, chunk_size=500):
+    """
+    Selects the scopus ids of the publications, whose value in the given secondary column (eid or doi) is one of the
+    given values, with one query per chunk of values. Empty values are never looked up.
+
+    :param database_access: The SQLDatabaseAccessInterface object
+    :param database_name: The name of the publication table
+    :param column: The name of the column
+    :param value_list: The list of string values
+    :param chunk_size: The int max amount of values in the IN clause of one query
+    :return: A dict with the values as keys and the int scopus ids as values
+    """
+    value_list = list(filter(lambda x: x is not None and x != '', value_list))
+
+    id_dict = {}
+    for chunk_list in chunks(value_list, chunk_size):
+        sql = (
+            'SELECT {column}, scopus_id FROM {database} WHERE {column} IN ({placeholders})'
+        ).format(
+            column=column,
+            database=database_name,
+            placeholders=placeholders(len(chunk_list))
+        )
+        for row in database_access.select(sql, chunk_list):
+            id_dict[row[0]] = int(row[1])
+    return id_dict
+
+
+def eviction_key(fetched_at, last_accessed):
+    """
+    The sort key for the least recently used order of the cache entries, with the given timestamps. An entry counts as
+    used, when it was either read or fetched, whichever happened later. The entries without any timestamp come first.
+
+    :param fetched_at: The datetime the entry was fetched at or None
+    :param last_accessed: The datetime the entry was last read or None
+    :return: A tuple to be compared
+    """
+    timestamp_list = [x for x in (fetched_at, last_accessed) if x is not None]
+    if len(timestamp_list) == 0:
+        return 0, datetime.datetime.min
+    return 1, max(timestamp_list)
+
+
+def chunks(item_list, chunk_size):
+    """
+    Generator for the consecutive sub lists of the given list, with each having at most the given size.
+
+    :param item_list: The list to split
+    :param chunk_size: The int max size of a single chunk
+    :return: generator of lists
+    """
+    for index in range(0, len(item_list), chunk_size):
+        yield item_list[index:index + chunk_size]
+
 
 ###############
 #   CLASSES   #
 ###############
 
+# The marker object, which is returned by the lookup methods of the cache controller in case the requested item is not
+# in the cache. None cannot be used for that, because None is also the result of a failed scopus request
+CACHE_MISS = object()
+
+
 # todo: Make the cache update save and the refill via delete, so progress does not get lost with connection error
 # todo: in the long run, even the cache has to be a database, or anything that does not clog the RAM, maybe shelve
 
@@ -26,18 +309,45 @@ class PublicationPersistencyInterface:
     def select(self, scopus_id):
         raise NotImplementedError()
 
+    def select_multiple(self, scopus_id_list):
+        raise NotImplementedError()
+
+    def select_multiple_entries(self, scopus_id_list):
+        raise NotImplementedError()
+
     def select_all(self):
         raise NotImplementedError()
 
+    def iter_all(self, fetch_size=None):
+        raise NotImplementedError()
+
     def select_all_ids(self):
         raise NotImplementedError()
 
     def insert(self, publication):
         raise NotImplementedError()
 
+    def insert_multiple(self, publication_list):
+        raise NotImplementedError()
+
+    def delete_multiple(self, scopus_id_list):
+        raise NotImplementedError()
+
+    def select_ids_by_eid(self, eid_list):
+        raise NotImplementedError()
+
+    def select_ids_by_doi(self, doi_list):
+        raise NotImplementedError()
+
     def contains(self, publication):
         raise NotImplementedError()
 
+    def select_content_hash(self, scopus_id):
+        raise NotImplementedError()
+
+    def select_content_hashes(self, scopus_id_list):
+        raise NotImplementedError()
+
     def save(self):
         raise NotImplementedError()
 
@@ -50,15 +360,24 @@ class AuthorProfilePersistencyInterface:
     def select(self, author_id):
         raise NotImplementedError()
 
+    def select_entry(self, author_id):
+        raise NotImplementedError()
+
     def select_all(self):
         raise NotImplementedError()
 
+    def iter_all(self, fetch_size=None):
+        raise NotImplementedError()
+
     def select_all_ids(self):
         raise NotImplementedError()
 
     def insert(self, author_profile):
         raise NotImplementedError()
 
+    def insert_multiple(self, author_profile_list):
+        raise NotImplementedError()
+
     def contains(self, author):
         raise NotImplementedError()
 
@@ -81,25 +400,98 @@ class ScopusBackupController:
         self.backup_model = ScopusBackupPublicationModel()
 
     def insert_publication(self, publication):
-        self.backup_model.insert(publication)
+        """
+        Inserts the publication into the backup database, but only if the content of the publication has changed
+        compared to the version already stored, as told by the content hash.
+
+        :param publication: The ScopusPublication to be backed up
+        :return: boolean flag of whether the publication actually had to be written
+        """
+        if self.publication_changed(publication):
+            self.backup_model.insert(publication)
+            return True
+        return False
 
     def insert_multiple_publications(self, publication_list):
+        """
+        Inserts all those publications of the list into the backup database with one bulk upsert, whose content has
+        changed compared to the version already stored.
+
+        :param publication_list: The list of ScopusPublications to be backed up
+        :return: The list of publications, that actually had to be written
+        """
+        publication_list = list(filter(has_scopus_id, publication_list))
+        content_hash_dict = self.backup_model.select_content_hashes(list(map(int, publication_list)))
+
+        changed_publication_list = []
         for publication in publication_list:
-            self.insert_publication(publication)
+            if content_hash_dict.get(int(publication)) != publication.content_hash:
+                changed_publication_list.append(publication)
+
+        self.backup_model.insert_multiple(changed_publication_list)
+        return changed_publication_list
+
+    def publication_changed(self, publication):
+        """
+        Whether the given publication differs from the version stored in the backup database.
+
+        :param publication: The ScopusPublication to check
+        :return: boolean
+        """
+        if not has_scopus_id(publication):
+            return False
+        content_hash = self.backup_model.select_content_hash(int(publication))
+        return content_hash != publication.content_hash
 
     def select_publication(self, scopus_id):
         return self.backup_model.select(scopus_id)
 
     def select_multiple_publications(self, scopus_id_list):
-        publication_list = []
-        for scopus_id in scopus_id_list:
-            publication = self.select_publication(scopus_id)
-            publication_list.append(publication)
-        return publication_list
+        """
+        Selects the publications for all the given scopus ids with as few queries as possible.
+
+        :param scopus_id_list: The list of int scopus ids
+        :return: The list of ScopusPublications in the order of the ids, with None for those not in the database
+        """
+        publication_dict = self.backup_model.select_multiple(scopus_id_list)
+        return list(map(lambda x: publication_dict.get(int(x)), scopus_id_list))
+
+    def select_by_eid(self, eid):
+        return self.select_multiple_by_eid([eid])[0]
+
+    def select_by_doi(self, doi):
+        return self.select_multiple_by_doi([doi])[0]
+
+    def select_multiple_by_eid(self, eid_list):
+        """
+        Selects the publications for all the given eids with one indexed query for the ids and one for the
+        publications per chunk.
+
+        :param eid_list: The list of string eids
+        :return: The list of ScopusPublications in the order of the eids, with None for those not in the database
+        """
+        return self._select_multiple_by_secondary(self.backup_model.select_ids_by_eid(eid_list), eid_list)
+
+    def select_multiple_by_doi(self, doi_list):
+        """
+        Selects the publications for all the given dois with one indexed query for the ids and one for the
+        publications per chunk.
+
+        :param doi_list: The list of string dois
+        :return: The list of ScopusPublications in the order of the dois, with None for those not in the database
+        """
+        return self._select_multiple_by_secondary(self.backup_model.select_ids_by_doi(doi_list), doi_list)
+
+    def _select_multiple_by_secondary(self, id_dict, value_list):
+        publication_dict = self.backup_model.select_multiple(list(set(id_dict.values())))
+        return list(map(lambda x: publication_dict.get(id_dict.get(x)), value_list))
 
     def select_all_publications(self):
         return self.backup_model.select_all()
 
+    def iter_all_publications(self, fetch_size=None):
+        return self.backup_model.iter_all(fetch_size)
+
     def wipe(self):
         self.backup_model.wipe()
 
@@ -107,48 +499,857 @@ class ScopusBackupController:
         self.backup_model.save()
 
 
-class ScopusCacheController:
+class LRUCache:
+    """
+    A bounded in-process cache, which keeps the objects, that have been used most recently.
+
+    Once the capacity is reached, inserting a new object removes the least recently used one. Also counts the hits and
+    misses of the get method. The cache can be used by multiple threads at the same time.
+    """
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.content = collections.OrderedDict()
+        self.lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        The object to the given key, which is then marked as the most recently used.
+
+        :param key: The key of the object
+        :return: The object or the CACHE_MISS marker
+        """
+        with self.lock:
+            if key in self.content:
+                self.content.move_to_end(key)
+                self.hits += 1
+                return self.content[key]
+
+            self.misses += 1
+            return CACHE_MISS
+
+    def peek(self, key):
+        """
+        The object to the given key, without marking it as used or counting the access.
+
+        :param key: The key of the object
+        :return: The object or the CACHE_MISS marker
+        """
+        with self.lock:
+            return self.content.get(key, CACHE_MISS)
+
+    def put(self, key, value):
+        if self.capacity <= 0:
+            return
+
+        with self.lock:
+            self.content[key] = value
+            self.content.move_to_end(key)
+            while len(self.content) > self.capacity:
+                self.content.popitem(last=False)
+
+    def remove(self, key):
+        with self.lock:
+            self.content.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.content.clear()
+
+    @property
+    def statistics(self):
+        """
+        The statistics of the cache usage.
+
+        :return: A dict with the size, capacity, the amount of hits and misses and the hit rate
+        """
+        total = self.hits + self.misses
+        statistics_dict = {
+            'size': len(self.content),
+            'capacity': self.capacity,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total != 0 else 0.0
+        }
+        return statistics_dict
+
+    def __contains__(self, item):
+        return item in self.content
+
+    def __len__(self):
+        return len(self.content)
+
+
+class BloomFilter:
+    """
+    A bloom filter for int ids. Tells for sure, that an id has not been added, but may err with the given rate on ids,
+    that are said to have been added. Ids can not be removed.
+    """
+    MASK = 2 ** 64 - 1
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.capacity = max(capacity, 1024)
+        self.error_rate = error_rate
+
+        # The optimal amount of bits and hash functions for the capacity and the error rate
+        self.size = int(math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, int(round(self.size / self.capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, _id):
+        # Double hashing with two 64 bit mixes of the id
+        hash_1 = (_id * 0x9E3779B97F4A7C15) & self.MASK
+        hash_2 = (((_id ^ (_id >> 31)) * 0xBF58476D1CE4E5B9) & self.MASK) | 1
+        for index in range(self.hash_count):
+            yield (hash_1 + index * hash_2) % self.size
+
+    def add(self, _id):
+        for position in self._positions(_id):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, _id):
+        for position in self._positions(_id):
+            if not self.bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+
+class IdIndex:
+    """
+    A compact in-memory set of int ids.
+
+    The ids are kept in a sorted array of 64 bit integers, which takes 8 bytes per id and is searched by bisection.
+    New ids are first collected in a small set, which is merged into the array, once it has reached the merge size.
+    Optionally a bloom filter answers most of the checks for ids, that are not in the index, without searching the
+    array. The index can be used by multiple threads at the same time.
+    """
+    def __init__(self, id_list=(), bloom_filter=False, merge_size=4096):
+        self.merge_size = merge_size
+        self.use_bloom_filter = bloom_filter
+
+        self.lock = threading.RLock()
+        self.sorted_array = array.array('q', sorted(set(map(int, id_list))))
+        self.pending_set = set()
+        self.bloom_filter = None  # type: BloomFilter
+        self._build_bloom_filter()
+
+    def _build_bloom_filter(self):
+        if not self.use_bloom_filter:
+            return
+        # Twice the current size, so that the error rate is kept, while the index grows for a while
+        self.bloom_filter = BloomFilter(2 * len(self))
+        for _id in self.sorted_array:
+            self.bloom_filter.add(_id)
+        for _id in self.pending_set:
+            self.bloom_filter.add(_id)
+
+    def _merge(self):
+        # Merging the pending ids into the sorted array all at once
+        if len(self.pending_set) != 0:
+            merged_list = sorted(self.pending_set.union(self.sorted_array))
+            self.sorted_array = array.array('q', merged_list)
+            self.pending_set = set()
+
+    def _contains_array(self, _id):
+        index = bisect.bisect_left(self.sorted_array, _id)
+        return index < len(self.sorted_array) and self.sorted_array[index] == _id
+
+    def add(self, _id):
+        self.add_multiple([_id])
+
+    def add_multiple(self, id_list):
+        with self.lock:
+            for _id in map(int, id_list):
+                if _id in self.pending_set or self._contains_array(_id):
+                    continue
+                self.pending_set.add(_id)
+                if self.bloom_filter is not None:
+                    self.bloom_filter.add(_id)
+
+            if len(self.pending_set) >= self.merge_size:
+                self._merge()
+            if self.bloom_filter is not None and self.bloom_filter.count > self.bloom_filter.capacity:
+                self._build_bloom_filter()
+
+    def remove(self, _id):
+        """
+        Removes the id from the index. Removing an id from the array takes linear time, so this is only supposed to be
+        used for single ids now and then.
+
+        :param _id: The int id
+        :return: void
+        """
+        with self.lock:
+            _id = int(_id)
+            self.pending_set.discard(_id)
+            index = bisect.bisect_left(self.sorted_array, _id)
+            if index < len(self.sorted_array) and self.sorted_array[index] == _id:
+                del self.sorted_array[index]
+
+    def remove_multiple(self, id_list):
+        """
+        Removes all the given ids from the index by rebuilding the array once.
+
+        :param id_list: The list of int ids
+        :return: void
+        """
+        remove_set = set(map(int, id_list))
+        with self.lock:
+            self.pending_set -= remove_set
+            self.sorted_array = array.array('q', filter(lambda x: x not in remove_set, self.sorted_array))
+
+    def clear(self):
+        with self.lock:
+            self.sorted_array = array.array('q')
+            self.pending_set = set()
+            self._build_bloom_filter()
+
+    def difference(self, id_list):
+        """
+        The ids of the given list, which are not in the index.
+
+        :param id_list: The list of int ids
+        :return: The list of the int ids not in the index, in the order of the given list and without duplicates
+        """
+        difference_list = []
+        seen_set = set()
+        for _id in map(int, id_list):
+            if _id not in seen_set and _id not in self:
+                difference_list.append(_id)
+            seen_set.add(_id)
+        return difference_list
+
+    def __contains__(self, _id):
+        _id = int(_id)
+        with self.lock:
+            if self.bloom_filter is not None and _id not in self.bloom_filter:
+                return False
+            return _id in self.pending_set or self._contains_array(_id)
 
-    def __init__(self, publication_cache_model_class, author_cache_model_class):
+    def __iter__(self):
+        with self.lock:
+            self._merge()
+            return iter(self.sorted_array.tolist())
+
+    def __len__(self):
+        return len(self.sorted_array) + len(self.pending_set)
+
+
+class ScopusCacheController:
+    """
+    The controller for the cache of the publications and author profiles requested from scopus.
+
+    Every entry of the cache has the time, when it was fetched from scopus and the time, when it was last read from
+    the cache. The lookup methods take an optional max age, with which entries, that were fetched longer ago count
+    as cache misses. The read accesses are collected in memory and written to the cache with the next save.
+
+    The ids of all the cached publications and authors are kept in an in-memory index, which is loaded with the first
+    check and then kept up to date with every insert. This way checking whether an id is cached or which ids of a list
+    are missing does not need any query. Entries, which are written by another process are not in the index, so the
+    index can be disabled with the "id_index" of the "CACHE" section in the config.
+
+    The amount of cached publications can be limited with the "publication_capacity" of the "CACHE" section. Once the
+    limit is exceeded, the least recently used publications are evicted with the next save, down to the low water mark
+    given by the "eviction_fraction" below the capacity. Pinned publications are never evicted, the pins are collected
+    from the pin functions before the first eviction and can be added with pin_publications.
+    """
+    def __init__(self, publication_cache_model_class, author_cache_model_class, relation_model_class=None,
+                 lru_size=None, id_index=None):
 
         self.publication_cache_model = publication_cache_model_class()  # type: ScopusPublicationDatabaseCacheModel
         self.author_cache_model = author_cache_model_class()  # type: ScopusAuthorDatabaseCacheModel
 
+        # The model for the normalized schema is optional. If it is given, the relations of every publication
+        # inserted into the cache are also written into the join tables and the relation queries can be used
+        self.relation_model = None  # type: ScopusPublicationRelationModel
+        if relation_model_class is not None:
+            self.relation_model = relation_model_class()
+
+        # The in-process tier in front of the models. Every read first checks these and every write goes through to
+        # the models as well, so that the objects in there are never outdated compared to the persistent cache.
+        # The values are tuples of the object and the datetime it was fetched at
+        config = Config.get_instance()
+        if lru_size is None:
+            lru_size = config.getint('CACHE', 'lru_size', fallback=1000)
+        self.publication_lru = LRUCache(lru_size)
+        self.author_lru = LRUCache(lru_size)
+
+        # The indexes of the cached ids, which are only loaded when they are needed the first time
+        if id_index is None:
+            id_index = config.getboolean('CACHE', 'id_index', fallback=True)
+        self.use_id_index = id_index
+        self.bloom_filter = config.getboolean('CACHE', 'bloom_filter', fallback=False)
+        self._publication_id_index = None  # type: IdIndex
+        self._author_id_index = None  # type: IdIndex
+        self.index_lock = threading.Lock()
+
+        # The limit for the amount of cached publications, 0 meaning no limit, and the pinned publications
+        self.publication_capacity = config.getint('CACHE', 'publication_capacity', fallback=0)
+        self.eviction_fraction = config.getfloat('CACHE', 'eviction_fraction', fallback=0.1)
+        self.pinned_publication_index = IdIndex()
+        self.pin_function_list = []
+        self.pins_loaded = False
+        self.eviction_lock = threading.Lock()
+        self.eviction_count = 0
+        self.eviction_run_count = 0
+        self.eviction_seconds = 0.0
+        self.last_eviction = None
+
+        # The times of the read accesses since the last save, with the int ids as keys. The cache may be written by
+        # another thread than the one reading from it, see WriteBehindQueue
+        self.publication_access_dict = {}
+        self.author_access_dict = {}
+        self.access_lock = threading.Lock()
+
+    @property
+    def statistics(self):
+        """
+        The hit/miss statistics of the in-process tier of the cache.
+
+        :return: A dict with the keys 'publications' and 'authors' and the statistics dicts as values
+        """
+        return {
+            'publications': self.publication_lru.statistics,
+            'authors': self.author_lru.statistics,
+            'eviction': self.eviction_statistics
+        }
+
+    @property
+    def eviction_statistics(self):
+        """
+        The statistics of the eviction of publications from the size bounded cache.
+
+        :return: A dict with the capacity, the amount of pinned publications, the total amount of evicted publications,
+            the amount of evictions runs, the seconds spent evicting and the datetime of the last eviction
+        """
+        return {
+            'capacity': self.publication_capacity,
+            'pinned': len(self.pinned_publication_index),
+            'evicted': self.eviction_count,
+            'runs': self.eviction_run_count,
+            'seconds': self.eviction_seconds,
+            'last_eviction': self.last_eviction
+        }
+
+    def add_pin_function(self, pin_function):
+        """
+        Adds a function, that returns a list of scopus ids to be pinned. The function is only called once, before the
+        first eviction.
+
+        :param pin_function: The function without arguments returning a list of int scopus ids
+        :return: void
+        """
+        self.pin_function_list.append(pin_function)
+        self.pins_loaded = False
+
+    def pin_publications(self, scopus_id_list):
+        """
+        Pins the publications with the given ids, so that they are never evicted from the cache.
+
+        :param scopus_id_list: The list of int scopus ids
+        :return: void
+        """
+        self.pinned_publication_index.add_multiple(scopus_id_list)
+
+    def unpin_publications(self, scopus_id_list):
+        self.pinned_publication_index.remove_multiple(scopus_id_list)
+
+    def _load_pins(self):
+        if not self.pins_loaded:
+            for pin_function in self.pin_function_list:
+                self.pin_publications(pin_function())
+            self.pins_loaded = True
+
+    def count_publications(self):
+        if self.use_id_index:
+            return len(self.publication_id_index)
+        return len(self.publication_cache_model.select_all_ids())
+
+    def evict_publications(self, fetch_size=500):
+        """
+        Evicts the least recently used publications, which are not pinned, if the capacity of the cache is exceeded.
+
+        :param fetch_size: The int amount of eviction candidates to be fetched from the database at once
+        :return: The list of the int scopus ids of the evicted publications
+        """
+        if self.publication_capacity <= 0:
+            return []
+
+        with self.eviction_lock:
+            count = self.count_publications()
+            if count <= self.publication_capacity:
+                return []
+
+            start_time = time.monotonic()
+            self._load_pins()
+            amount = count - self.publication_capacity + int(self.publication_capacity * self.eviction_fraction)
+
+            # Going through the candidates in the least recently used order, which is built only once per run, and
+            # skipping the pinned ones. The generator is closed before the deletes, as it may hold the connection
+            scopus_id_list = []
+            candidate_id_generator = self.publication_cache_model.timestamp_model.iter_eviction_ids(fetch_size)
+            try:
+                for scopus_id in candidate_id_generator:
+                    if scopus_id not in self.pinned_publication_index:
+                        scopus_id_list.append(scopus_id)
+                        if len(scopus_id_list) == amount:
+                            break
+            finally:
+                candidate_id_generator.close()
+
+            self.publication_cache_model.delete_multiple(scopus_id_list)
+            if self.relation_model is not None:
+                self.relation_model.delete_multiple(scopus_id_list)
+            for scopus_id in scopus_id_list:
+                self.publication_lru.remove(scopus_id)
+            if self._publication_id_index is not None:
+                self._publication_id_index.remove_multiple(scopus_id_list)
+
+            self.eviction_count += len(scopus_id_list)
+            self.eviction_run_count += 1
+            self.eviction_seconds += time.monotonic() - start_time
+            self.last_eviction = timestamp_now()
+            return scopus_id_list
+
+    @property
+    def publication_id_index(self):
+        """
+        The index of the ids of all the cached publications. None if the index is disabled.
+
+        :return: IdIndex
+        """
+        if self.use_id_index and self._publication_id_index is None:
+            with self.index_lock:
+                if self._publication_id_index is None:
+                    id_list = self.publication_cache_model.select_all_ids()
+                    self._publication_id_index = IdIndex(id_list, self.bloom_filter)
+        return self._publication_id_index
+
+    @property
+    def author_id_index(self):
+        """
+        The index of the ids of all the cached author profiles. None if the index is disabled.
+
+        :return: IdIndex
+        """
+        if self.use_id_index and self._author_id_index is None:
+            with self.index_lock:
+                if self._author_id_index is None:
+                    id_list = self.author_cache_model.select_all_ids()
+                    self._author_id_index = IdIndex(id_list, self.bloom_filter)
+        return self._author_id_index
+
+    def _index_ids(self, id_index, id_list):
+        # Only updating indexes, which have already been loaded, the others will contain the ids once they are loaded
+        if id_index is not None:
+            id_index.add_multiple(id_list)
+
     def insert_author_profile(self, author_profile):
-        self.author_cache_model.insert(author_profile)
+        self.insert_multiple_author_profiles([author_profile])
+
+    def insert_multiple_author_profiles(self, author_profile_list):
+        self.author_cache_model.insert_multiple(author_profile_list)
+        fetched_at = timestamp_now()
+        for author_profile in author_profile_list:
+            self.author_lru.put(int(author_profile), (author_profile, fetched_at))
+        self._index_ids(self._author_id_index, list(map(int, author_profile_list)))
 
     def contains_author_profile(self, author):
+        if int(author) in self.author_lru:
+            return True
+        if self.use_id_index:
+            return int(author) in self.author_id_index
         return self.author_cache_model.contains(author)
 
+    def missing_author_ids(self, author_id_list):
+        """
+        The ids of the given list, whose author profiles are not in the cache.
+
+        :param author_id_list: The list of int author ids
+        :return: The list of the int author ids, which are not cached, without duplicates
+        """
+        if self.use_id_index:
+            return self.author_id_index.difference(author_id_list)
+        return list(set(map(int, author_id_list)) - set(self.author_cache_model.select_all_ids()))
+
     def select_author_profile(self, author_id):
-        return self.author_cache_model.select(author_id)
+        author_profile = self.lookup_author_profile(author_id)
+        if author_profile is CACHE_MISS:
+            return None
+        return author_profile
+
+    def lookup_author_profile(self, author_id, max_age=None):
+        """
+        Looks up the author profile in the cache with at most one single query.
+
+        :param author_id: The int author id
+        :param max_age: The optional timedelta, after which a cached author profile has expired
+        :return: The ScopusAuthorProfile or the CACHE_MISS marker, if the author is not in the cache or the entry
+            has expired
+        """
+        entry = self.author_lru.get(int(author_id))
+        if entry is CACHE_MISS:
+            entry = self.author_cache_model.select_entry(author_id)
+            if entry is None:
+                return CACHE_MISS
+            self.author_lru.put(int(author_id), entry)
+
+        with self.access_lock:
+            self.author_access_dict[int(author_id)] = timestamp_now()
+        if is_expired(entry[1], max_age):
+            return CACHE_MISS
+        return entry[0]
 
     def select_all_author_profiles(self):
         return self.author_cache_model.select_all()
 
+    def iter_all_author_profiles(self, fetch_size=None):
+        return self.author_cache_model.iter_all(fetch_size)
+
     def insert_publication(self, publication):
-        self.publication_cache_model.insert(publication)
+        """
+        Inserts the publication into the cache, but only if the content of the publication has changed compared to
+        the version already in the cache, as told by the content hash. Otherwise only the time the entry was fetched
+        at is renewed.
+
+        :param publication: The ScopusPublication to be cached
+        :return: boolean flag of whether the publication actually had to be written
+        """
+        return len(self.insert_multiple_publications([publication])) != 0
 
     def insert_multiple_publications(self, publication_list):
+        """
+        Inserts all those publications of the list into the cache with one bulk upsert, whose content has changed
+        compared to the version already in the cache. For the unchanged publications only the time they were fetched
+        at is renewed.
+
+        :param publication_list: The list of ScopusPublications to be cached
+        :return: The list of publications, that actually had to be written
+        """
+        publication_list = list(filter(has_scopus_id, publication_list))
+        content_hash_dict = self._select_content_hashes(list(map(int, publication_list)))
+
+        changed_publication_list = []
+        unchanged_publication_list = []
+        for publication in publication_list:
+            if content_hash_dict.get(int(publication)) != publication.content_hash:
+                changed_publication_list.append(publication)
+            else:
+                unchanged_publication_list.append(publication)
+
+        fetched_at = timestamp_now()
+        if len(changed_publication_list) != 0:
+            self.publication_cache_model.insert_multiple(changed_publication_list)
+            if self.relation_model is not None:
+                self.relation_model.insert_multiple(changed_publication_list)
+        if len(unchanged_publication_list) != 0:
+            self.publication_cache_model.timestamp_model.update_fetched_at(
+                list(map(int, unchanged_publication_list)),
+                fetched_at
+            )
+
         for publication in publication_list:
-            self.insert_publication(publication)
+            self.publication_lru.put(int(publication), (publication, fetched_at))
+        self._index_ids(self._publication_id_index, list(map(int, publication_list)))
+        return changed_publication_list
+
+    def _select_content_hashes(self, scopus_id_list):
+        # The hashes of the publications in the in-process tier do not have to be queried
+        content_hash_dict = {}
+        remaining_scopus_id_list = []
+        for scopus_id in scopus_id_list:
+            entry = self.publication_lru.peek(scopus_id)
+            if entry is not CACHE_MISS:
+                content_hash_dict[scopus_id] = entry[0].content_hash
+            else:
+                remaining_scopus_id_list.append(scopus_id)
+
+        if len(remaining_scopus_id_list) != 0:
+            content_hash_dict.update(self.publication_cache_model.select_content_hashes(remaining_scopus_id_list))
+        return content_hash_dict
+
+    def publication_changed(self, publication):
+        """
+        Whether the given publication differs from the version stored in the cache.
+
+        :param publication: The ScopusPublication to check
+        :return: boolean
+        """
+        if not has_scopus_id(publication):
+            return False
+        content_hash_dict = self._select_content_hashes([int(publication)])
+        return content_hash_dict.get(int(publication)) != publication.content_hash
 
     def contains_publication(self, publication):
+        if publication != '' and int(publication) in self.publication_lru:
+            return True
+        if self.use_id_index:
+            return publication != '' and int(publication) in self.publication_id_index
         return self.publication_cache_model.contains(publication)
 
+    def missing_publication_ids(self, scopus_id_list):
+        """
+        The ids of the given list, whose publications are not in the cache.
+
+        :param scopus_id_list: The list of int scopus ids
+        :return: The list of the int scopus ids, which are not cached, without duplicates
+        """
+        if self.use_id_index:
+            return self.publication_id_index.difference(scopus_id_list)
+        return list(set(map(int, scopus_id_list)) - set(self.publication_cache_model.select_all_ids()))
+
+    def _select_publication_entries(self, scopus_id_list):
+        # Taking all the entries, that are in the in-process tier from there and selecting only the rest from the
+        # model, which are then also put into the in-process tier
+        entry_dict = {}
+        remaining_scopus_id_list = []
+        for scopus_id in map(int, scopus_id_list):
+            entry = self.publication_lru.get(scopus_id)
+            if entry is CACHE_MISS:
+                remaining_scopus_id_list.append(scopus_id)
+            else:
+                entry_dict[scopus_id] = entry
+
+        if len(remaining_scopus_id_list) != 0:
+            _entry_dict = self.publication_cache_model.select_multiple_entries(remaining_scopus_id_list)
+            for scopus_id, entry in _entry_dict.items():
+                self.publication_lru.put(scopus_id, entry)
+            entry_dict.update(_entry_dict)
+
+        accessed_at = timestamp_now()
+        with self.access_lock:
+            for scopus_id in entry_dict.keys():
+                self.publication_access_dict[scopus_id] = accessed_at
+
+        return entry_dict
+
+    def _select_publications(self, scopus_id_list, max_age=None):
+        entry_dict = self._select_publication_entries(scopus_id_list)
+
+        publication_dict = {}
+        for scopus_id, entry in entry_dict.items():
+            if not is_expired(entry[1], max_age):
+                publication_dict[scopus_id] = entry[0]
+        return publication_dict
+
     def select_publication(self, scopus_id):
-        return self.publication_cache_model.select(scopus_id)
+        return self._select_publications([scopus_id]).get(int(scopus_id))
+
+    def lookup_publication(self, scopus_id, max_age=None):
+        """
+        Looks up the publication in the cache with at most one single query.
+
+        :param scopus_id: The int scopus id
+        :param max_age: The optional timedelta, after which a cached publication has expired
+        :return: The ScopusPublication or the CACHE_MISS marker, if the publication is not in the cache or the entry
+            has expired
+        """
+        publication_dict = self._select_publications([scopus_id], max_age)
+        return publication_dict.get(int(scopus_id), CACHE_MISS)
+
+    def lookup_multiple_publications(self, scopus_id_list, max_age=None):
+        """
+        Looks up all the publications for the given scopus ids in the cache and splits the ids into those, that are
+        in the cache and those, that are not.
+
+        :param scopus_id_list: The list of int scopus ids
+        :param max_age: The optional timedelta, after which a cached publication has expired and counts as a miss
+        :return: A tuple with the dict of the cached publications with the int scopus ids as keys as the first item
+            and the list of the scopus ids, that are not in the cache as the second item
+        """
+        publication_dict = self._select_publications(scopus_id_list, max_age)
+
+        miss_scopus_id_list = []
+        for scopus_id in scopus_id_list:
+            if int(scopus_id) not in publication_dict.keys():
+                miss_scopus_id_list.append(scopus_id)
+
+        return publication_dict, miss_scopus_id_list
 
     def select_multiple_publications(self, scopus_id_list):
-        publication_list = []
-        for scopus_id in scopus_id_list:
-            publication = self.select_publication(scopus_id)
-            publication_list.append(publication)
-        return publication_list
+        """
+        Selects the publications for all the given scopus ids with as few queries as possible.
+
+        :param scopus_id_list: The list of int scopus ids
+        :return: The list of ScopusPublications in the order of the ids, with None for those not in the cache
+        """
+        publication_dict = self._select_publications(scopus_id_list)
+        return list(map(lambda x: publication_dict.get(int(x)), scopus_id_list))
+
+    def select_by_eid(self, eid):
+        return self.select_multiple_by_eid([eid])[0]
+
+    def select_by_doi(self, doi):
+        return self.select_multiple_by_doi([doi])[0]
+
+    def select_multiple_by_eid(self, eid_list):
+        """
+        Selects the publications for all the given eids. The eids are resolved to scopus ids through the index of the
+        cache, the publications themselves are then selected like by their ids, so that the lookups also count as
+        accesses for the eviction and go through the in-process LRU cache.
+
+        :param eid_list: The list of string eids
+        :return: The list of ScopusPublications in the order of the eids, with None for those not in the cache
+        """
+        return self._select_multiple_by_secondary(self.publication_cache_model.select_ids_by_eid(eid_list), eid_list)
+
+    def select_multiple_by_doi(self, doi_list):
+        """
+        Selects the publications for all the given dois, see select_multiple_by_eid.
+
+        :param doi_list: The list of string dois
+        :return: The list of ScopusPublications in the order of the dois, with None for those not in the cache
+        """
+        return self._select_multiple_by_secondary(self.publication_cache_model.select_ids_by_doi(doi_list), doi_list)
+
+    def _select_multiple_by_secondary(self, id_dict, value_list):
+        publication_dict = self._select_publications(list(set(id_dict.values())))
+        return list(map(lambda x: publication_dict.get(id_dict.get(x)), value_list))
+
+    def select_refresh_publication_ids(self, max_age, margin, limit=100):
+        """
+        The ids of the hot publications, which will expire within the given margin. Hot are those publications, that
+        have been read since they were last fetched. The most recently read publications come first.
+
+        :param max_age: The timedelta after which a publication expires
+        :param margin: The timedelta before the expiration, from which on a publication is to be renewed
+        :param limit: The int max amount of ids
+        :return: The list of int scopus ids
+        """
+        self._save_accesses()
+        expires_before = timestamp_now() - max_age + margin
+        return self.publication_cache_model.timestamp_model.select_refresh_ids(expires_before, limit)
+
+    def select_refresh_author_ids(self, max_age, margin, limit=100):
+        """
+        The ids of the hot author profiles, which will expire within the given margin, see the method
+        select_refresh_publication_ids.
+
+        :param max_age: The timedelta after which an author profile expires
+        :param margin: The timedelta before the expiration, from which on a profile is to be renewed
+        :param limit: The int max amount of ids
+        :return: The list of int author ids
+        """
+        self._save_accesses()
+        expires_before = timestamp_now() - max_age + margin
+        return self.author_cache_model.timestamp_model.select_refresh_ids(expires_before, limit)
+
+    def _save_accesses(self):
+        # Writing the access times collected since the last save with one bulk update each
+        with self.access_lock:
+            publication_access_dict, self.publication_access_dict = self.publication_access_dict, {}
+            author_access_dict, self.author_access_dict = self.author_access_dict, {}
+        if len(publication_access_dict) != 0:
+            self.publication_cache_model.timestamp_model.update_last_accessed(publication_access_dict)
+        if len(author_access_dict) != 0:
+            self.author_cache_model.timestamp_model.update_last_accessed(author_access_dict)
 
     def select_all_publications(self):
         return self.publication_cache_model.select_all()
 
+    def iter_all_publications(self, fetch_size=None):
+        """
+        A generator over all the publications in the cache, which only keeps a batch of the given size in memory.
+
+        :param fetch_size: The int amount of publications to be fetched from the database at once
+        :return: A generator of ScopusPublications
+        """
+        return self.publication_cache_model.iter_all(fetch_size)
+
+    def _check_relation_model(self):
+        if self.relation_model is None:
+            raise ValueError('The normalized relation tables are not enabled for the cache')
+
+    def select_citing_publications(self, scopus_id):
+        """
+        All the cached publications, that cite the publication with the given scopus id.
+
+        Needs the normalized relation tables.
+        :param scopus_id: The int scopus id of the cited publication
+        :return: A list of ScopusPublication objects
+        """
+        self._check_relation_model()
+        scopus_id_list = self.relation_model.select_citing_ids(scopus_id)
+        return list(self.publication_cache_model.select_multiple(scopus_id_list).values())
+
+    def select_cited_publications(self, scopus_id):
+        """
+        All the cached publications, that are cited by the publication with the given scopus id.
+
+        Needs the normalized relation tables.
+        :param scopus_id: The int scopus id of the citing publication
+        :return: A list of ScopusPublication objects
+        """
+        self._check_relation_model()
+        scopus_id_list = self.relation_model.select_cited_ids(scopus_id)
+        return list(self.publication_cache_model.select_multiple(scopus_id_list).values())
+
+    def select_author_publications(self, author_id):
+        """
+        All the cached publications, that the author with the given id has contributed to.
+
+        Needs the normalized relation tables.
+        :param author_id: The int author id
+        :return: A list of ScopusPublication objects
+        """
+        self._check_relation_model()
+        scopus_id_list = self.relation_model.select_publication_ids_by_author(author_id)
+        return list(self.publication_cache_model.select_multiple(scopus_id_list).values())
+
+    def select_keyword_publications(self, keyword):
+        """
+        All the cached publications, that are tagged with the given keyword.
+
+        Needs the normalized relation tables.
+        :param keyword: The string keyword
+        :return: A list of ScopusPublication objects
+        """
+        self._check_relation_model()
+        scopus_id_list = self.relation_model.select_publication_ids_by_keyword(keyword)
+        return list(self.publication_cache_model.select_multiple(scopus_id_list).values())
+
+    def select_author_affiliation_ids(self, author_id):
+        """
+        The ids of all the affiliations the author had in any of the cached publications.
+
+        Needs the normalized relation tables.
+        :param author_id: The int author id
+        :return: A list of int affiliation ids
+        """
+        self._check_relation_model()
+        return self.relation_model.select_affiliation_ids_by_author(author_id)
+
+    def select_affiliation_author_ids(self, affiliation_id):
+        """
+        The ids of all the authors, that were affiliated with the given affiliation in any of the cached publications.
+
+        Needs the normalized relation tables.
+        :param affiliation_id: The int affiliation id
+        :return: A list of int author ids
+        """
+        self._check_relation_model()
+        return self.relation_model.select_author_ids_by_affiliation(affiliation_id)
+
+    def rebuild_relations(self, chunk_size=500):
+        """
+        Fills the normalized relation tables from all the publications currently in the cache. This has to be done
+        once, when enabling the relation tables for an existing cache.
+
+        :param chunk_size: The int amount of publications to be written at once
+        :return: void
+        """
+        self._check_relation_model()
+        self.relation_model.wipe()
+        scopus_id_list = self.publication_cache_model.select_all_ids()
+        for chunk_list in chunks(scopus_id_list, chunk_size):
+            publication_dict = self.publication_cache_model.select_multiple(chunk_list)
+            self.relation_model.insert_multiple(list(publication_dict.values()))
+        self.relation_model.save()
+
     def select_all_publication_ids(self):
         return self.publication_cache_model.select_all_ids()
 
@@ -156,12 +1357,619 @@ class ScopusCacheController:
         return self.author_cache_model.select_all_ids()
 
     def save(self):
+        self._save_accesses()
+        self.evict_publications()
         self.publication_cache_model.save()
         self.author_cache_model.save()
+        if self.relation_model is not None:
+            self.relation_model.save()
+
+    def _index_clear(self, id_index):
+        if id_index is not None:
+            id_index.clear()
 
     def wipe(self):
         self.publication_cache_model.wipe()
         self.author_cache_model.wipe()
+        if self.relation_model is not None:
+            self.relation_model.wipe()
+        self.publication_lru.clear()
+        self.author_lru.clear()
+        self._index_clear(self._publication_id_index)
+        self._index_clear(self._author_id_index)
+        with self.access_lock:
+            self.publication_access_dict = {}
+            self.author_access_dict = {}
+
+
+class CSRAdjacency:
+    """
+    An immutable adjacency list of int ids in the compressed sparse row layout.
+
+    The ids of all the nodes with outgoing edges are kept sorted in the node array. The neighbors of all those nodes
+    are kept in one neighbor array, row after row and sorted within each row, and the start of every row within the
+    neighbor array in the offset array, which has one additional item for the end of the last row. With numpy
+    installed, the arrays are numpy arrays and the adjacency is built from an edge list with vectorized operations,
+    otherwise they are arrays of the standard library.
+    """
+    def __init__(self, node_array, offset_array, neighbor_array):
+        self.node_array = node_array
+        self.offset_array = offset_array
+        self.neighbor_array = neighbor_array
+
+    @classmethod
+    def from_edges(cls, row_ids, column_ids):
+        """
+        Builds the adjacency from the edge list given as two sequences. Duplicate edges are only stored once.
+
+        :param row_ids: The sequence of the int ids of the nodes, where the edges start
+        :param column_ids: The sequence of the int ids of the nodes, where the edges end
+        :return: The CSRAdjacency
+        """
+        if numpy is not None:
+            row_array = numpy.asarray(row_ids, dtype=numpy.int64)
+            column_array = numpy.asarray(column_ids, dtype=numpy.int64)
+            order = numpy.lexsort((column_array, row_array))
+            row_array = row_array[order]
+            column_array = column_array[order]
+
+            # After sorting, the duplicate edges are next to each other
+            if len(row_array) > 1:
+                keep_array = numpy.ones(len(row_array), dtype=bool)
+                keep_array[1:] = (row_array[1:] != row_array[:-1]) | (column_array[1:] != column_array[:-1])
+                row_array = row_array[keep_array]
+                column_array = column_array[keep_array]
+
+            node_array, count_array = numpy.unique(row_array, return_counts=True)
+            offset_array = numpy.zeros(len(node_array) + 1, dtype=numpy.int64)
+            numpy.cumsum(count_array, out=offset_array[1:])
+            return cls(node_array, offset_array, column_array)
+
+        node_array = array.array('q')
+        offset_array = array.array('q', [0])
+        neighbor_array = array.array('q')
+        for row_id, column_id in sorted(set(zip(map(int, row_ids), map(int, column_ids)))):
+            if len(node_array) == 0 or node_array[-1] != row_id:
+                node_array.append(row_id)
+                offset_array.append(offset_array[-1])
+            neighbor_array.append(column_id)
+            offset_array[-1] += 1
+        return cls(node_array, offset_array, neighbor_array)
+
+    def _row_index(self, node_id):
+        if numpy is not None:
+            index = int(numpy.searchsorted(self.node_array, node_id))
+        else:
+            index = bisect.bisect_left(self.node_array, node_id)
+        if index < len(self.node_array) and self.node_array[index] == node_id:
+            return index
+        return None
+
+    def row(self, node_id):
+        """
+        The neighbors of the given node.
+
+        :param node_id: The int node id
+        :return: The sorted list of the int ids of the neighbors, empty for a node without edges
+        """
+        index = self._row_index(int(node_id))
+        if index is None:
+            return []
+        return list(map(int, self.neighbor_array[self.offset_array[index]:self.offset_array[index + 1]]))
+
+    def edges(self):
+        """
+        All the edges as two sequences of the same length.
+
+        :return: A tuple of the sequence of the row ids and the sequence of the column ids
+        """
+        if numpy is not None:
+            return numpy.repeat(self.node_array, numpy.diff(self.offset_array)), self.neighbor_array
+
+        row_array = array.array('q')
+        for index, node_id in enumerate(self.node_array):
+            row_array.extend([node_id] * (self.offset_array[index + 1] - self.offset_array[index]))
+        return row_array, self.neighbor_array
+
+    def transpose(self):
+        """
+        The adjacency with all the edges reversed.
+
+        :return: The CSRAdjacency
+        """
+        row_ids, column_ids = self.edges()
+        return CSRAdjacency.from_edges(column_ids, row_ids)
+
+    def replace_rows(self, row_dict):
+        """
+        The adjacency, in which the rows of the given nodes are replaced with the given neighbors.
+
+        :param row_dict: A dict with the int node ids as keys and the iterables of the int neighbor ids as values
+        :return: The new CSRAdjacency
+        """
+        row_ids, column_ids = self.edges()
+        new_row_list = []
+        new_column_list = []
+        for node_id, neighbor_ids in row_dict.items():
+            for neighbor_id in neighbor_ids:
+                new_row_list.append(node_id)
+                new_column_list.append(neighbor_id)
+
+        if numpy is not None:
+            replaced_array = numpy.fromiter(row_dict.keys(), dtype=numpy.int64, count=len(row_dict))
+            keep_array = ~numpy.isin(row_ids, replaced_array)
+            row_ids = numpy.concatenate((row_ids[keep_array], numpy.asarray(new_row_list, dtype=numpy.int64)))
+            column_ids = numpy.concatenate((column_ids[keep_array], numpy.asarray(new_column_list, dtype=numpy.int64)))
+        else:
+            edge_list = [x for x in zip(row_ids, column_ids) if x[0] not in row_dict]
+            row_ids = [x[0] for x in edge_list] + new_row_list
+            column_ids = [x[1] for x in edge_list] + new_column_list
+        return CSRAdjacency.from_edges(row_ids, column_ids)
+
+    def __len__(self):
+        return len(self.neighbor_array)
+
+
+class CitationGraph:
+    """
+    The in-memory graph of the citations between publications, with the edges pointing from the citing to the cited
+    publication.
+
+    The graph consists of two CSRAdjacency objects, the reverse one with the citing publications of every cited
+    publication and the forward one with the cited publications of every citing publication. As the citations are
+    known from the citation lists of the cited publications, the citations of a publication are always replaced as a
+    whole. The replaced rows are kept in a dict on top of the immutable adjacencies and are merged into new
+    adjacencies, once there are as many as the merge size. The graph can be used by multiple threads at the same time.
+    """
+    def __init__(self, citing_ids=(), cited_ids=(), merge_size=4096):
+        self.merge_size = merge_size
+
+        self.lock = threading.RLock()
+        self.reverse = CSRAdjacency.from_edges(cited_ids, citing_ids)
+        self.forward = self.reverse.transpose()
+        # The citing ids of the cited publications, whose rows have been replaced since the last merge and the forward
+        # edges of those rows, with the citing ids as keys
+        self.pending_dict = {}
+        self.pending_forward_dict = collections.defaultdict(set)
+
+    def _merge(self):
+        if len(self.pending_dict) != 0:
+            self.reverse = self.reverse.replace_rows(self.pending_dict)
+            self.forward = self.reverse.transpose()
+            self.pending_dict = {}
+            self.pending_forward_dict = collections.defaultdict(set)
+
+    def _citing_set(self, cited_id):
+        if cited_id in self.pending_dict.keys():
+            return self.pending_dict[cited_id]
+        return set(self.reverse.row(cited_id))
+
+    def replace_citations(self, cited_id, citing_id_list):
+        """
+        Replaces all the citations of the given publication.
+
+        :param cited_id: The int scopus id of the cited publication
+        :param citing_id_list: The list of the int scopus ids of all the publications, that cite it
+        :return: The sorted list of the citing ids, which were not in the graph before
+        """
+        cited_id = int(cited_id)
+        citing_id_set = set(map(int, citing_id_list))
+        with self.lock:
+            previous_citing_id_set = self._citing_set(cited_id)
+            if citing_id_set == previous_citing_id_set:
+                return []
+
+            if cited_id in self.pending_dict.keys():
+                for citing_id in previous_citing_id_set:
+                    self.pending_forward_dict[citing_id].discard(cited_id)
+            self.pending_dict[cited_id] = citing_id_set
+            for citing_id in citing_id_set:
+                self.pending_forward_dict[citing_id].add(cited_id)
+
+            if len(self.pending_dict) >= self.merge_size:
+                self._merge()
+        return sorted(citing_id_set - previous_citing_id_set)
+
+    def add_edges(self, edge_list):
+        """
+        Adds the given citations to the graph.
+
+        :param edge_list: The list of tuples (citing id, cited id)
+        :return: The list of the tuples, which were not in the graph before
+        """
+        citing_id_dict = collections.defaultdict(set)
+        for citing_id, cited_id in edge_list:
+            citing_id_dict[int(cited_id)].add(int(citing_id))
+
+        new_edge_list = []
+        with self.lock:
+            for cited_id, citing_id_set in citing_id_dict.items():
+                citing_id_set = citing_id_set.union(self._citing_set(cited_id))
+                for citing_id in self.replace_citations(cited_id, citing_id_set):
+                    new_edge_list.append((citing_id, cited_id))
+        return new_edge_list
+
+    def missing_edges(self, edge_list):
+        """
+        The edges of the given list, which are not in the graph.
+
+        :param edge_list: The list of tuples (citing id, cited id)
+        :return: The list of the missing tuples, in the order of the given list
+        """
+        with self.lock:
+            return list(filter(lambda x: int(x[0]) not in self._citing_set(int(x[1])), edge_list))
+
+    def citing_ids(self, cited_id):
+        """
+        The publications, that cite the given publication.
+
+        :param cited_id: The int scopus id
+        :return: The sorted list of int scopus ids
+        """
+        with self.lock:
+            return sorted(self._citing_set(int(cited_id)))
+
+    def citing_ids_multiple(self, cited_id_list):
+        """
+        The publications, that cite at least one of the given publications.
+
+        :param cited_id_list: The list of int scopus ids
+        :return: The sorted list of int scopus ids without duplicates
+        """
+        citing_id_set = set()
+        with self.lock:
+            for cited_id in cited_id_list:
+                citing_id_set.update(self._citing_set(int(cited_id)))
+        return sorted(citing_id_set)
+
+    def cited_ids(self, citing_id):
+        """
+        The publications of the graph, that are cited by the given publication.
+
+        :param citing_id: The int scopus id
+        :return: The sorted list of int scopus ids
+        """
+        citing_id = int(citing_id)
+        with self.lock:
+            cited_id_set = set(filter(lambda x: x not in self.pending_dict.keys(), self.forward.row(citing_id)))
+            cited_id_set.update(self.pending_forward_dict.get(citing_id, ()))
+        return sorted(cited_id_set)
+
+    def clear(self):
+        with self.lock:
+            self.reverse = CSRAdjacency.from_edges([], [])
+            self.forward = self.reverse.transpose()
+            self.pending_dict = {}
+            self.pending_forward_dict = collections.defaultdict(set)
+
+    def __len__(self):
+        with self.lock:
+            self._merge()
+            return len(self.reverse)
+
+
+class ScopusCitationGraphController:
+    """
+    The citation graph of the cached publications.
+
+    The edges are stored in the "citation" table of the relation model and kept in memory as a CitationGraph, which is
+    loaded from the table with the first query. Unlike the other relation tables, the table is always written by this
+    controller, no matter if the relation tables are enabled.
+    """
+    def __init__(self, relation_model=None, merge_size=None):
+        self.config = Config.get_instance()
+
+        if relation_model is None:
+            relation_model = ScopusPublicationRelationModel()
+        self.relation_model = relation_model  # type: ScopusPublicationRelationModel
+
+        if merge_size is None:
+            merge_size = self.config.getint('CACHE', 'citation_graph_merge_size', fallback=4096)
+        self.merge_size = merge_size
+
+        self._graph = None  # type: CitationGraph
+        self.graph_lock = threading.Lock()
+
+    @property
+    def graph(self):
+        with self.graph_lock:
+            if self._graph is None:
+                citing_id_array, cited_id_array = self.relation_model.select_citation_arrays()
+                self._graph = CitationGraph(citing_id_array, cited_id_array, merge_size=self.merge_size)
+            return self._graph
+
+    def insert_publications(self, publication_list):
+        """
+        Replaces the citations of the given publications in the graph with those of their citation lists and writes
+        the citations of the publications, whose citations have changed, into the citation table.
+
+        :param publication_list: The list of ScopusPublications
+        :return: The list of the new edges as tuples (citing id, cited id)
+        """
+        new_edge_list = []
+        citation_dict = {}
+        for publication in publication_list:
+            if not has_scopus_id(publication):
+                continue
+            scopus_id = int(publication)
+
+            citing_id_list = []
+            for citing_id in publication.citations:
+                citing_id = ScopusPublicationRelationModel._id_or_none(citing_id)
+                if citing_id is not None:
+                    citing_id_list.append(citing_id)
+
+            if set(citing_id_list) == set(self.graph.citing_ids(scopus_id)):
+                continue
+            citation_dict[scopus_id] = citing_id_list
+
+        # The graph is only changed, once the table has been written. Otherwise a failed write would leave the new
+        # citations in the graph and a retry would take them as written already
+        self.relation_model.replace_citations(citation_dict)
+        for scopus_id, citing_id_list in citation_dict.items():
+            for citing_id in self.graph.replace_citations(scopus_id, citing_id_list):
+                new_edge_list.append((citing_id, scopus_id))
+        return new_edge_list
+
+    def citing_ids(self, scopus_id):
+        return self.graph.citing_ids(scopus_id)
+
+    def citing_ids_multiple(self, scopus_id_list):
+        return self.graph.citing_ids_multiple(scopus_id_list)
+
+    def cited_ids(self, scopus_id):
+        return self.graph.cited_ids(scopus_id)
+
+    def missing_citing_ids(self, scopus_id, known_id_list):
+        """
+        The publications citing the given publication according to the graph, which are not in the given list.
+
+        :param scopus_id: The int scopus id of the cited publication
+        :param known_id_list: The list of the int scopus ids of the citing publications already known
+        :return: The sorted list of int scopus ids
+        """
+        known_id_set = set(map(int, known_id_list))
+        return list(filter(lambda x: x not in known_id_set, self.graph.citing_ids(scopus_id)))
+
+    def save(self):
+        self.relation_model.save()
+
+    def wipe(self):
+        self.relation_model.wipe_citations()
+        with self.graph_lock:
+            self._graph = None
+
+
+class ScopusCacheSnapshotController:
+    """
+    Exports the publications and author profiles of the cache into a compressed snapshot file and imports them back.
+
+    The snapshot is a sequence of records, each one made of a header with the record type, the length and the crc32
+    checksum of the payload, followed by the payload. After the magic bytes and the header record, every table starts
+    with a table record naming the columns, which is followed by the block records of the table. A block contains up to
+    "block_size" rows in a columnar layout, a list of values for every column, compressed with zlib, so that the
+    similar values of one column are compressed together. The end record holds the row counts and the sha256 checksum
+    over all the uncompressed blocks.
+
+    A delta snapshot only contains the entries, which have been fetched since a given datetime and is imported on top
+    of an existing cache. Entries evicted or deleted since then are not part of a delta.
+    """
+    MAGIC = b'SWPSNAP1'
+    RECORD_HEADER = struct.Struct('>cII')
+
+    HEADER = b'H'
+    TABLE = b'T'
+    BLOCK = b'B'
+    END = b'E'
+
+    PUBLICATION_TABLE = 'publication_cache'
+    AUTHOR_TABLE = 'author_cache'
+
+    def __init__(self, cache_controller, block_size=1000):
+        self.cache_controller = cache_controller  # type: ScopusCacheController
+        self.block_size = block_size
+
+    @staticmethod
+    def _datetime_string(value):
+        if value is None:
+            return None
+        return value.replace(microsecond=0).isoformat()
+
+    @staticmethod
+    def _datetime(value):
+        if value is None:
+            return None
+        return datetime.datetime.strptime(value, '%Y-%m-%dT%H:%M:%S')
+
+    def _write_record(self, file, record_type, payload):
+        file.write(self.RECORD_HEADER.pack(record_type, len(payload), zlib.crc32(payload) & 0xffffffff))
+        file.write(payload)
+
+    def _write_json(self, file, record_type, obj):
+        self._write_record(file, record_type, json.dumps(obj).encode('utf-8'))
+
+    def _iter_records(self, file):
+        if file.read(len(self.MAGIC)) != self.MAGIC:
+            raise ValueError('The file is not a cache snapshot')
+
+        while True:
+            header = file.read(self.RECORD_HEADER.size)
+            if len(header) == 0:
+                break
+            if len(header) != self.RECORD_HEADER.size:
+                raise ValueError('The cache snapshot is truncated')
+            record_type, length, checksum = self.RECORD_HEADER.unpack(header)
+            payload = file.read(length)
+            if len(payload) != length or zlib.crc32(payload) & 0xffffffff != checksum:
+                raise ValueError('The cache snapshot is corrupted')
+            yield record_type, payload
+
+    def export_snapshot(self, path, since=None):
+        """
+        Writes all the cached publications and author profiles into a new snapshot file. With a given since datetime
+        only those, which have been fetched since then are written (a delta snapshot).
+
+        :param path: The string path of the snapshot file
+        :param since: The optional datetime for a delta snapshot
+        :return: A dict with the amount of exported publications and author profiles
+        """
+        publication_cache_model = self.cache_controller.publication_cache_model
+        author_cache_model = self.cache_controller.author_cache_model
+        sha256 = hashlib.sha256()
+        count_dict = {}
+
+        # The snapshot is written into a temporary file first, so that an interrupted export does not leave a
+        # snapshot behind, that looks complete
+        temp_path = '{}.tmp'.format(path)
+        with open(temp_path, mode='wb') as file:
+            file.write(self.MAGIC)
+            self._write_json(file, self.HEADER, {
+                'version': 1,
+                'created': self._datetime_string(timestamp_now()),
+                'kind': 'full' if since is None else 'delta',
+                'since': self._datetime_string(since)
+            })
+
+            # The publications are selected in chunks by their ids together with the time they were fetched at
+            self._write_json(file, self.TABLE, {
+                'name': self.PUBLICATION_TABLE,
+                'columns': PUBLICATION_COLUMNS + ['fetched_at']
+            })
+            count = 0
+            for chunk_list in chunks(publication_cache_model.select_all_ids(), self.block_size):
+                row_list = []
+                entry_dict = publication_cache_model.select_multiple_entries(chunk_list)
+                for publication, fetched_at in entry_dict.values():
+                    if since is None or (fetched_at is not None and fetched_at >= since):
+                        row_list.append(publication_row(publication) + (self._datetime_string(fetched_at), ))
+                count += self._write_block(file, row_list, sha256)
+            count_dict['publications'] = count
+
+            # The author cache is small, so the profiles are selected all at once
+            self._write_json(file, self.TABLE, {
+                'name': self.AUTHOR_TABLE,
+                'columns': AUTHOR_COLUMNS + ['fetched_at']
+            })
+            count = 0
+            for chunk_list in chunks(author_cache_model.select_all(), self.block_size):
+                row_list = []
+                timestamp_dict = author_cache_model.timestamp_model.select(list(map(int, chunk_list)))
+                for author_profile in chunk_list:
+                    fetched_at = timestamp_dict.get(int(author_profile), (None, None))[0]
+                    if since is None or (fetched_at is not None and fetched_at >= since):
+                        row_list.append(author_profile_row(author_profile) + (self._datetime_string(fetched_at), ))
+                count += self._write_block(file, row_list, sha256)
+            count_dict['authors'] = count
+
+            self._write_json(file, self.END, {
+                'publications': count_dict['publications'],
+                'authors': count_dict['authors'],
+                'sha256': sha256.hexdigest()
+            })
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+        return count_dict
+
+    def _write_block(self, file, row_list, sha256):
+        if len(row_list) == 0:
+            return 0
+        # Transposing the rows into the columns
+        block = json.dumps(list(map(list, zip(*row_list)))).encode('utf-8')
+        sha256.update(block)
+        self._write_record(file, self.BLOCK, zlib.compress(block, 6))
+        return len(row_list)
+
+    def _iter_blocks(self, path):
+        # Generator over the tuples of the table name and the row list of every block of the snapshot
+        table_name = None
+        with open(path, mode='rb') as file:
+            for record_type, payload in self._iter_records(file):
+                if record_type == self.TABLE:
+                    table_name = json.loads(payload.decode('utf-8'))['name']
+                elif record_type == self.BLOCK:
+                    block = zlib.decompress(payload)
+                    yield table_name, block
+
+    def verify_snapshot(self, path):
+        """
+        Checks the checksums of the given snapshot file without importing it.
+
+        :param path: The string path of the snapshot file
+        :return: The dict of the header of the snapshot
+        :raises ValueError: If the snapshot is truncated or corrupted
+        """
+        header_dict = None
+        end_dict = None
+        sha256 = hashlib.sha256()
+        with open(path, mode='rb') as file:
+            for record_type, payload in self._iter_records(file):
+                if record_type == self.HEADER:
+                    header_dict = json.loads(payload.decode('utf-8'))
+                elif record_type == self.BLOCK:
+                    sha256.update(zlib.decompress(payload))
+                elif record_type == self.END:
+                    end_dict = json.loads(payload.decode('utf-8'))
+
+        if header_dict is None or end_dict is None:
+            raise ValueError('The cache snapshot is truncated')
+        if end_dict['sha256'] != sha256.hexdigest():
+            raise ValueError('The checksum of the cache snapshot does not match')
+        header_dict.update(end_dict)
+        return header_dict
+
+    def import_snapshot(self, path):
+        """
+        Imports the publications and author profiles of the given snapshot into the cache, using the bulk inserts of
+        the cache controller. The snapshot is verified first, nothing is imported from a corrupted snapshot. The
+        times the entries were fetched at are taken from the snapshot. Entries, of which the cache already has a
+        newer version, are skipped.
+
+        :param path: The string path of the snapshot file
+        :return: A dict with the amount of imported publications and author profiles
+        """
+        self.verify_snapshot(path)
+
+        count_dict = {'publications': 0, 'authors': 0}
+        for table_name, block in self._iter_blocks(path):
+            row_list = list(zip(*json.loads(block.decode('utf-8'))))
+            if table_name == self.PUBLICATION_TABLE:
+                timestamp_model = self.cache_controller.publication_cache_model.timestamp_model
+                lru = self.cache_controller.publication_lru
+                object_list = list(map(lambda x: publication_from_row(x[:-1]), row_list))
+            else:
+                timestamp_model = self.cache_controller.author_cache_model.timestamp_model
+                lru = self.cache_controller.author_lru
+                object_list = list(map(lambda x: author_profile_from_row(x[:-1]), row_list))
+
+            # Dropping the entries, of which the cache has a newer version, before anything is written
+            previous_dict = timestamp_model.select(list(map(int, object_list)))
+            fetched_at_dict = collections.defaultdict(list)
+            import_list = []
+            for obj, row in zip(object_list, row_list):
+                fetched_at = self._datetime(row[-1])
+                previous_fetched_at = previous_dict.get(int(obj), (None, None))[0]
+                if previous_fetched_at is not None and (fetched_at is None or previous_fetched_at > fetched_at):
+                    continue
+                fetched_at_dict[fetched_at].append(int(obj))
+                import_list.append(obj)
+
+            if table_name == self.PUBLICATION_TABLE:
+                self.cache_controller.insert_multiple_publications(import_list)
+                count_dict['publications'] += len(import_list)
+            else:
+                self.cache_controller.insert_multiple_author_profiles(import_list)
+                count_dict['authors'] += len(import_list)
+
+            # Restoring the fetched at times, grouped by the time, so that every group is one bulk update
+            for fetched_at, id_list in fetched_at_dict.items():
+                timestamp_model.update_fetched_at(id_list, fetched_at)
+            # The in-process tier still has the entries with the time of the import
+            for obj in import_list:
+                lru.remove(int(obj))
+
+        self.cache_controller.save()
+        return count_dict
 
 
 ################################################
@@ -170,12 +1978,60 @@ class ScopusCacheController:
 ################################################
 
 
+class MemoryCacheTimestampModel:
+    """
+    Keeps the fetched at and last accessed timestamps of the entries of the legacy pickle caches. The timestamps are
+    only kept in memory, so after a restart the entries of a pickle cache have no fetched at time and count as
+    fresh, until the refresh ahead renews them.
+    """
+    def __init__(self):
+        self.content = {}
+
+    def select(self, id_list):
+        timestamp_dict = {}
+        for _id in map(int, id_list):
+            if _id in self.content.keys():
+                timestamp_dict[_id] = self.content[_id]
+        return timestamp_dict
+
+    def update_fetched_at(self, id_list, fetched_at):
+        for _id in map(int, id_list):
+            self.content[_id] = (fetched_at, self.content.get(_id, (None, None))[1])
+
+    def update_last_accessed(self, access_dict):
+        for _id, accessed_at in access_dict.items():
+            self.content[int(_id)] = (self.content.get(int(_id), (None, None))[0], accessed_at)
+
+    def select_refresh_ids(self, expires_before, limit):
+        id_list = []
+        for _id, (fetched_at, last_accessed) in self.content.items():
+            if last_accessed is None:
+                continue
+            if fetched_at is None or (fetched_at < expires_before and last_accessed > fetched_at):
+                id_list.append(_id)
+        id_list.sort(key=lambda x: self.content[x][1], reverse=True)
+        return id_list[:limit]
+
+    def iter_eviction_ids(self, fetch_size=None):
+        id_list = sorted(self.content.keys(), key=lambda x: eviction_key(*self.content[x]))
+        for _id in id_list:
+            yield _id
+
+    def delete(self, id_list):
+        for _id in map(int, id_list):
+            self.content.pop(_id, None)
+
+    def wipe(self):
+        self.content = {}
+
+
 class ScopusAuthorPickleCacheModel(AuthorProfilePersistencyInterface):
 
     def __init__(self):
         self.path_string = '{}/cache/authors.pkl'.format(PATH)
         self.path = pathlib.Path(self.path_string)
         self.content = self.load()
+        self.timestamp_model = MemoryCacheTimestampModel()
 
     def load(self):
         with self.path.open(mode='rb') as file:
@@ -184,11 +2040,21 @@ class ScopusAuthorPickleCacheModel(AuthorProfilePersistencyInterface):
 
     def insert(self, author_profile):
         self.content[int(author_profile)] = author_profile
+        self.timestamp_model.update_fetched_at([int(author_profile)], timestamp_now())
+
+    def insert_multiple(self, author_profile_list):
+        for author_profile in author_profile_list:
+            self.insert(author_profile)
 
     def select(self, author_id):
         if author_id in self.content.keys():
             return self.content[author_id]
 
+    def select_entry(self, author_id):
+        author_profile = self.select(int(author_id))
+        if author_profile is not None:
+            return author_profile, self.timestamp_model.select([author_id]).get(int(author_id), (None, None))[0]
+
     def select_all(self):
         author_profile_list = []
         for key in self.content.keys():
@@ -196,11 +2062,15 @@ class ScopusAuthorPickleCacheModel(AuthorProfilePersistencyInterface):
             author_profile_list.append(author_profile)
         return author_profile_list
 
+    def iter_all(self, fetch_size=None):
+        return iter(self.select_all())
+
     def contains(self, author):
         return int(author) in self.content.keys()
 
     def wipe(self):
         self.content = {}
+        self.timestamp_model.wipe()
         self.save()
 
     def save(self):
@@ -217,6 +2087,7 @@ class ScopusPublicationPickleCacheModel(PublicationPersistencyInterface):
         self.path = pathlib.Path(self.path_string)
 
         self.content = self.load()
+        self.timestamp_model = MemoryCacheTimestampModel()
 
     def load(self):
         with self.path.open(mode='rb') as file:
@@ -225,11 +2096,31 @@ class ScopusPublicationPickleCacheModel(PublicationPersistencyInterface):
 
     def insert(self, publication):
         self.content[int(publication)] = publication
+        self.timestamp_model.update_fetched_at([int(publication)], timestamp_now())
+
+    def insert_multiple(self, publication_list):
+        for publication in publication_list:
+            self.insert(publication)
 
     def select(self, scopus_id):
         if scopus_id in self.content.keys():
             return self.content[scopus_id]
 
+    def select_multiple(self, scopus_id_list):
+        publication_dict = {}
+        for scopus_id in scopus_id_list:
+            if int(scopus_id) in self.content.keys():
+                publication_dict[int(scopus_id)] = self.content[int(scopus_id)]
+        return publication_dict
+
+    def select_multiple_entries(self, scopus_id_list):
+        publication_dict = self.select_multiple(scopus_id_list)
+        timestamp_dict = self.timestamp_model.select(publication_dict.keys())
+        entry_dict = {}
+        for scopus_id, publication in publication_dict.items():
+            entry_dict[scopus_id] = (publication, timestamp_dict.get(scopus_id, (None, None))[0])
+        return entry_dict
+
     def select_all(self):
         publication_list = []
         for key in self.content.keys():
@@ -237,11 +2128,45 @@ class ScopusPublicationPickleCacheModel(PublicationPersistencyInterface):
             publication_list.append(publication)
         return publication_list
 
+    def iter_all(self, fetch_size=None):
+        return iter(self.select_all())
+
+    def delete_multiple(self, scopus_id_list):
+        for scopus_id in map(int, scopus_id_list):
+            self.content.pop(scopus_id, None)
+        self.timestamp_model.delete(scopus_id_list)
+
+    def _select_ids_by_attribute(self, attribute, value_list):
+        value_set = set(filter(lambda x: x is not None and x != '', value_list))
+        id_dict = {}
+        for scopus_id, publication in self.content.items():
+            if getattr(publication, attribute) in value_set:
+                id_dict[getattr(publication, attribute)] = int(scopus_id)
+        return id_dict
+
+    def select_ids_by_eid(self, eid_list):
+        return self._select_ids_by_attribute('eid', eid_list)
+
+    def select_ids_by_doi(self, doi_list):
+        return self._select_ids_by_attribute('doi', doi_list)
+
     def contains(self, publication):
         return int(publication) in self.content.keys()
 
+    def select_content_hash(self, scopus_id):
+        if int(scopus_id) in self.content.keys():
+            return self.content[int(scopus_id)].content_hash
+
+    def select_content_hashes(self, scopus_id_list):
+        content_hash_dict = {}
+        for scopus_id in scopus_id_list:
+            if int(scopus_id) in self.content.keys():
+                content_hash_dict[int(scopus_id)] = self.content[int(scopus_id)].content_hash
+        return content_hash_dict
+
     def wipe(self):
         self.content = {}
+        self.timestamp_model.wipe()
         self.save()
 
     def save(self):
@@ -249,65 +2174,154 @@ class ScopusPublicationPickleCacheModel(PublicationPersistencyInterface):
             pickle.dump(self.content, file)
 
 
+class SQLCacheTimestampModel:
+    """
+    Manages the columns "fetched_at" and "last_accessed" of a cache table. The fetched at time is the last time the
+    entry was requested from scopus, the last accessed time is the last time the entry was read from the cache.
+    """
+    def __init__(self, database_access, database_name, id_column):
+        self.database_access = database_access  # type: DBAPIDatabaseAccess
+        self.database_name = database_name
+        self.id_column = id_column
+
+    def select(self, id_list, chunk_size=500):
+        """
+        The timestamps of the entries with the given ids.
+
+        :param id_list: The list of int ids
+        :param chunk_size: The int max amount of ids in the IN clause of one query
+        :return: A dict with the int ids as keys and tuples (fetched at, last accessed) as values
+        """
+        timestamp_dict = {}
+        for chunk_list in chunks(list(map(int, id_list)), chunk_size):
+            sql = (
+                'SELECT {id}, fetched_at, last_accessed FROM {database} WHERE {id} IN ({placeholders})'
+            ).format(
+                id=self.id_column,
+                database=self.database_name,
+                placeholders=placeholders(len(chunk_list))
+            )
+            for row in self.database_access.select(sql, chunk_list):
+                timestamp_dict[int(row[0])] = (row[1], row[2])
+        return timestamp_dict
+
+    def update_fetched_at(self, id_list, fetched_at):
+        sql = (
+            'UPDATE {database} SET fetched_at=%s WHERE {id}=%s'
+        ).format(
+            database=self.database_name,
+            id=self.id_column
+        )
+        self.database_access.execute_many(sql, list(map(lambda x: (fetched_at, int(x)), id_list)))
+
+    def update_last_accessed(self, access_dict):
+        """
+        Sets the last accessed times of multiple entries with one bulk update.
+
+        :param access_dict: A dict with the int ids as keys and the datetimes of the last access as values
+        :return: void
+        """
+        sql = (
+            'UPDATE {database} SET last_accessed=%s WHERE {id}=%s'
+        ).format(
+            database=self.database_name,
+            id=self.id_column
+        )
+        self.database_access.execute_many(sql, list(map(lambda x: (x[1], int(x[0])), access_dict.items())))
+
+    def select_refresh_ids(self, expires_before, limit):
+        """
+        The ids of the entries, which were fetched before the given time, but have been accessed since. Entries
+        without a fetched at time are always included, if they have been accessed at all.
+
+        :param expires_before: The datetime
+        :param limit: The int max amount of ids
+        :return: The list of int ids, the most recently accessed first
+        """
+        sql = (
+            'SELECT {id} FROM {database} '
+            'WHERE last_accessed IS NOT NULL '
+            'AND (fetched_at IS NULL OR (fetched_at < %s AND last_accessed > fetched_at)) '
+            'ORDER BY last_accessed DESC LIMIT %s'
+        ).format(
+            id=self.id_column,
+            database=self.database_name
+        )
+        row_list = self.database_access.select(sql, (expires_before, int(limit)))
+        return list(map(lambda x: int(x[0]), row_list))
+
+    def iter_eviction_ids(self, fetch_size=None):
+        """
+        The ids of all the entries in the least recently used order, sorted by a single query. An entry counts as
+        used, when it was either read or fetched, whichever happened later. The entries without any timestamp come
+        first.
+
+        :param fetch_size: The int amount of ids to be fetched from the database at once
+        :return: A generator of int ids, the least recently used first
+        """
+        used_at = (
+            'CASE WHEN last_accessed IS NULL THEN fetched_at '
+            'WHEN fetched_at IS NULL OR last_accessed > fetched_at THEN last_accessed '
+            'ELSE fetched_at END'
+        )
+        sql = (
+            'SELECT {id} FROM {database} '
+            'ORDER BY {used_at} IS NOT NULL, {used_at}, {id}'
+        ).format(
+            id=self.id_column,
+            database=self.database_name,
+            used_at=used_at
+        )
+        for row in self.database_access.iter_select(sql, fetch_size=fetch_size):
+            yield int(row[0])
+
+    def delete(self, id_list):
+        # The timestamps are columns of the cache table, they are deleted together with the rows
+        pass
+
+
 class ScopusAuthorDatabaseCacheModel(AuthorProfilePersistencyInterface):
 
     def __init__(self):
         AuthorProfilePersistencyInterface.__init__(self)
 
-        self.database_access = MySQLDatabaseAccess()
+        self.database_access = create_database_access()
 
         self.config = Config.get_instance()
         self.database_name = self.config['MYSQL']['author_cache_table']
 
+        self.timestamp_model = SQLCacheTimestampModel(self.database_access, self.database_name, 'author_id')
+
     def wipe(self):
-        sql = 'TRUNCATE {};'.format(self.database_name)
+        sql = self.database_access.dialect.truncate_sql(self.database_name)
         self.database_access.execute(sql)
+        self.database_access.save()
 
     def insert(self, author):
-        # Converting all the data into json so it fits into the data base columns
-
-        # Turning the list of publication scopus ids for the author into a json string
-        publication_list_json = json.dumps(author.publications).replace('"', "'")
-
-        sql = (
-            'INSERT INTO '
-            '{database} ('
-            'author_id,'
-            'first_name, '
-            'last_name, '
-            'h_index, '
-            'citation_count, '
-            'document_count, '
-            'publications) '
-            'VALUES ('
-            '{author_id},'
-            '"{first_name}",'
-            '"{last_name}",'
-            '{h_index},'
-            '{citation_count},'
-            '{document_count},'
-            '"{publications}") '
-            'ON DUPLICATE KEY UPDATE '
-            'author_id = {author_id},'
-            'first_name = "{first_name}",'
-            'last_name = "{last_name}",'
-            'h_index = {h_index},'
-            'citation_count = {citation_count},'
-            'document_count = {document_count},'
-            'publications = "{publications}";'
-            'COMMIT;'
-        ).format(
-            database=self.database_name,
-            author_id=author.id,
-            first_name=author.first_name,
-            last_name=author.last_name,
-            h_index=author.h_index,
-            document_count=author.document_count,
-            citation_count=author.citation_count,
-            publications=publication_list_json
+        # Converting all the data into the values for the columns and inserting with the upsert of the backend
+        sql = self.database_access.dialect.upsert_sql(
+            self.database_name,
+            AUTHOR_COLUMNS + ['fetched_at'],
+            ['author_id']
         )
+        self.database_access.execute(sql, author_profile_row(author) + (timestamp_now(), ))
 
-        self.database_access.execute(sql)
+    def insert_multiple(self, author_profile_list):
+        """
+        Inserts all the author profiles of the list with one bulk upsert.
+
+        :param author_profile_list: The list of ScopusAuthorProfile objects
+        :return: void
+        """
+        fetched_at = timestamp_now()
+        row_list = list(map(lambda x: author_profile_row(x) + (fetched_at, ), author_profile_list))
+        if len(row_list) != 0:
+            sql = self.database_access.dialect.upsert_sql(
+                self.database_name,
+                AUTHOR_COLUMNS + ['fetched_at'],
+                ['author_id']
+            )
+            self.database_access.execute_many(sql, row_list)
 
     def select(self, author_id):
         sql = (
@@ -319,43 +2333,40 @@ class ScopusAuthorDatabaseCacheModel(AuthorProfilePersistencyInterface):
             'citation_count, '
             'document_count, '
             'publications '
-            'FROM {database} WHERE author_id={author_id}'
+            'FROM {database} WHERE author_id=%s'
         ).format(
-            database=self.database_name,
-            author_id=author_id
+            database=self.database_name
         )
 
-        row_list = self.database_access.select(sql)
+        row_list = self.database_access.select(sql, (int(author_id), ))
 
         if len(row_list) != 0:
             row = row_list[0]
             author_profile = self._author_profile_from_list(row)
             return author_profile
 
-    @staticmethod
-    def _author_profile_from_list(row):
-        author_id = row[0]
-        first_name = row[1]
-        last_name = row[2]
-        h_index = row[3]
-        citation_count = row[4]
-        document_count = row[5]
-
-        publications_json_string = row[6]
-        publication_list = json.loads(publications_json_string.replace("'", '"'))
-        publication_list = list(map(lambda x: int(x), publication_list))
-
-        author_profile = ScopusAuthorProfile(
-            author_id,
-            first_name,
-            last_name,
-            h_index,
-            citation_count,
-            document_count,
-            publication_list
+    def select_entry(self, author_id):
+        """
+        The author profile together with the time it was fetched at, with one query.
+
+        :param author_id: The int author id
+        :return: A tuple (ScopusAuthorProfile, fetched at datetime) or None, if the author is not in the cache
+        """
+        sql = (
+            'SELECT {columns}, fetched_at FROM {database} WHERE author_id=%s'
+        ).format(
+            columns=', '.join(AUTHOR_COLUMNS),
+            database=self.database_name
         )
 
-        return author_profile
+        row_list = self.database_access.select(sql, (int(author_id), ))
+        if len(row_list) != 0:
+            row = row_list[0]
+            return self._author_profile_from_list(row), row[len(AUTHOR_COLUMNS)]
+
+    @staticmethod
+    def _author_profile_from_list(row):
+        return author_profile_from_row(row)
 
     def select_all(self):
 
@@ -367,7 +2378,7 @@ class ScopusAuthorDatabaseCacheModel(AuthorProfilePersistencyInterface):
             'h_index, '
             'citation_count, '
             'document_count, '
-            'publications'
+            'publications '
             'FROM {database}'
         ).format(
             database=self.database_name
@@ -381,6 +2392,31 @@ class ScopusAuthorDatabaseCacheModel(AuthorProfilePersistencyInterface):
 
         return author_profile_list
 
+    def iter_all(self, fetch_size=None):
+        """
+        A generator over all the author profiles in the cache, which are fetched from the database with a server side
+        cursor in batches of the given size.
+
+        :param fetch_size: The int amount of rows to be fetched at once
+        :return: A generator of ScopusAuthorProfiles
+        """
+        sql = (
+            'SELECT '
+            'author_id, '
+            'first_name, '
+            'last_name, '
+            'h_index, '
+            'citation_count, '
+            'document_count, '
+            'publications '
+            'FROM {database}'
+        ).format(
+            database=self.database_name
+        )
+
+        for row in self.database_access.iter_select(sql, fetch_size=fetch_size):
+            yield self._author_profile_from_list(row)
+
     def select_all_ids(self):
         sql = (
             'SELECT '
@@ -397,13 +2433,12 @@ class ScopusAuthorDatabaseCacheModel(AuthorProfilePersistencyInterface):
     def contains(self, author):
 
         sql = (
-            'SELECT * FROM {database} WHERE author_id={author_id}'
+            'SELECT author_id FROM {database} WHERE author_id=%s'
         ).format(
-            database=self.database_name,
-            author_id=int(author)
+            database=self.database_name
         )
 
-        row_list = self.database_access.select(sql)
+        row_list = self.database_access.select(sql, (int(author), ))
         return len(row_list) > 0
 
     def save(self):
@@ -415,181 +2450,232 @@ class ScopusPublicationDatabaseCacheModel(PublicationPersistencyInterface):
     def __init__(self):
         PublicationPersistencyInterface.__init__(self)
 
-        self.database_access = MySQLDatabaseAccess()
+        self.database_access = create_database_access()
 
         self.config = Config.get_instance()
         self.database_name = self.config['MYSQL']['publication_cache_table']
 
+        self.timestamp_model = SQLCacheTimestampModel(self.database_access, self.database_name, 'scopus_id')
+
     def wipe(self):
-        sql = 'TRUNCATE {};'.format(self.database_name)
+        sql = self.database_access.dialect.truncate_sql(self.database_name)
         self.database_access.execute(sql)
+        self.database_access.save()
 
     def insert(self, publication):
-        if publication is None or publication.id == '':
+        if not has_scopus_id(publication):
             return None
-        # Converting all the data so it fits into a database data column
-
-        # Turning the creator ScopusAuthor object into a json string
-        creator_dict = to_dict(publication.creator)
-        creator_json_string = json.dumps(creator_dict).replace('"', "'")
-
-        # Turning the authors list, list of ScopusAuthor objects into a json string
-        author_dict_list = to_dict(publication.authors)
-        authors_json_string = json.dumps(author_dict_list).replace('"', "'")
-
-        # Turning the keywords list and the citations list of str/int into a json object
-        keywords_json_string = json.dumps(publication.keywords).replace('"', "'")
-        citations_json_string = json.dumps(publication.citations).replace('"', "'")
-
-        sql = (
-            'INSERT INTO '
-            '{database} ('
-            'scopus_id, '
-            'eid, '
-            'doi, '
-            'creator, '
-            'title, '
-            'description, '
-            'journal, '
-            'volume, '
-            'date, '
-            'authors, '
-            'keywords, '
-            'citations ) '
-            'VALUES '
-            '({scopus_id}, '
-            '"{eid}", '
-            '"{doi}", '
-            '"{creator}", '
-            '"{title}", '
-            '"{description}", '
-            '"{journal}", '
-            '"{volume}", '
-            '"{date}", '
-            '"{authors}", '
-            '"{keywords}", '
-            '"{citations}") '
-            'ON DUPLICATE KEY UPDATE '
-            'scopus_id = {scopus_id}, '
-            'eid = "{eid}", '
-            'doi = "{doi}", '
-            'creator = "{creator}", '
-            'title = "{title}", '
-            'description = "{description}", '
-            'journal = "{journal}", '
-            'volume = "{volume}", '
-            'date = "{date}", '
-            'authors = "{authors}", '
-            'keywords = "{keywords}", '
-            'citations = "{citations}";'
-            'COMMIT;'
-        ).format(
-            database=self.database_name,
-            scopus_id=publication.id,
-            eid=publication.eid,
-            doi=publication.doi,
-            creator=creator_json_string,
-            title=publication.title,
-            description=publication.description,
-            journal=publication.journal,
-            volume=publication.volume,
-            date=publication.date,
-            authors=authors_json_string,
-            keywords=keywords_json_string,
-            citations=citations_json_string
+        # Converting all the data into the values for the columns and inserting with the upsert of the backend
+        sql = self.database_access.dialect.upsert_sql(
+            self.database_name,
+            PUBLICATION_COLUMNS + ['fetched_at'],
+            ['scopus_id']
         )
-
-        # Executing the sql on the database
-        self.database_access.execute(sql)
+        self.database_access.execute(sql, publication_row(publication) + (timestamp_now(), ))
+
+    def insert_multiple(self, publication_list):
+        """
+        Inserts all the publications of the list with one bulk upsert.
+
+        :param publication_list: The list of ScopusPublication objects
+        :return: void
+        """
+        publication_list = filter(has_scopus_id, publication_list)
+        fetched_at = timestamp_now()
+        row_list = list(map(lambda x: publication_row(x) + (fetched_at, ), publication_list))
+        if len(row_list) != 0:
+            sql = self.database_access.dialect.upsert_sql(
+                self.database_name,
+                PUBLICATION_COLUMNS + ['fetched_at'],
+                ['scopus_id']
+            )
+            self.database_access.execute_many(sql, row_list)
 
     def select(self, scopus_id):
 
         sql = (
-            'SELECT '
-            'scopus_id, '
-            'eid, '
-            'doi, '
-            'creator, '
-            'title, '
-            'description, '
-            'journal, '
-            'volume, '
-            'date, '
-            'authors, '
-            'keywords, '
-            'citations '
-            'FROM {database} WHERE scopus_id={id}'
+            'SELECT {columns} FROM {database} WHERE scopus_id=%s'
         ).format(
-            database=self.database_name,
-            id=scopus_id
+            columns=', '.join(PUBLICATION_COLUMNS),
+            database=self.database_name
         )
 
-        row_list = self.database_access.select(sql)
+        row_list = self.database_access.select(sql, (int(scopus_id), ))
 
         if len(row_list) != 0:
             row = row_list[0]
+            return publication_from_row(row)
+
+    def select_multiple(self, scopus_id_list, chunk_size=500):
+        """
+        Selects all the publications for the given scopus ids with one query per chunk of ids.
+
+        :param scopus_id_list: The list of int scopus ids
+        :param chunk_size: The int max amount of ids in the IN clause of one query
+        :return: A dict with the int scopus ids as keys and the ScopusPublication objects as values. Publications,
+            that are not stored are not part of the dict.
+        """
+        scopus_id_list = list(map(int, scopus_id_list))
+
+        publication_dict = {}
+        for chunk_list in chunks(scopus_id_list, chunk_size):
+            sql = (
+                'SELECT {columns} FROM {database} WHERE scopus_id IN ({placeholders})'
+            ).format(
+                columns=', '.join(PUBLICATION_COLUMNS),
+                database=self.database_name,
+                placeholders=placeholders(len(chunk_list))
+            )
 
-            scopus_id = row[0]
-            eid = row[1]
-            doi = row[2]
-            title = row[4]
-            description = row[5]
-            journal = row[6]
-            volume = row[7]
-            date = row[8]
-
-            creator_json_string = row[3].replace("'", '"')
-            creator_dict = json.loads(creator_json_string)
-            creator = from_dict(creator_dict)
-
-            authors_json_string = row[9].replace("'", '"')
-            author_dict_list = json.loads(authors_json_string)
-            author_list = from_dict(author_dict_list)
-
-            keywords_json_string = row[10].replace("'", '"')
-            keywords_list = json.loads(keywords_json_string)
-
-            citations_json_string = row[11].replace("'", '"')
-            citations_list = json.loads(citations_json_string)
-
-            publication = ScopusPublication(
-                scopus_id,
-                eid,
-                doi,
-                title,
-                description,
-                date,
-                creator,
-                author_list,
-                citations_list,
-                keywords_list,
-                journal,
-                volume
+            row_list = self.database_access.select(sql, chunk_list)
+            for row in row_list:
+                publication = publication_from_row(row)
+                publication_dict[int(publication)] = publication
+
+        return publication_dict
+
+    def select_multiple_entries(self, scopus_id_list, chunk_size=500):
+        """
+        Selects all the publications for the given scopus ids together with the times they were fetched at, with one
+        query per chunk of ids.
+
+        :param scopus_id_list: The list of int scopus ids
+        :param chunk_size: The int max amount of ids in the IN clause of one query
+        :return: A dict with the int scopus ids as keys and tuples (ScopusPublication, fetched at datetime) as values
+        """
+        scopus_id_list = list(map(int, scopus_id_list))
+
+        entry_dict = {}
+        for chunk_list in chunks(scopus_id_list, chunk_size):
+            sql = (
+                'SELECT {columns}, fetched_at FROM {database} WHERE scopus_id IN ({placeholders})'
+            ).format(
+                columns=', '.join(PUBLICATION_COLUMNS),
+                database=self.database_name,
+                placeholders=placeholders(len(chunk_list))
             )
 
-            return publication
+            row_list = self.database_access.select(sql, chunk_list)
+            for row in row_list:
+                publication = publication_from_row(row)
+                entry_dict[int(publication)] = (publication, row[len(PUBLICATION_COLUMNS)])
+
+        return entry_dict
+
+    def select_ids_by_eid(self, eid_list):
+        """
+        The scopus ids of the publications with the given eids.
+
+        :param eid_list: The list of string eids
+        :return: A dict with the eids as keys and the int scopus ids as values, for those eids, that are stored
+        """
+        return select_ids_by_column(self.database_access, self.database_name, 'eid', eid_list)
+
+    def select_ids_by_doi(self, doi_list):
+        """
+        The scopus ids of the publications with the given dois.
+
+        :param doi_list: The list of string dois
+        :return: A dict with the dois as keys and the int scopus ids as values, for those dois, that are stored
+        """
+        return select_ids_by_column(self.database_access, self.database_name, 'doi', doi_list)
+
+    def delete_multiple(self, scopus_id_list, chunk_size=500):
+        """
+        Deletes the publications with the given ids from the cache.
+
+        :param scopus_id_list: The list of int scopus ids
+        :param chunk_size: The int max amount of ids in the IN clause of one statement
+        :return: void
+        """
+        for chunk_list in chunks(list(map(int, scopus_id_list)), chunk_size):
+            sql = 'DELETE FROM {database} WHERE scopus_id IN ({placeholders})'.format(
+                database=self.database_name,
+                placeholders=placeholders(len(chunk_list))
+            )
+            self.database_access.execute(sql, chunk_list)
 
     def contains(self, publication):
         if publication == '':
             return False
 
         sql = (
-            'SELECT * FROM {database} WHERE scopus_id={scopus_id}'
+            'SELECT scopus_id FROM {database} WHERE scopus_id=%s'
         ).format(
-            database=self.database_name,
-            scopus_id=int(publication)
+            database=self.database_name
         )
 
-        row_list = self.database_access.select(sql)
+        row_list = self.database_access.select(sql, (int(publication), ))
         return len(row_list) > 0
 
+    def select_content_hash(self, scopus_id):
+        """
+        The content hash, that was stored with the publication of the given scopus id the last time it was inserted.
+
+        :param scopus_id: The int scopus id of the publication
+        :return: The string content hash or None, if the publication is not stored or was stored without a hash
+        """
+        sql = (
+            'SELECT content_hash FROM {database} WHERE scopus_id=%s'
+        ).format(
+            database=self.database_name
+        )
+
+        row_list = self.database_access.select(sql, (int(scopus_id), ))
+        if len(row_list) != 0:
+            return row_list[0][0]
+
+    def select_content_hashes(self, scopus_id_list, chunk_size=500):
+        """
+        The content hashes, that were stored with the publications of the given scopus ids.
+
+        :param scopus_id_list: The list of int scopus ids
+        :param chunk_size: The int max amount of ids in the IN clause of one query
+        :return: A dict with the int scopus ids as keys and the content hashes as values. Publications, that are not
+            stored are not part of the dict.
+        """
+        content_hash_dict = {}
+        for chunk_list in chunks(list(map(int, scopus_id_list)), chunk_size):
+            sql = (
+                'SELECT scopus_id, content_hash FROM {database} WHERE scopus_id IN ({placeholders})'
+            ).format(
+                database=self.database_name,
+                placeholders=placeholders(len(chunk_list))
+            )
+
+            row_list = self.database_access.select(sql, chunk_list)
+            for row in row_list:
+                content_hash_dict[int(row[0])] = row[1]
+        return content_hash_dict
+
     def select_all(self):
-        scopus_id_list = self.select_all_ids()
-        publication_list = []
-        for scopus_id in scopus_id_list:
-            publication = self.select(scopus_id)
-            publication_list.append(publication)
-        return publication_list
+        sql = (
+            'SELECT {columns} FROM {database}'
+        ).format(
+            columns=', '.join(PUBLICATION_COLUMNS),
+            database=self.database_name
+        )
+
+        row_list = self.database_access.select(sql)
+        return list(map(publication_from_row, row_list))
+
+    def iter_all(self, fetch_size=None):
+        """
+        A generator over all the publications, which are fetched from the database with a server side cursor in
+        batches of the given size.
+
+        :param fetch_size: The int amount of rows to be fetched at once
+        :return: A generator of ScopusPublications
+        """
+        sql = (
+            'SELECT {columns} FROM {database}'
+        ).format(
+            columns=', '.join(PUBLICATION_COLUMNS),
+            database=self.database_name
+        )
+
+        for row in self.database_access.iter_select(sql, fetch_size=fetch_size):
+            yield publication_from_row(row)
 
     def select_all_ids(self):
         sql = (
@@ -612,167 +2698,168 @@ class ScopusBackupPublicationModel(PublicationPersistencyInterface):
 
     def __init__(self):
 
-        self.database_access = MySQLDatabaseAccess()
+        self.database_access = create_database_access()
         self.database_name = 'publications'
 
     def execute(self, sql):
         return self.database_access.select(sql)
 
     def insert(self, publication):
-        if not isinstance(publication.id, int):
+        if not has_scopus_id(publication):
             return None
-        # Converting all the data so it fits into a database data column
-
-        # Turning the creator ScopusAuthor object into a json string
-        creator_dict = to_dict(publication.creator)
-        creator_json_string = json.dumps(creator_dict).replace('"', "'")
-
-        # Turning the authors list, list of ScopusAuthor objects into a json string
-        author_dict_list = to_dict(publication.authors)
-        authors_json_string = json.dumps(author_dict_list).replace('"', "'")
+        # Converting all the data into the values for the columns and inserting with the upsert of the backend
+        sql = self.database_access.dialect.upsert_sql(self.database_name, PUBLICATION_COLUMNS, ['scopus_id'])
+        self.database_access.execute(sql, publication_row(publication))
+
+    def insert_multiple(self, publication_list):
+        """
+        Inserts all the publications of the list with one bulk upsert.
+
+        :param publication_list: The list of ScopusPublication objects
+        :return: void
+        """
+        publication_list = filter(has_scopus_id, publication_list)
+        row_list = list(map(publication_row, publication_list))
+        if len(row_list) != 0:
+            sql = self.database_access.dialect.upsert_sql(
+                self.database_name,
+                PUBLICATION_COLUMNS,
+                ['scopus_id']
+            )
+            self.database_access.execute_many(sql, row_list)
 
-        # Turning the keywords list and the citations list of str/int into a json object
-        keywords_json_string = json.dumps(publication.keywords).replace('"', "'")
-        citations_json_string = json.dumps(publication.citations).replace('"', "'")
+    def select(self, scopus_id):
 
         sql = (
-            'INSERT INTO '
-            '{database} ('
-            'scopus_id, '
-            'eid, '
-            'doi, '
-            'creator, '
-            'title, '
-            'description, '
-            'journal, '
-            'volume, '
-            'date, '
-            'authors, '
-            'keywords, '
-            'citations ) '
-            'VALUES '
-            '({scopus_id}, '
-            '"{eid}", '
-            '"{doi}", '
-            '"{creator}", '
-            '"{title}", '
-            '"{description}", '
-            '"{journal}", '
-            '"{volume}", '
-            '"{date}", '
-            '"{authors}", '
-            '"{keywords}", '
-            '"{citations}") '
-            'ON DUPLICATE KEY UPDATE '
-            'scopus_id = {scopus_id}, '
-            'eid = "{eid}", '
-            'doi = "{doi}", '
-            'creator = "{creator}", '
-            'title = "{title}", '
-            'description = "{description}", '
-            'journal = "{journal}", '
-            'volume = "{volume}", '
-            'date = "{date}", '
-            'authors = "{authors}", '
-            'keywords = "{keywords}", '
-            'citations = "{citations}";'
+            'SELECT {columns} FROM {database} WHERE scopus_id=%s'
         ).format(
-            database=self.database_name,
-            scopus_id=publication.id,
-            eid=publication.eid,
-            doi=publication.doi,
-            creator=creator_json_string,
-            title=publication.title,
-            description=publication.description,
-            journal=publication.journal,
-            volume=publication.volume,
-            date=publication.date,
-            authors=authors_json_string,
-            keywords=keywords_json_string,
-            citations=citations_json_string
+            columns=', '.join(PUBLICATION_COLUMNS),
+            database=self.database_name
         )
 
-        # Executing the sql on the database
-        self.database_access.execute(sql)
+        row_list = self.database_access.select(sql, (int(scopus_id), ))
 
-    def select(self, scopus_id):
+        if len(row_list) != 0:
+            row = row_list[0]
+            return publication_from_row(row)
+
+    def select_multiple(self, scopus_id_list, chunk_size=500):
+        """
+        Selects all the publications for the given scopus ids with one query per chunk of ids.
+
+        :param scopus_id_list: The list of int scopus ids
+        :param chunk_size: The int max amount of ids in the IN clause of one query
+        :return: A dict with the int scopus ids as keys and the ScopusPublication objects as values. Publications,
+            that are not stored are not part of the dict.
+        """
+        scopus_id_list = list(map(int, scopus_id_list))
+
+        publication_dict = {}
+        for chunk_list in chunks(scopus_id_list, chunk_size):
+            sql = (
+                'SELECT {columns} FROM {database} WHERE scopus_id IN ({placeholders})'
+            ).format(
+                columns=', '.join(PUBLICATION_COLUMNS),
+                database=self.database_name,
+                placeholders=placeholders(len(chunk_list))
+            )
+
+            row_list = self.database_access.select(sql, chunk_list)
+            for row in row_list:
+                publication = publication_from_row(row)
+                publication_dict[int(publication)] = publication
+
+        return publication_dict
+
+    def select_ids_by_eid(self, eid_list):
+        """
+        The scopus ids of the publications with the given eids.
+
+        :param eid_list: The list of string eids
+        :return: A dict with the eids as keys and the int scopus ids as values, for those eids, that are stored
+        """
+        return select_ids_by_column(self.database_access, self.database_name, 'eid', eid_list)
+
+    def select_ids_by_doi(self, doi_list):
+        """
+        The scopus ids of the publications with the given dois.
+
+        :param doi_list: The list of string dois
+        :return: A dict with the dois as keys and the int scopus ids as values, for those dois, that are stored
+        """
+        return select_ids_by_column(self.database_access, self.database_name, 'doi', doi_list)
+
+    def select_content_hash(self, scopus_id):
+        """
+        The content hash, that was stored with the publication of the given scopus id the last time it was inserted.
 
+        :param scopus_id: The int scopus id of the publication
+        :return: The string content hash or None, if the publication is not stored or was stored without a hash
+        """
         sql = (
-            'SELECT '
-            'scopus_id, '
-            'eid, '
-            'doi, '
-            'creator, '
-            'title, '
-            'description, '
-            'journal, '
-            'volume, '
-            'date, '
-            'authors, '
-            'keywords, '
-            'citations '
-            'FROM {database} WHERE scopus_id={id}'
+            'SELECT content_hash FROM {database} WHERE scopus_id=%s'
         ).format(
-            database=self.database_name,
-            id=scopus_id
+            database=self.database_name
         )
 
-        row_list = self.database_access.select(sql)
-
+        row_list = self.database_access.select(sql, (int(scopus_id), ))
         if len(row_list) != 0:
-            row = row_list[0]
-
-            scopus_id = row[0]
-            eid = row[1]
-            doi = row[2]
-            title = row[4]
-            description = row[5]
-            journal = row[6]
-            volume = row[7]
-            date = row[8]
-
-            creator_json_string = row[3].replace("'", '"')
-            creator_dict = json.loads(creator_json_string)
-            creator = from_dict(creator_dict)
-
-            authors_json_string = row[9].replace("'", '"')
-            author_dict_list = json.loads(authors_json_string)
-            author_list = from_dict(author_dict_list)
-
-            keywords_json_string = row[10].replace("'", '"')
-            keywords_list = json.loads(keywords_json_string)
-
-            citations_json_string = row[11].replace("'", '"')
-            citations_list = json.loads(citations_json_string)
-
-            publication = ScopusPublication(
-                scopus_id,
-                eid,
-                doi,
-                title,
-                description,
-                date,
-                creator,
-                author_list,
-                citations_list,
-                keywords_list,
-                journal,
-                volume
+            return row_list[0][0]
+
+    def select_content_hashes(self, scopus_id_list, chunk_size=500):
+        """
+        The content hashes, that were stored with the publications of the given scopus ids.
+
+        :param scopus_id_list: The list of int scopus ids
+        :param chunk_size: The int max amount of ids in the IN clause of one query
+        :return: A dict with the int scopus ids as keys and the content hashes as values. Publications, that are not
+            stored are not part of the dict.
+        """
+        content_hash_dict = {}
+        for chunk_list in chunks(list(map(int, scopus_id_list)), chunk_size):
+            sql = (
+                'SELECT scopus_id, content_hash FROM {database} WHERE scopus_id IN ({placeholders})'
+            ).format(
+                database=self.database_name,
+                placeholders=placeholders(len(chunk_list))
             )
 
-            return publication
+            row_list = self.database_access.select(sql, chunk_list)
+            for row in row_list:
+                content_hash_dict[int(row[0])] = row[1]
+        return content_hash_dict
 
     def save(self):
         self.database_access.save()
 
     def select_all(self):
-        # Todo: Make this to be more efficient by combining into one query
-        scopus_id_list = self.select_all_ids()
-        publication_list = []
-        for scopus_id in scopus_id_list:
-            publication = self.select(scopus_id)
-            publication_list.append(publication)
-        return publication_list
+        sql = (
+            'SELECT {columns} FROM {database}'
+        ).format(
+            columns=', '.join(PUBLICATION_COLUMNS),
+            database=self.database_name
+        )
+
+        row_list = self.database_access.select(sql)
+        return list(map(publication_from_row, row_list))
+
+    def iter_all(self, fetch_size=None):
+        """
+        A generator over all the publications, which are fetched from the database with a server side cursor in
+        batches of the given size.
+
+        :param fetch_size: The int amount of rows to be fetched at once
+        :return: A generator of ScopusPublications
+        """
+        sql = (
+            'SELECT {columns} FROM {database}'
+        ).format(
+            columns=', '.join(PUBLICATION_COLUMNS),
+            database=self.database_name
+        )
+
+        for row in self.database_access.iter_select(sql, fetch_size=fetch_size):
+            yield publication_from_row(row)
 
     def select_all_ids(self):
 
@@ -788,13 +2875,614 @@ class ScopusBackupPublicationModel(PublicationPersistencyInterface):
         return scopus_id_list
 
     def wipe(self):
-        sql = "TRUNCATE publications"
-        self.execute(sql)
+        sql = self.database_access.dialect.truncate_sql(self.database_name)
+        self.database_access.execute(sql)
+        self.database_access.save()
 
 
-class TempPersistentSequenceModel:
+class ScopusPublicationRelationModel:
+    """
+    The model for the optional normalized schema of the cached publications.
+
+    Next to the JSON columns of the publication cache, the relations of the publications are stored in the join
+    tables 'publication_author', 'author_affiliation', 'publication_keyword' and 'citation', which have indexes on both
+    sides, so that questions like "which publications cite X" or "all publications of author Y" can be answered with
+    an index lookup instead of decoding every row of the cache.
+    """
+    def __init__(self):
+
+        self.database_access = create_database_access()
+
+    @staticmethod
+    def _id_or_none(value):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+
+    def insert(self, publication):
+        self.insert_multiple([publication])
+
+    def insert_multiple(self, publication_list):
+        """
+        Replaces the relations of all the given publications with the relations of their current version.
+
+        The rows of the join tables are written with one bulk insert per table. The citation edges are stored in the
+        direction of citing publication -> cited publication.
+
+        :param publication_list: The list of ScopusPublication objects
+        :return: void
+        """
+        publication_list = list(filter(lambda x: self._id_or_none(getattr(x, 'id', None)) is not None,
+                                       publication_list))
+        if len(publication_list) == 0:
+            return
+
+        publication_author_row_list = []
+        author_affiliation_row_list = []
+        publication_keyword_row_list = []
+        citation_row_list = []
+        for publication in publication_list:
+            scopus_id = int(publication)
+
+            for position, author in enumerate(publication.authors):
+                author_id = self._id_or_none(author.id)
+                if author_id is None:
+                    continue
+                publication_author_row_list.append((scopus_id, author_id, position))
+
+                for affiliation in author.affiliations:
+                    affiliation_id = self._id_or_none(affiliation)
+                    if affiliation_id is not None:
+                        author_affiliation_row_list.append((author_id, affiliation_id, scopus_id))
+
+            for keyword in set(publication.keywords):
+                if keyword != '':
+                    publication_keyword_row_list.append((scopus_id, keyword[:255]))
+
+            for citing_id in publication.citations:
+                citing_id = self._id_or_none(citing_id)
+                if citing_id is not None:
+                    citation_row_list.append((citing_id, scopus_id))
+
+        # Deleting the old relations first, so that removed authors, keywords or citations do not remain
+        self.delete_multiple(list(map(int, publication_list)))
+
+        dialect = self.database_access.dialect
+        self.database_access.execute_many(
+            dialect.insert_ignore_sql('publication_author', ['scopus_id', 'author_id', 'position']),
+            publication_author_row_list
+        )
+        self.database_access.execute_many(
+            dialect.insert_ignore_sql('author_affiliation', ['author_id', 'affiliation_id', 'scopus_id']),
+            author_affiliation_row_list
+        )
+        self.database_access.execute_many(
+            dialect.insert_ignore_sql('publication_keyword', ['scopus_id', 'keyword']),
+            publication_keyword_row_list
+        )
+        self.database_access.execute_many(
+            dialect.insert_ignore_sql('citation', ['citing_id', 'cited_id']),
+            citation_row_list
+        )
+
+    def delete_multiple(self, scopus_id_list):
+        """
+        Deletes all the relations of the publications with the given ids. The citation edges pointing to the
+        publications are deleted, as those were written from the citation lists of the publications themselves.
+
+        :param scopus_id_list: The list of int scopus ids
+        :return: void
+        """
+        for chunk_list in chunks(list(map(int, scopus_id_list)), self.database_access.chunk_size):
+            in_string = placeholders(len(chunk_list))
+            self.database_access.execute(
+                'DELETE FROM publication_author WHERE scopus_id IN ({});'.format(in_string), chunk_list
+            )
+            self.database_access.execute(
+                'DELETE FROM author_affiliation WHERE scopus_id IN ({});'.format(in_string), chunk_list
+            )
+            self.database_access.execute(
+                'DELETE FROM publication_keyword WHERE scopus_id IN ({});'.format(in_string), chunk_list
+            )
+        self.delete_citations(scopus_id_list)
+
+    def delete_citations(self, scopus_id_list):
+        """
+        Deletes the citation edges pointing to the publications with the given ids.
+
+        :param scopus_id_list: The list of int scopus ids of the cited publications
+        :return: void
+        """
+        for chunk_list in chunks(list(map(int, scopus_id_list)), self.database_access.chunk_size):
+            self.database_access.execute(
+                'DELETE FROM citation WHERE cited_id IN ({});'.format(placeholders(len(chunk_list))), chunk_list
+            )
+
+    def replace_citations(self, citation_dict):
+        """
+        Replaces the citation edges pointing to the given publications. The old edges are deleted and the new ones
+        inserted as one atomic block, so that a failed insert does not leave the publications without their edges.
+
+        :param citation_dict: A dict with the int scopus ids of the cited publications as keys and the lists of the int
+            scopus ids of the citing publications as values
+        :return: void
+        """
+        if len(citation_dict) == 0:
+            return
+
+        citation_row_list = []
+        for cited_id, citing_id_list in citation_dict.items():
+            for citing_id in set(citing_id_list):
+                citation_row_list.append((int(citing_id), int(cited_id)))
+        with self.database_access.atomic():
+            self.delete_citations(list(citation_dict.keys()))
+            self.database_access.execute_many(
+                self.database_access.dialect.insert_ignore_sql('citation', ['citing_id', 'cited_id']),
+                citation_row_list
+            )
+
+    def select_citation_arrays(self, fetch_size=None):
+        """
+        All the citation edges, fetched in batches with a server side cursor.
+
+        :param fetch_size: The int amount of rows to be fetched at once
+        :return: A tuple of the array of the citing ids and the array of the cited ids
+        """
+        citing_id_array = array.array('q')
+        cited_id_array = array.array('q')
+        for row in self.database_access.iter_select('SELECT citing_id, cited_id FROM citation', fetch_size=fetch_size):
+            citing_id_array.append(int(row[0]))
+            cited_id_array.append(int(row[1]))
+        return citing_id_array, cited_id_array
+
+    def _select_ids(self, sql, parameters):
+        row_list = self.database_access.select(sql, parameters)
+        return list(map(lambda x: int(x[0]), row_list))
+
+    def select_citing_ids(self, scopus_id):
+        """
+        The scopus ids of all the publications, that cite the publication with the given scopus id.
+
+        :param scopus_id: The int scopus id of the cited publication
+        :return: A list of int scopus ids
+        """
+        sql = 'SELECT citing_id FROM citation WHERE cited_id = %s'
+        return self._select_ids(sql, (int(scopus_id), ))
+
+    def select_cited_ids(self, scopus_id):
+        """
+        The scopus ids of all the cached publications, which are cited by the publication with the given scopus id.
+
+        :param scopus_id: The int scopus id of the citing publication
+        :return: A list of int scopus ids
+        """
+        sql = 'SELECT cited_id FROM citation WHERE citing_id = %s'
+        return self._select_ids(sql, (int(scopus_id), ))
+
+    def select_publication_ids_by_author(self, author_id):
+        """
+        The scopus ids of all the cached publications, the author with the given id has contributed to.
+
+        :param author_id: The int author id
+        :return: A list of int scopus ids
+        """
+        sql = 'SELECT scopus_id FROM publication_author WHERE author_id = %s'
+        return self._select_ids(sql, (int(author_id), ))
+
+    def select_publication_ids_by_keyword(self, keyword):
+        """
+        The scopus ids of all the cached publications, that are tagged with the given keyword.
+
+        :param keyword: The string keyword
+        :return: A list of int scopus ids
+        """
+        sql = 'SELECT scopus_id FROM publication_keyword WHERE keyword = %s'
+        return self._select_ids(sql, (keyword, ))
+
+    def select_affiliation_ids_by_author(self, author_id):
+        """
+        The ids of all the affiliations, which the author had in any of the cached publications.
+
+        :param author_id: The int author id
+        :return: A list of int affiliation ids
+        """
+        sql = 'SELECT DISTINCT affiliation_id FROM author_affiliation WHERE author_id = %s'
+        return self._select_ids(sql, (int(author_id), ))
+
+    def select_author_ids_by_affiliation(self, affiliation_id):
+        """
+        The ids of all the authors, which were affiliated with the given affiliation in any of the cached
+        publications.
+
+        :param affiliation_id: The int affiliation id
+        :return: A list of int author ids
+        """
+        sql = 'SELECT DISTINCT author_id FROM author_affiliation WHERE affiliation_id = %s'
+        return self._select_ids(sql, (int(affiliation_id), ))
+
+    def save(self):
+        self.database_access.save()
+
+    def wipe_citations(self):
+        self.database_access.execute(self.database_access.dialect.truncate_sql('citation'))
+        self.database_access.save()
+
+    def wipe(self):
+        for database_name in ['publication_author', 'author_affiliation', 'publication_keyword', 'citation']:
+            self.database_access.execute(self.database_access.dialect.truncate_sql(database_name))
+        self.database_access.save()
+
+
+class LMDBCacheTimestampModel:
+    """
+    Keeps the fetched at and last accessed timestamps of the entries of a LMDB cache in a separate sub database. The
+    values are the two timestamps as 8 byte floats of the seconds since the epoch, with 0 for a missing timestamp.
+    """
+    def __init__(self, environment, database_name):
+        self.environment = environment
+        self.database = self.environment.open_db(database_name)
+
+    @staticmethod
+    def _key(_id):
+        return struct.pack('>Q', int(_id))
+
+    @staticmethod
+    def _encode(fetched_at, last_accessed):
+        return struct.pack(
+            '>dd',
+            fetched_at.timestamp() if fetched_at is not None else 0.0,
+            last_accessed.timestamp() if last_accessed is not None else 0.0
+        )
+
+    @staticmethod
+    def _decode(value):
+        timestamp_list = struct.unpack('>dd', bytes(value))
+        return tuple(map(lambda x: datetime.datetime.fromtimestamp(x) if x != 0.0 else None, timestamp_list))
+
+    def select(self, id_list):
+        timestamp_dict = {}
+        with self.environment.begin(db=self.database) as transaction:
+            for _id in id_list:
+                value = transaction.get(self._key(_id))
+                if value is not None:
+                    timestamp_dict[int(_id)] = self._decode(value)
+        return timestamp_dict
+
+    def _update(self, timestamp_dict, index):
+        # Replacing the timestamp at the given index of the tuple, while keeping the other one
+        with self.environment.begin(write=True, db=self.database) as transaction:
+            for _id, timestamp in timestamp_dict.items():
+                value = transaction.get(self._key(_id))
+                timestamp_list = list(self._decode(value)) if value is not None else [None, None]
+                timestamp_list[index] = timestamp
+                transaction.put(self._key(_id), self._encode(*timestamp_list))
+
+    def update_fetched_at(self, id_list, fetched_at):
+        self._update({int(_id): fetched_at for _id in id_list}, 0)
+
+    def update_last_accessed(self, access_dict):
+        self._update(access_dict, 1)
+
+    def select_refresh_ids(self, expires_before, limit):
+        refresh_list = []
+        with self.environment.begin(db=self.database) as transaction:
+            for key, value in transaction.cursor():
+                fetched_at, last_accessed = self._decode(value)
+                if last_accessed is None:
+                    continue
+                if fetched_at is None or (fetched_at < expires_before and last_accessed > fetched_at):
+                    refresh_list.append((struct.unpack('>Q', key)[0], last_accessed))
+        refresh_list.sort(key=lambda x: x[1], reverse=True)
+        return list(map(lambda x: x[0], refresh_list[:limit]))
+
+    def iter_eviction_ids(self, fetch_size=None):
+        eviction_list = []
+        with self.environment.begin(db=self.database) as transaction:
+            for key, value in transaction.cursor():
+                eviction_list.append((struct.unpack('>Q', key)[0], eviction_key(*self._decode(value))))
+        eviction_list.sort(key=lambda x: x[1])
+        for _id, _ in eviction_list:
+            yield _id
+
+    def delete(self, id_list):
+        with self.environment.begin(write=True, db=self.database) as transaction:
+            for _id in id_list:
+                transaction.delete(self._key(_id))
+
+    def wipe(self):
+        with self.environment.begin(write=True) as transaction:
+            transaction.drop(self.database, delete=False)
+
+
+class ScopusPublicationLMDBCacheModel(PublicationPersistencyInterface):
+    """
+    Publication cache model based on the memory mapped LMDB key value store.
+
+    Other than the pickle cache, the content is not loaded into the RAM as a whole, the publications are read directly
+    from the memory mapped pages of the file with a B-tree lookup per id. Multiple processes can read the cache at the
+    same time. The keys are the 8 byte big endian scopus ids, so that iterating the store yields the ids in order, the
+    values are the utf-8 encoded json dicts of the publications.
+    """
+    def __init__(self):
+        PublicationPersistencyInterface.__init__(self)
+
+        self.environment = LMDBDb.get_instance()
+        self.database = self.environment.open_db(b'publications')
+        # The content hashes are stored separately, so that they can be checked without decoding a whole publication
+        self.hash_database = self.environment.open_db(b'publication_hashes')
+        self.timestamp_model = LMDBCacheTimestampModel(self.environment, b'publication_timestamps')
+        # The secondary indexes, mapping the utf-8 encoded eids and dois to the keys of the publications
+        self.eid_database = self.environment.open_db(b'publication_eids')
+        self.doi_database = self.environment.open_db(b'publication_dois')
+
+        # The publications cached by a version without the secondary indexes are indexed once
+        with self.environment.begin() as transaction:
+            indexed = transaction.stat(self.eid_database)['entries'] + transaction.stat(self.doi_database)['entries']
+            empty = transaction.stat(self.database)['entries'] == 0
+        if indexed == 0 and not empty:
+            self.rebuild_secondary_indexes()
+
+    @staticmethod
+    def _key(scopus_id):
+        return struct.pack('>Q', int(scopus_id))
+
+    def rebuild_secondary_indexes(self):
+        """
+        Creates the eid and doi sub databases anew from all the cached publications.
+
+        :return: void
+        """
+        with self.environment.begin(write=True) as transaction:
+            transaction.drop(self.eid_database, delete=False)
+            transaction.drop(self.doi_database, delete=False)
+            for key, value in transaction.cursor(db=self.database):
+                self._put_secondary(transaction, key, self._decode(value))
+
+    def _put_secondary(self, transaction, key, publication):
+        if publication.eid:
+            transaction.put(publication.eid.encode('utf-8'), key, db=self.eid_database)
+        if publication.doi:
+            transaction.put(publication.doi.encode('utf-8'), key, db=self.doi_database)
+
+    def _delete_secondary(self, transaction, key):
+        # Only removing the index entries, which still point to the given publication
+        value = transaction.get(key, db=self.database)
+        if value is None:
+            return
+        publication = self._decode(value)
+        if publication.eid:
+            transaction.delete(publication.eid.encode('utf-8'), key, db=self.eid_database)
+        if publication.doi:
+            transaction.delete(publication.doi.encode('utf-8'), key, db=self.doi_database)
+
+    @staticmethod
+    def _encode(publication):
+        return json.dumps(publication.to_dict()).encode('utf-8')
+
+    @staticmethod
+    def _decode(value):
+        return ScopusPublication.from_dict(json.loads(bytes(value).decode('utf-8')))
+
+    def insert(self, publication):
+        self.insert_multiple([publication])
+
+    def insert_multiple(self, publication_list):
+        publication_list = list(filter(has_scopus_id, publication_list))
+        # All the publications are written within one write transaction
+        with self.environment.begin(write=True) as transaction:
+            for publication in publication_list:
+                key = self._key(publication.id)
+                # The eid or doi of the publication may have changed since it was cached
+                self._delete_secondary(transaction, key)
+                transaction.put(key, self._encode(publication), db=self.database)
+                transaction.put(key, publication.content_hash.encode('ascii'), db=self.hash_database)
+                self._put_secondary(transaction, key, publication)
+        self.timestamp_model.update_fetched_at(list(map(int, publication_list)), timestamp_now())
+
+    def select_encoded(self, scopus_id):
+        """
+        The encoded json bytes of the publication, without decoding them into a publication object.
+
+        :param scopus_id: The int scopus id
+        :return: The bytes or None, if the publication is not in the cache
+        """
+        with self.environment.begin(db=self.database) as transaction:
+            return transaction.get(self._key(scopus_id))
+
+    def select(self, scopus_id):
+        # With buffers the value is a view onto the mapped page and only copied once, when being decoded
+        with self.environment.begin(db=self.database, buffers=True) as transaction:
+            value = transaction.get(self._key(scopus_id))
+            if value is not None:
+                return self._decode(value)
+
+    def select_multiple(self, scopus_id_list):
+        publication_dict = {}
+        with self.environment.begin(db=self.database, buffers=True) as transaction:
+            for scopus_id in scopus_id_list:
+                value = transaction.get(self._key(scopus_id))
+                if value is not None:
+                    publication_dict[int(scopus_id)] = self._decode(value)
+        return publication_dict
+
+    def select_multiple_entries(self, scopus_id_list):
+        publication_dict = self.select_multiple(scopus_id_list)
+        timestamp_dict = self.timestamp_model.select(publication_dict.keys())
+        entry_dict = {}
+        for scopus_id, publication in publication_dict.items():
+            entry_dict[scopus_id] = (publication, timestamp_dict.get(scopus_id, (None, None))[0])
+        return entry_dict
+
+    def select_all(self):
+        return list(self.iter_all())
+
+    def iter_all(self, fetch_size=None):
+        # The values are decoded straight from the memory map, while the read transaction stays open
+        with self.environment.begin(db=self.database, buffers=True) as transaction:
+            for key, value in transaction.cursor():
+                yield self._decode(value)
+
+    def select_all_ids(self):
+        with self.environment.begin(db=self.database) as transaction:
+            cursor = transaction.cursor()
+            return list(map(lambda x: struct.unpack('>Q', x)[0], cursor.iternext(keys=True, values=False)))
+
+    def delete_multiple(self, scopus_id_list):
+        with self.environment.begin(write=True) as transaction:
+            for scopus_id in scopus_id_list:
+                key = self._key(scopus_id)
+                self._delete_secondary(transaction, key)
+                transaction.delete(key, db=self.database)
+                transaction.delete(key, db=self.hash_database)
+        self.timestamp_model.delete(scopus_id_list)
+
+    def _select_ids(self, database, value_list):
+        id_dict = {}
+        with self.environment.begin(db=database) as transaction:
+            for value in value_list:
+                if value is None or value == '':
+                    continue
+                key = transaction.get(value.encode('utf-8'))
+                if key is not None:
+                    id_dict[value] = struct.unpack('>Q', key)[0]
+        return id_dict
+
+    def select_ids_by_eid(self, eid_list):
+        return self._select_ids(self.eid_database, eid_list)
+
+    def select_ids_by_doi(self, doi_list):
+        return self._select_ids(self.doi_database, doi_list)
+
+    def contains(self, publication):
+        if publication == '':
+            return False
+        with self.environment.begin(db=self.hash_database) as transaction:
+            return transaction.get(self._key(int(publication))) is not None
+
+    def select_content_hash(self, scopus_id):
+        with self.environment.begin(db=self.hash_database) as transaction:
+            value = transaction.get(self._key(scopus_id))
+            if value is not None:
+                return value.decode('ascii')
+
+    def select_content_hashes(self, scopus_id_list):
+        content_hash_dict = {}
+        with self.environment.begin(db=self.hash_database) as transaction:
+            for scopus_id in scopus_id_list:
+                value = transaction.get(self._key(scopus_id))
+                if value is not None:
+                    content_hash_dict[int(scopus_id)] = value.decode('ascii')
+        return content_hash_dict
+
+    def save(self):
+        self.environment.sync()
 
-    def __init__(self, id, folder_path, name_function=None):
+    def wipe(self):
+        with self.environment.begin(write=True) as transaction:
+            transaction.drop(self.database, delete=False)
+            transaction.drop(self.hash_database, delete=False)
+            transaction.drop(self.eid_database, delete=False)
+            transaction.drop(self.doi_database, delete=False)
+        self.timestamp_model.wipe()
+
+
+class ScopusAuthorLMDBCacheModel(AuthorProfilePersistencyInterface):
+    """
+    Author profile cache model based on the memory mapped LMDB key value store.
+
+    The keys are the 8 byte big endian author ids, the values are the utf-8 encoded json lists of the values in the
+    order of the AUTHOR_COLUMNS.
+    """
+    def __init__(self):
+        AuthorProfilePersistencyInterface.__init__(self)
+
+        self.environment = LMDBDb.get_instance()
+        self.database = self.environment.open_db(b'authors')
+        self.timestamp_model = LMDBCacheTimestampModel(self.environment, b'author_timestamps')
+
+    @staticmethod
+    def _key(author_id):
+        return struct.pack('>Q', int(author_id))
+
+    @staticmethod
+    def _encode(author_profile):
+        value_list = [
+            int(author_profile.id),
+            author_profile.first_name,
+            author_profile.last_name,
+            author_profile.h_index,
+            author_profile.citation_count,
+            author_profile.document_count,
+            author_profile.publications
+        ]
+        return json.dumps(value_list).encode('utf-8')
+
+    @staticmethod
+    def _decode(value):
+        value_list = json.loads(bytes(value).decode('utf-8'))
+        return ScopusAuthorProfile(*value_list)
+
+    def insert(self, author_profile):
+        self.insert_multiple([author_profile])
+
+    def insert_multiple(self, author_profile_list):
+        with self.environment.begin(write=True, db=self.database) as transaction:
+            for author_profile in author_profile_list:
+                transaction.put(self._key(author_profile.id), self._encode(author_profile))
+        self.timestamp_model.update_fetched_at(list(map(int, author_profile_list)), timestamp_now())
+
+    def select(self, author_id):
+        with self.environment.begin(db=self.database, buffers=True) as transaction:
+            value = transaction.get(self._key(author_id))
+            if value is not None:
+                return self._decode(value)
+
+    def select_entry(self, author_id):
+        author_profile = self.select(author_id)
+        if author_profile is not None:
+            return author_profile, self.timestamp_model.select([author_id]).get(int(author_id), (None, None))[0]
+
+    def select_all(self):
+        return list(self.iter_all())
+
+    def iter_all(self, fetch_size=None):
+        with self.environment.begin(db=self.database, buffers=True) as transaction:
+            for key, value in transaction.cursor():
+                yield self._decode(value)
+
+    def select_all_ids(self):
+        with self.environment.begin(db=self.database) as transaction:
+            cursor = transaction.cursor()
+            return list(map(lambda x: struct.unpack('>Q', x)[0], cursor.iternext(keys=True, values=False)))
+
+    def contains(self, author):
+        with self.environment.begin(db=self.database) as transaction:
+            return transaction.get(self._key(int(author))) is not None
+
+    def save(self):
+        self.environment.sync()
+
+    def wipe(self):
+        with self.environment.begin(write=True) as transaction:
+            transaction.drop(self.database, delete=False)
+        self.timestamp_model.wipe()
+
+
+class TempPersistentSequenceModel:
+    """
+    A sequence of objects, which is persistently stored in the temp folder, so that the progress of long running
+    operations is not lost in case of a crash.
+
+    The objects are appended to a single journal file "{id}.journal" in the folder. Each record in the journal is the
+    4 byte length and the 4 byte crc32 checksum of the pickled object followed by the pickled bytes. The journal is only
+    forced onto the disk after every "sync_interval" appends and on flush/close, a record, that was only partially
+    written during a crash is detected by its length or checksum and cut off on the next load. Iterating the sequence
+    reads the objects lazily from the file, so they are never all kept in memory.
+    """
+    HEADER = struct.Struct('>II')
+
+    def __init__(self, id, folder_path, name_function=None, sync_interval=100):
         # This is the id of the model, which enables to identify all the files which belong to one model, which enables
         # the possibility of multiple models using the same folder for storage
         self.id = id
@@ -802,84 +3490,316 @@ class TempPersistentSequenceModel:
         # The path to the folder, which is supposed to contain all the files for the model
         self.path_string = folder_path
 
-        # The ath to the info file. The info file contains the info about the current state of the counter for the model
-        # of the specific id and the list of paths belonging to that model
+        # The path to the journal file, which contains all the objects of the sequence
+        self.journal_path_string = '{}/{}.journal'.format(self.path_string, self.id)
+
+        # The path to the info file of the old storage format, in which every object was pickled into its own file.
+        # Those files are merged into the journal on load
         self.info_path_string = '{}/_info_{}.json'.format(self.path_string, self.id)
 
-        # Stores the max amount of items in the sequence, used for creating the file names for the files which contain
-        # the new objects
+        # The amount of objects in the sequence
         self.index_counter = 0
 
-        # The keys are the path strings to the files, which contain the binary data to the objects and the values are
-        # the actual values
-        self.content = {}
+        # The amount of appends after which the journal is flushed and synced to the disk
+        self.sync_interval = sync_interval
+        self.unsynced_counter = 0
+        self.file = None
 
+        # The name function creates the key of an object. When compacting, only the last object for every key is kept
         if name_function is None:
             self.name_function = lambda x: str(x.__class__).replace('<class', '').replace("'", '').replace('>', '')
         else:
             self.name_function = name_function
 
     def load(self):
-        # Loading the info file, which will create a entry for each file path in the content dict with the dummy value
-        # None
-        self.load_info()
-
-        for path in self.content.keys():
-            # Loading the objects
-            self.load_object(path)
+        """
+        Opens the journal for appending. Merges the files of the old storage format into the journal and cuts off a
+        partially written record at the end of the journal, if there is one.
 
-    def load_info(self):
+        :return: void
+        """
         if os.path.exists(self.info_path_string):
-            with open(self.info_path_string, mode='r') as file:
-                info_dict = json.load(file)
-
-            # Assigning the saved index counter
-            self.index_counter = info_dict['counter']
-            # Adding a dummy entry for every file path listed in the info file
-            for path in info_dict['paths']:
-                self.content[path] = None
+            self.migrate()
 
-    def load_object(self, path):
-        with open(path, mode='rb') as file:
-            obj = pickle.load(file)
-            self.content[path] = obj
-
-    def save_info(self):
-        # Creating the info dict
-        info_dict = {
-            'counter': self.index_counter,
-            'paths': list(self.content.keys())
-        }
+        # Counting the valid records and finding the end of the last one
+        self.index_counter = 0
+        end_position = 0
+        for end_position, _ in self._iter_records(decode=False):
+            self.index_counter += 1
 
-        # Actually saving that dict as a json to the file
-        with open(self.info_path_string, mode='w+') as file:
-            json.dump(info_dict, file)
+        if os.path.exists(self.journal_path_string) and os.path.getsize(self.journal_path_string) != end_position:
+            with open(self.journal_path_string, mode='r+b') as file:
+                file.truncate(end_position)
 
-    def save_object(self, obj, path):
-        # Actually creating the file and saving the object as pickled data into it
-        with open(path, mode='wb+') as file:
-            pickle.dump(obj, file)
+        self.file = open(self.journal_path_string, mode='ab')
 
-    def create_path(self, obj):
-        # The file name for saving an object consists of the class name of the object saved, the index counter to show
-        # which part of the sequence it is and the id of the model.
-        object_file_name = self.name_function(obj)
-        file_name_string = '{}_{}_{}.pkl'.format(str(self.id), str(self.index_counter), object_file_name)
+    def migrate(self):
+        # Appending the objects of the old single files to the journal in the order of the info file and then
+        # deleting the old files
+        with open(self.info_path_string, mode='r') as file:
+            info_dict = json.load(file)
 
-        file_path_string = '{}/{}'.format(self.path_string, file_name_string)
-        return file_path_string
+        with open(self.journal_path_string, mode='ab') as journal_file:
+            for path in info_dict['paths']:
+                with open(path, mode='rb') as file:
+                    journal_file.write(self._record(file.read()))
+            journal_file.flush()
+            os.fsync(journal_file.fileno())
+
+        for path in info_dict['paths']:
+            os.remove(path)
+        os.remove(self.info_path_string)
+
+    def _record(self, data):
+        return self.HEADER.pack(len(data), zlib.crc32(data)) + data
+
+    def _iter_records(self, decode=True):
+        # Generator for the tuples of the end position of a record and the unpickled object of the record (or the raw
+        # bytes, if not decoding). Stops at the first record, which was not completely written
+        if not os.path.exists(self.journal_path_string):
+            return
+
+        with open(self.journal_path_string, mode='rb') as file:
+            while True:
+                header = file.read(self.HEADER.size)
+                if len(header) < self.HEADER.size:
+                    break
+                length, checksum = self.HEADER.unpack(header)
+                data = file.read(length)
+                if len(data) < length or zlib.crc32(data) != checksum:
+                    break
+                yield file.tell(), pickle.loads(data) if decode else data
 
     def append(self, obj):
-        # Incrementing the counter for the saved files
+        """
+        Appends the object to the end of the journal.
+
+        :param obj: Any object, that can be pickled
+        :return: void
+        """
+        if self.file is None:
+            self.load()
+
+        self.file.write(self._record(pickle.dumps(obj)))
         self.index_counter += 1
 
-        # Creating the path for the file and saving the key value tuple with path and object in the internal dict
-        file_path_string = self.create_path(obj)
-        self.content[file_path_string] = obj
+        # Only syncing to the disk once for a batch of appends
+        self.unsynced_counter += 1
+        if self.unsynced_counter >= self.sync_interval:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes all the appended objects onto the disk.
+
+        :return: void
+        """
+        if self.file is not None:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+        self.unsynced_counter = 0
+
+    def close(self):
+        self.flush()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def compact(self):
+        """
+        Rewrites the journal, so that it only contains the last object for every key given by the name function. The
+        new journal is written into a separate file, which then replaces the old one, so that a crash during the
+        compaction does not lose anything.
+
+        :return: void
+        """
+        is_open = self.file is not None
+        self.close()
+
+        # Finding the position of the last record for every key
+        position_dict = {}
+        for index, obj in enumerate(self):
+            position_dict[self.name_function(obj)] = index
+        keep_index_set = set(position_dict.values())
+
+        compact_path_string = self.journal_path_string + '.compact'
+        with open(compact_path_string, mode='wb') as file:
+            for index, obj in enumerate(self):
+                if index in keep_index_set:
+                    file.write(self._record(pickle.dumps(obj)))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(compact_path_string, self.journal_path_string)
+        self.index_counter = len(keep_index_set)
+
+        if is_open:
+            self.load()
 
-        # Saving the object into a file and saving the new info data
-        self.save_object(obj, file_path_string)
-        self.save_info()
+    def wipe(self):
+        self.close()
+        if os.path.exists(self.journal_path_string):
+            os.remove(self.journal_path_string)
+        self.index_counter = 0
+
+    def __len__(self):
+        return self.index_counter
 
     def __iter__(self):
-        return self.content.values().__iter__()
+        # Flushing the buffer first, so that the objects appended by this process are also read
+        if self.file is not None:
+            self.file.flush()
+        return map(lambda x: x[1], self._iter_records())
+
+
+class ScopusCrawlJournal:
+    """
+    The persistent record of a bulk crawl over a set of ids: the ids planned to be crawled, the ids completed with
+    their optional results and the ids, whose crawl has failed, with the amount of failed attempts.
+
+    Every change is appended as a record to a TempPersistentSequenceModel, from which the state is replayed on load.
+    This way a crawl, that stopped with a crash or a lost connection, can be resumed without finding out again, which
+    ids are left. The ids can be any hashable objects, that can be pickled.
+    """
+    PLAN = 'plan'
+    COMPLETE = 'complete'
+    FAIL = 'fail'
+
+    def __init__(self, name, folder_path, sync_interval=100):
+        self.name = name
+        self.sequence_model = TempPersistentSequenceModel(
+            'crawl_{}'.format(name),
+            folder_path,
+            sync_interval=sync_interval
+        )
+
+        self.planned_list = []
+        self.planned_set = set()
+        self.result_dict = {}
+        # The tuples of the amount of failed attempts and the last error message, with the ids as keys
+        self.failure_dict = {}
+
+        self.loaded = False
+        self.lock = threading.RLock()
+
+    def load(self):
+        """
+        Replays the state of the crawl from the journal.
+
+        :return: void
+        """
+        with self.lock:
+            self.planned_list = []
+            self.planned_set = set()
+            self.result_dict = {}
+            self.failure_dict = {}
+
+            self.sequence_model.close()
+            self.sequence_model.load()
+            for record in self.sequence_model:
+                self._apply(record)
+            self.loaded = True
+
+    def _apply(self, record):
+        kind = record[0]
+        if kind == self.PLAN:
+            for _id in record[1]:
+                if _id not in self.planned_set:
+                    self.planned_set.add(_id)
+                    self.planned_list.append(_id)
+        elif kind == self.COMPLETE:
+            self.result_dict[record[1]] = record[2]
+            self.failure_dict.pop(record[1], None)
+        elif kind == self.FAIL:
+            attempts = self.failure_dict.get(record[1], (0, None))[0]
+            self.failure_dict[record[1]] = (attempts + 1, record[2])
+
+    def _append(self, record):
+        with self.lock:
+            if not self.loaded:
+                self.load()
+            self.sequence_model.append(record)
+            self._apply(record)
+
+    def plan(self, id_list):
+        """
+        Adds the given ids to the ids to be crawled.
+
+        :param id_list: The list of ids
+        :return: The list of those ids, which were not planned before
+        """
+        with self.lock:
+            if not self.loaded:
+                self.load()
+            new_id_list = []
+            for _id in id_list:
+                if _id not in self.planned_set and _id not in new_id_list:
+                    new_id_list.append(_id)
+            if len(new_id_list) != 0:
+                self._append((self.PLAN, new_id_list))
+            return new_id_list
+
+    def complete(self, _id, result=None):
+        self._append((self.COMPLETE, _id, result))
+
+    def fail(self, _id, error_string):
+        self._append((self.FAIL, _id, error_string))
+
+    def planned_ids(self):
+        with self.lock:
+            return list(self.planned_list)
+
+    def pending_ids(self):
+        """
+        The planned ids, which have neither been completed nor have failed yet.
+
+        :return: The list of ids in the order they were planned in
+        """
+        with self.lock:
+            return list(filter(
+                lambda x: x not in self.result_dict.keys() and x not in self.failure_dict.keys(),
+                self.planned_list
+            ))
+
+    def failed_ids(self):
+        """
+        The planned ids, whose last attempt has failed.
+
+        :return: The list of ids in the order they were planned in
+        """
+        with self.lock:
+            return list(filter(lambda x: x in self.failure_dict.keys(), self.planned_list))
+
+    def is_completed(self, _id):
+        return _id in self.result_dict.keys()
+
+    def is_failed(self, _id):
+        return _id in self.failure_dict.keys()
+
+    def is_finished(self):
+        with self.lock:
+            return len(self.result_dict) == len(self.planned_set)
+
+    @property
+    def results(self):
+        with self.lock:
+            return dict(self.result_dict)
+
+    @property
+    def failures(self):
+        with self.lock:
+            return dict(self.failure_dict)
+
+    def flush(self):
+        self.sequence_model.flush()
+
+    def close(self):
+        self.sequence_model.close()
+
+    def wipe(self):
+        with self.lock:
+            self.sequence_model.wipe()
+            self.planned_list = []
+            self.planned_set = set()
+            self.result_dict = {}
+            self.failure_dict = {}
+            self.loaded = False
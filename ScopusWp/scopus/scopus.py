@@ -2,6 +2,8 @@ from ScopusWp.scopus.data import ScopusPublication, ScopusAuthor, ScopusAffiliat
 
 import ScopusWp.config as cfg
 
+from ScopusWp.progress import ProgressReporter
+
 import logging
 import urllib.parse as urlparse
 import requests
@@ -11,6 +13,25 @@ import os
 import pprint
 
 
+def request_get(url, headers):
+    """
+    Sends a GET request to scopus, while reporting the requests in flight and the remaining quota of the API key to the
+    ProgressReporter.
+
+    :param url: The string url
+    :param headers: The dict of the request headers
+    :return: The requests Response
+    """
+    reporter = ProgressReporter.get_instance()
+    reporter.request_started()
+    response = None
+    try:
+        response = requests.get(url, headers=headers)
+        return response
+    finally:
+        reporter.request_finished(response)
+
+
 class ScopusBaseController:
     """
     Abstract base class for all the specific scopus controllers.
@@ -47,7 +68,7 @@ class ScopusBaseController:
         url = '{}?{}'.format(url_base, urlparse.urlencode(query))
         print(url)
 
-        response = requests.get(url, headers=self.headers)
+        response = request_get(url, self.headers)
         return response
 
     def _get_scopus_id_list(self, search_entry_list):
@@ -149,7 +170,7 @@ class ScopusAffiliationController(ScopusBaseController):
         url_base = os.path.join(self.url_base, 'affiliation/affiliation_id', str(affiliation_id))
         url = '{}?{}'.format(url_base, urlparse.urlencode(query))
         # Sending the url request and fetching the response
-        response = requests.get(url, headers=self.headers)
+        response = request_get(url, self.headers)
 
         return response
 
@@ -319,7 +340,7 @@ class ScopusAuthorController(ScopusBaseController):
         url_base = os.path.join(self.url_base, 'author/author_id', str(author_id))
         url = '{}?{}'.format(url_base, urlparse.urlencode(query))
         # Sending the url request and fetching the response
-        response = requests.get(url, headers=self.headers)
+        response = request_get(url, self.headers)
 
         return response
 
@@ -478,7 +499,7 @@ class ScopusPublicationController(ScopusBaseController):
         print(url)
 
         # Sending the url request and fetching the response
-        response = requests.get(url, headers=self.headers)
+        response = request_get(url, self.headers)
 
         return response
 
@@ -846,6 +867,17 @@ class ScopusController:
 
         return author_profile_list
 
+    def get_author_affiliations(self, author_id):
+        """
+        The ids of all the affiliations of the author in the own publications, taken from the search results for the
+        publications of the author.
+
+        :param author_id: The int author id
+        :return: The list of string affiliation ids
+        """
+        author_affiliation_fetcher = ScopusAuthorAffiliationFetcher(author_id)
+        return author_affiliation_fetcher.fetch()
+
     def get_author_publications(self, author_profile):
         """
         A list of publication objects for the publications the given author has contributed to.
@@ -912,6 +944,9 @@ class ScopusController:
 
 class ScopusAuthorPublicationFetcher:
 
+    # The view of the search results. The standard view does not contain the authors of the publications
+    VIEW = 'STANDARD'
+
     def __init__(self, author_id):
         self.author_id = author_id
 
@@ -929,7 +964,12 @@ class ScopusAuthorPublicationFetcher:
 
         print(self.headers)
 
-    def fetch(self):
+    def fetch_entries(self):
+        """
+        Requests all the pages of the search for the publications of the author.
+
+        :return: The list of the entry dicts of all the search results
+        """
         entry_dict_list = []
 
         # Requesting the publication search
@@ -949,10 +989,15 @@ class ScopusAuthorPublicationFetcher:
 
             # The loop continues requesting if the total amount of search results is greater
             # than the current start index plus the entries acquired in the current request
-            requesting = int(total_results) > (start_index + len(_entry_dict_list))
+            requesting = int(total_results) > (start_index + len(_entry_dict_list)) and int(items_per_page) > 0
 
             start_index += int(items_per_page)
 
+        return entry_dict_list
+
+    def fetch(self):
+        entry_dict_list = self.fetch_entries()
+
         # Turning the list of entry dicts into a list of publication ids
         scopus_id_list = []
         for entry_dict in entry_dict_list:
@@ -980,7 +1025,7 @@ class ScopusAuthorPublicationFetcher:
 
         query_dict = {
             'query': search_query_string,
-            'view': 'STANDARD',
+            'view': self.VIEW,
             'start': start_index
         }
 
@@ -993,7 +1038,7 @@ class ScopusAuthorPublicationFetcher:
         )
 
         print(url)
-        response = requests.get(url, headers=self.headers)
+        response = request_get(url, self.headers)
         return response
 
     @staticmethod
@@ -1014,6 +1059,41 @@ class ScopusAuthorPublicationFetcher:
         return entry_dict_list, total_results, items_per_page
 
 
+class ScopusAuthorAffiliationFetcher(ScopusAuthorPublicationFetcher):
+    """
+    Collects the ids of all the affiliations, which an author had in any of the own publications, straight from the
+    search results for the publications of the author.
+
+    In the complete view, every search result also lists the authors of the publication with their affiliation ids,
+    so that neither the author profile nor the abstracts of the publications have to be requested. One page of the
+    complete view holds 25 results.
+    """
+    VIEW = 'COMPLETE'
+
+    def fetch(self):
+        """
+        Requests the search results for the publications of the author.
+
+        :return: The list of the string affiliation ids without duplicates, in the order of their first occurrence
+        """
+        affiliation_id_list = []
+        for entry_dict in self.fetch_entries():
+            for author_dict in entry_dict.get('author', []):
+                if str(author_dict.get('authid', '')) != str(self.author_id):
+                    continue
+
+                # With only one affiliation, the value is the affiliation dict itself instead of a list
+                affiliation_dict_list = author_dict.get('afid', [])
+                if isinstance(affiliation_dict_list, dict):
+                    affiliation_dict_list = [affiliation_dict_list]
+                for affiliation_dict in affiliation_dict_list:
+                    affiliation_id = affiliation_dict.get('$', '')
+                    if affiliation_id != '' and affiliation_id not in affiliation_id_list:
+                        affiliation_id_list.append(affiliation_id)
+
+        return affiliation_id_list
+
+
 class ScopusPublicationProcessor:
 
     def __init__(self):
@@ -0,0 +1,863 @@
+from ScopusWp.scopus.data import ScopusPublication, ScopusAuthor, ScopusAuthorProfile
+
+from ScopusWp.scopus.persistency import ScopusCacheController, ScopusBackupController
+from ScopusWp.scopus.persistency import ScopusPublicationDatabaseCacheModel, ScopusAuthorDatabaseCacheModel
+from ScopusWp.scopus.persistency import ScopusPublicationRelationModel
+from ScopusWp.scopus.persistency import ScopusPublicationLMDBCacheModel, ScopusAuthorLMDBCacheModel
+from ScopusWp.scopus.persistency import TempPersistentSequenceModel, ScopusCrawlJournal
+from ScopusWp.scopus.persistency import CACHE_MISS, json_column
+from ScopusWp.scopus.persistency import IdIndex, ScopusCacheSnapshotController
+from ScopusWp.scopus.persistency import CitationGraph, ScopusCitationGraphController
+
+from ScopusWp.database import SQLiteDb, SQLiteDatabaseAccess, LMDBDb, WriteBehindQueue
+from ScopusWp.config import Config
+
+import configparser
+import json
+import io
+import datetime
+import threading
+import sqlite3
+import time
+import pytest
+
+
+#######################################
+# THE FIXTURES FOR THE SQLITE BACKEND #
+#######################################
+
+
+@pytest.fixture
+def sqlite_config(tmp_path):
+    # Replacing the config singleton with a config, that uses a fresh embedded sqlite database
+    config = configparser.ConfigParser()
+    config.read_dict({
+        'DATABASE': {'backend': 'sqlite'},
+        'SQLITE': {'path': str(tmp_path / 'scopus.db')},
+        'MYSQL': {
+            'publication_cache_table': 'publication_cache',
+            'author_cache_table': 'author_cache',
+            'comment_reference_table': 'comment_reference',
+            'post_reference_table': 'reference',
+            'bulk_chunk_size': '2'
+        }
+    })
+    previous_config = Config._instance
+    Config._instance = config
+    SQLiteDb._instance = None
+    yield config
+    SQLiteDb._instance.close()
+    SQLiteDb._instance = None
+    Config._instance = previous_config
+
+
+@pytest.fixture
+def lmdb_config(tmp_path):
+    pytest.importorskip('lmdb')
+    config = configparser.ConfigParser()
+    config.read_dict({
+        'LMDB': {'path': str(tmp_path / 'cache.lmdb'), 'map_size': str(64 * 1024 ** 2)}
+    })
+    previous_config = Config._instance
+    Config._instance = config
+    LMDBDb._instance = None
+    yield config
+    LMDBDb._instance.close()
+    LMDBDb._instance = None
+    Config._instance = previous_config
+
+
+def _scopus_publication(scopus_id, title='Sample publication title', citation_list=None):
+    if citation_list is None:
+        citation_list = [345, 897]
+    scopus_publication = ScopusPublication(
+        scopus_id,
+        '2-s2.0-{}'.format(scopus_id),
+        '10.1000/{}'.format(scopus_id),
+        title,
+        'Sample publication description',
+        '2017-12-12',
+        ScopusAuthor('Max', 'Mustermann', 1, [12]),
+        [
+            ScopusAuthor('Max', 'Mustermann', 1, [12]),
+            ScopusAuthor('Karl', 'Weber', 3, [56, 57])
+        ],
+        citation_list,
+        ['keyword', 'apple'],
+        'nature',
+        '12'
+    )
+    return scopus_publication
+
+
+@pytest.fixture
+def cache_controller(sqlite_config):
+    cache_controller = ScopusCacheController(
+        ScopusPublicationDatabaseCacheModel,
+        ScopusAuthorDatabaseCacheModel,
+        ScopusPublicationRelationModel
+    )
+    return cache_controller
+
+
+##########################
+# THE CACHE/BACKUP TESTS #
+##########################
+
+
+def test_cache_publication_roundtrip(cache_controller):
+    publication = _scopus_publication(100)
+    assert cache_controller.insert_publication(publication)
+    cached_publication = cache_controller.select_publication(100)
+    assert int(cached_publication) == 100
+    assert cached_publication.title == publication.title
+    assert cached_publication.content_hash == publication.content_hash
+    # Inserting the same content a second time is skipped
+    assert not cache_controller.insert_publication(publication)
+
+
+def test_cache_bulk_insert_and_lookup(cache_controller):
+    publication_list = list(map(_scopus_publication, [101, 102, 103, 104, 105]))
+    changed_publication_list = cache_controller.insert_multiple_publications(publication_list)
+    assert len(changed_publication_list) == 5
+    assert sorted(cache_controller.select_all_publication_ids()) == [101, 102, 103, 104, 105]
+    assert len(cache_controller.select_all_publications()) == 5
+
+    # Only the changed publication is written again
+    publication_list[0] = _scopus_publication(101, title='Changed title')
+    changed_publication_list = cache_controller.insert_multiple_publications(publication_list)
+    assert list(map(int, changed_publication_list)) == [101]
+
+    publication_dict, miss_scopus_id_list = cache_controller.lookup_multiple_publications([101, 999, 103])
+    assert sorted(publication_dict.keys()) == [101, 103]
+    assert miss_scopus_id_list == [999]
+    assert cache_controller.lookup_publication(999) is CACHE_MISS
+    assert cache_controller.select_multiple_publications([103, 999])[1] is None
+
+
+def test_cache_author_profiles(cache_controller):
+    author_profile_list = [
+        ScopusAuthorProfile(1, 'Max', 'Mustermann', 13, 7, 2, [345, 346]),
+        ScopusAuthorProfile(2, 'Karl', 'Weber', 2, 1, 1, [347])
+    ]
+    cache_controller.insert_multiple_author_profiles(author_profile_list)
+    author_profile = cache_controller.lookup_author_profile(1)
+    assert author_profile.publications == [345, 346]
+    assert cache_controller.lookup_author_profile(3) is CACHE_MISS
+    assert len(cache_controller.select_all_author_profiles()) == 2
+
+
+def test_cache_relations(cache_controller):
+    cache_controller.insert_multiple_publications([
+        _scopus_publication(201, citation_list=[202]),
+        _scopus_publication(202, citation_list=[])
+    ])
+    assert list(map(int, cache_controller.select_citing_publications(201))) == [202]
+    assert list(map(int, cache_controller.select_cited_publications(202))) == [201]
+    assert sorted(map(int, cache_controller.select_author_publications(3))) == [201, 202]
+    assert len(cache_controller.select_keyword_publications('apple')) == 2
+    assert sorted(cache_controller.select_author_affiliation_ids(3)) == [56, 57]
+
+
+def test_backup_insert(sqlite_config):
+    backup_controller = ScopusBackupController()
+    publication = _scopus_publication(301)
+    assert backup_controller.insert_publication(publication)
+    assert not backup_controller.insert_publication(publication)
+    assert int(backup_controller.select_publication(301)) == 301
+
+    # A numeric string id is backed up just like it is cached, only publications without an id are skipped
+    publication = _scopus_publication('302')
+    assert backup_controller.publication_changed(publication)
+    assert backup_controller.insert_multiple_publications([publication, _scopus_publication('')]) == [publication]
+    assert not backup_controller.publication_changed(publication)
+    assert int(backup_controller.select_publication(302)) == 302
+    backup_controller.wipe()
+    assert backup_controller.select_all_publications() == []
+
+
+def test_lmdb_cache(lmdb_config):
+    cache_controller = ScopusCacheController(ScopusPublicationLMDBCacheModel, ScopusAuthorLMDBCacheModel)
+    cache_controller.insert_multiple_publications(list(map(_scopus_publication, [402, 401])))
+    assert cache_controller.select_all_publication_ids() == [401, 402]
+    assert cache_controller.select_publication(401).title == 'Sample publication title'
+    assert not cache_controller.insert_publication(_scopus_publication(401))
+    assert cache_controller.lookup_publication(403) is CACHE_MISS
+
+    # The secondary indexes of the model follow the deletions
+    assert int(cache_controller.select_by_eid('2-s2.0-402')) == 402
+    cache_controller.publication_cache_model.delete_multiple([402])
+    assert cache_controller.publication_cache_model.select_ids_by_doi(['10.1000/401', '10.1000/402']) == {
+        '10.1000/401': 401
+    }
+    cache_controller.insert_publication(_scopus_publication(402))
+
+    # A changed doi replaces the old entry of the index
+    model = cache_controller.publication_cache_model
+    publication = _scopus_publication(401)
+    publication.doi = '10.1000/changed'
+    model.insert(publication)
+    assert model.select_ids_by_doi(['10.1000/401', '10.1000/changed']) == {'10.1000/changed': 401}
+
+    # The publications cached without the secondary indexes are indexed, once the model is opened
+    with model.environment.begin(write=True) as transaction:
+        transaction.drop(model.eid_database, delete=False)
+        transaction.drop(model.doi_database, delete=False)
+    reopened_model = ScopusPublicationLMDBCacheModel()
+    assert reopened_model.select_ids_by_eid(['2-s2.0-401']) == {'2-s2.0-401': 401}
+    assert reopened_model.select_ids_by_doi(['10.1000/changed']) == {'10.1000/changed': 401}
+
+    cache_controller.insert_author_profile(ScopusAuthorProfile(1, 'Max', 'Mustermann', 13, 7, 2, [401, 402]))
+    assert cache_controller.select_author_profile(1).publications == [401, 402]
+    assert cache_controller.contains_author_profile(1)
+
+    cache_controller.wipe()
+    assert cache_controller.select_all_publications() == []
+
+
+def test_cache_lru_tier(sqlite_config):
+    cache_controller = ScopusCacheController(
+        ScopusPublicationDatabaseCacheModel,
+        ScopusAuthorDatabaseCacheModel,
+        lru_size=2
+    )
+    cache_controller.insert_multiple_publications(list(map(_scopus_publication, [201, 202, 203])))
+    # Only the two most recently written publications are kept in memory, the first is read from the database
+    assert len(cache_controller.publication_lru) == 2
+    assert 201 not in cache_controller.publication_lru
+    assert int(cache_controller.select_publication(201)) == 201
+    assert 201 in cache_controller.publication_lru
+    assert int(cache_controller.select_publication(201)) == 201
+
+    statistics = cache_controller.statistics['publications']
+    assert statistics['hits'] == 1
+    assert statistics['misses'] == 1
+
+    cache_controller.wipe()
+    assert len(cache_controller.publication_lru) == 0
+    assert cache_controller.lookup_publication(201) is CACHE_MISS
+
+
+def test_database_access_unit_of_work(sqlite_config):
+    sqlite_config.read_dict({'DATABASE': {'commit_interval': '3', 'commit_seconds': '3600'}})
+    cache_model = ScopusPublicationDatabaseCacheModel()
+    database_access = cache_model.database_access
+
+    # A second connection only sees the committed rows
+    connection = sqlite3.connect(sqlite_config['SQLITE']['path'])
+
+    def committed_count():
+        return connection.execute('SELECT COUNT(*) FROM publication_cache').fetchone()[0]
+
+    cache_model.insert(_scopus_publication(301))
+    cache_model.insert(_scopus_publication(302))
+    assert database_access.pending_operations == 2
+    assert committed_count() == 0
+    # The own connection already sees the pending rows
+    assert sorted(cache_model.select_all_ids()) == [301, 302]
+
+    cache_model.insert(_scopus_publication(303))
+    assert database_access.pending_operations == 0
+    assert committed_count() == 3
+
+    cache_model.insert(_scopus_publication(304))
+    cache_model.save()
+    assert committed_count() == 4
+
+    # All the access objects of a thread share the transaction of its connection. A failing bulk statement only rolls
+    # back its own rows and keeps the pending operations of the others
+    cache_model.insert(_scopus_publication(305))
+    other_access = SQLiteDatabaseAccess()
+    assert other_access.pending_operations == 1
+    with pytest.raises(sqlite3.IntegrityError):
+        other_access.execute_many('INSERT INTO publication_cache (scopus_id) VALUES (%s)', [(306, ), (306, )])
+    assert database_access.pending_operations == 1
+    cache_model.save()
+    assert committed_count() == 5
+    assert sorted(cache_model.select_all_ids()) == [301, 302, 303, 304, 305]
+    connection.close()
+
+
+def test_database_connection_pool(sqlite_config):
+    sqlite_config.read_dict({'DATABASE': {'pool_size': '2', 'health_check_interval': '0'}})
+    cache_model = ScopusPublicationDatabaseCacheModel()
+    database_access = cache_model.database_access
+    pool = SQLiteDb.get_instance()
+
+    # Every thread works with its own connection and in its own transaction
+    connection_dict = {}
+    barrier = threading.Barrier(2)
+
+    def insert(scopus_id):
+        connection_dict[scopus_id] = database_access.db
+        barrier.wait()
+        cache_model.insert(_scopus_publication(scopus_id))
+        database_access.release()
+
+    thread_list = [threading.Thread(target=insert, args=(scopus_id, )) for scopus_id in (501, 502)]
+    for thread in thread_list:
+        thread.start()
+    for thread in thread_list:
+        thread.join()
+    assert connection_dict[501] is not connection_dict[502]
+    assert len(pool.checkout_dict) == 0
+    # The released transactions have been committed
+    assert sorted(cache_model.select_all_ids()) == [501, 502]
+
+    # A connection, that failed the health check is replaced
+    connection = database_access.db
+    connection.close()
+    assert database_access.db is not connection
+    assert cache_model.contains(501)
+
+    # The uncommitted operations of the access objects, which share the connection, are not discarded silently
+    cache_model.insert(_scopus_publication(503))
+    with pytest.raises(RuntimeError):
+        pool.reconnect()
+    with pytest.raises(RuntimeError):
+        pool.release()
+    database_access.release()
+    assert len(pool.checkout_dict) == 0
+    assert cache_model.contains(503)
+
+
+def test_write_behind_queue(cache_controller):
+    write_queue = WriteBehindQueue(queue_size=4, batch_size=2, linger_seconds=0.1)
+    write_queue.register(
+        'publication_cache',
+        cache_controller.insert_multiple_publications,
+        cache_controller.save
+    )
+    batch_list = []
+    write_queue.register('batch', batch_list.append, lambda: None)
+
+    for scopus_id in range(601, 606):
+        write_queue.put('publication_cache', _scopus_publication(scopus_id))
+        write_queue.put('batch', scopus_id)
+    write_queue.flush()
+    # The writes were committed with the connection of the writing thread
+    assert sorted(cache_controller.select_all_publication_ids()) == list(range(601, 606))
+    assert sum(map(len, batch_list)) == 5
+    assert max(map(len, batch_list)) <= 2
+
+    # The calling thread commits its pending operations first, otherwise the writing thread would wait for the lock
+    cache_controller.insert_publication(_scopus_publication(606))
+    write_queue.put('publication_cache', _scopus_publication(607))
+    write_queue.flush()
+    assert cache_controller.publication_cache_model.database_access.pending_operations == 0
+    assert 607 in cache_controller.select_all_publication_ids()
+
+    # The exception of a failed write is raised in the calling thread
+    def fail(item_list): raise ValueError('write failed')
+    write_queue.register('fail', fail, lambda: None)
+    write_queue.put('fail', 1)
+    with pytest.raises(ValueError):
+        write_queue.flush()
+    write_queue.close()
+    assert not write_queue.is_alive()
+
+    # Nothing writes the items of a closed queue, so that they are refused instead of being lost
+    with pytest.raises(RuntimeError):
+        write_queue.put('batch', 608)
+    with pytest.raises(RuntimeError):
+        write_queue.flush()
+    assert write_queue.queue.empty()
+    write_queue.close()
+
+    # Without the thread the items are written right away
+    write_queue = WriteBehindQueue(enabled=False)
+    write_queue.register('batch', batch_list.append, lambda: None)
+    write_queue.put('batch', 606)
+    assert batch_list[-1] == [606]
+
+
+def test_id_index():
+    for bloom_filter in (False, True):
+        id_index = IdIndex([5, 3, 3, 9], bloom_filter=bloom_filter, merge_size=2)
+        assert len(id_index) == 3
+        assert 3 in id_index and 4 not in id_index
+
+        id_index.add_multiple([4, 10, 4])
+        assert len(id_index.pending_set) == 0
+        assert list(id_index) == [3, 4, 5, 9, 10]
+        id_index.add(2 ** 40)
+        assert 2 ** 40 in id_index
+
+        id_index.remove(9)
+        assert 9 not in id_index
+        assert id_index.difference([1, 3, 1, 9, 10]) == [1, 9]
+
+
+def test_cache_id_index(cache_controller):
+    cache_controller.insert_multiple_publications(list(map(_scopus_publication, [701, 702])))
+    assert cache_controller.missing_publication_ids([701, 703, 703]) == [703]
+
+    # Once loaded, the index answers without querying the model
+    cache_controller.publication_cache_model.select_all_ids = None
+    cache_controller.insert_publication(_scopus_publication(703))
+    cache_controller.publication_lru.clear()
+    assert cache_controller.contains_publication(703)
+    assert not cache_controller.contains_publication(704)
+    assert cache_controller.missing_publication_ids([701, 702, 703, 704]) == [704]
+
+    cache_controller.wipe()
+    assert not cache_controller.contains_publication(701)
+
+
+def test_select_by_secondary_ids(cache_controller):
+    cache_controller.insert_multiple_publications(list(map(_scopus_publication, [901, 902])))
+    assert int(cache_controller.select_by_eid('2-s2.0-902')) == 902
+    assert cache_controller.select_by_doi('10.1000/903') is None
+    publication_list = cache_controller.select_multiple_by_doi(['10.1000/902', '', '10.1000/901'])
+    assert [x if x is None else int(x) for x in publication_list] == [902, None, 901]
+
+    backup_controller = ScopusBackupController()
+    backup_controller.insert_multiple_publications([_scopus_publication(903)])
+    assert int(backup_controller.select_by_doi('10.1000/903')) == 903
+    assert backup_controller.select_multiple_by_eid(['2-s2.0-901']) == [None]
+
+
+def test_citation_graph(sqlite_config):
+    graph = CitationGraph([11, 12, 11], [1, 1, 2], merge_size=2)
+    assert graph.citing_ids(1) == [11, 12]
+    assert graph.cited_ids(11) == [1, 2]
+    assert len(graph) == 3
+
+    # Replacing a row and adding edges, before and after the merge of the pending rows
+    assert graph.replace_citations(1, [12, 13]) == [13]
+    assert graph.cited_ids(11) == [2]
+    assert graph.cited_ids(13) == [1]
+    assert graph.add_edges([(14, 3), (11, 2)]) == [(14, 3)]
+    assert len(graph.pending_dict) == 0
+    assert graph.citing_ids_multiple([1, 3]) == [12, 13, 14]
+    assert graph.missing_edges([(11, 1), (12, 1)]) == [(11, 1)]
+
+    # The edges are stored in the citation table and loaded by a new controller
+    graph_controller = ScopusCitationGraphController(merge_size=2)
+    publication_list = [_scopus_publication(21, citation_list=[31, 32]), _scopus_publication(22, citation_list=[31])]
+    assert graph_controller.insert_publications(publication_list) == [(31, 21), (32, 21), (31, 22)]
+    assert graph_controller.insert_publications(publication_list[:1]) == []
+    graph_controller.save()
+    graph_controller = ScopusCitationGraphController()
+    assert graph_controller.cited_ids(31) == [21, 22]
+    assert graph_controller.missing_citing_ids(21, [31]) == [32]
+
+    # A failed write of the table neither changes the graph nor deletes the old edges, so that a retry writes them
+    database_access = graph_controller.relation_model.database_access
+    execute_many = database_access.execute_many
+
+    def failing_execute_many(sql, parameter_list, chunk_size=None):
+        database_access.execute_many = execute_many
+        raise sqlite3.OperationalError('disk I/O error')
+
+    database_access.execute_many = failing_execute_many
+    with pytest.raises(sqlite3.OperationalError):
+        graph_controller.insert_publications([_scopus_publication(21, citation_list=[33])])
+    assert graph_controller.citing_ids(21) == [31, 32]
+    assert sorted(graph_controller.relation_model.select_citation_arrays()[0]) == [31, 31, 32]
+    assert graph_controller.insert_publications([_scopus_publication(21, citation_list=[33])]) == [(33, 21)]
+    graph_controller.save()
+    assert graph_controller.cited_ids(33) == [21]
+    assert sorted(ScopusCitationGraphController().citing_ids(21)) == [33]
+
+    graph_controller.wipe()
+    assert graph_controller.citing_ids(21) == []
+
+
+def test_cache_eviction(sqlite_config):
+    sqlite_config.read_dict({'CACHE': {'publication_capacity': '4', 'eviction_fraction': '0.25'}})
+    cache_controller = ScopusCacheController(
+        ScopusPublicationDatabaseCacheModel,
+        ScopusAuthorDatabaseCacheModel,
+        ScopusPublicationRelationModel
+    )
+    cache_controller.add_pin_function(lambda: [802])
+    cache_controller.insert_multiple_publications(list(map(_scopus_publication, range(801, 807))))
+
+    now = datetime.datetime.now().replace(microsecond=0)
+    timestamp_model = cache_controller.publication_cache_model.timestamp_model
+    timestamp_model.update_fetched_at(range(801, 807), now - datetime.timedelta(days=10))
+    timestamp_model.update_last_accessed({
+        801: now - datetime.timedelta(days=5),
+        802: now - datetime.timedelta(days=4),
+        803: now - datetime.timedelta(days=3),
+        804: now, 805: now,
+        806: now - datetime.timedelta(days=6)
+    })
+    # Fetching an entry again counts as a use, even though it was last read long before
+    timestamp_model.update_fetched_at([806], now)
+    cache_controller.save()
+
+    # Evicted down to the low water mark of 3, skipping the pinned publication
+    assert sorted(cache_controller.select_all_publication_ids()) == [802, 805, 806]
+    assert not cache_controller.contains_publication(801)
+    assert cache_controller.relation_model.select_cited_ids(801) == []
+    statistics = cache_controller.statistics['eviction']
+    assert statistics['evicted'] == 3 and statistics['runs'] == 1 and statistics['pinned'] == 1
+
+    cache_controller.save()
+    assert cache_controller.statistics['eviction']['runs'] == 1
+
+
+def test_cache_snapshot(cache_controller, tmp_path):
+    cache_controller.insert_multiple_publications(list(map(_scopus_publication, range(901, 906))))
+    cache_controller.insert_multiple_author_profiles([ScopusAuthorProfile(1, 'Max', 'Mustermann', 13, 7, 2, [901])])
+    old_datetime = datetime.datetime(2017, 1, 1)
+    cache_controller.publication_cache_model.timestamp_model.update_fetched_at([901], old_datetime)
+    cache_controller.save()
+
+    snapshot_controller = ScopusCacheSnapshotController(cache_controller, block_size=2)
+    path = str(tmp_path / 'cache.snapshot')
+    assert snapshot_controller.export_snapshot(path) == {'publications': 5, 'authors': 1}
+    delta_path = str(tmp_path / 'delta.snapshot')
+    count_dict = snapshot_controller.export_snapshot(delta_path, datetime.datetime(2018, 1, 1))
+    assert count_dict == {'publications': 4, 'authors': 1}
+    assert snapshot_controller.verify_snapshot(delta_path)['kind'] == 'delta'
+
+    cache_controller.wipe()
+    assert snapshot_controller.import_snapshot(path) == {'publications': 5, 'authors': 1}
+    assert sorted(cache_controller.select_all_publication_ids()) == list(range(901, 906))
+    assert cache_controller.lookup_author_profile(1).publications == [901]
+    # The fetched at times are restored from the snapshot
+    assert cache_controller.publication_cache_model.timestamp_model.select([901])[901][0] == old_datetime
+    assert cache_controller.lookup_publication(901, datetime.timedelta(days=30)) is CACHE_MISS
+
+    # The entries, of which the cache has a newer version, are skipped
+    cache_controller.insert_publication(_scopus_publication(902, title='Newer title'))
+    newer_datetime = datetime.datetime.now().replace(microsecond=0) + datetime.timedelta(days=1)
+    cache_controller.publication_cache_model.timestamp_model.update_fetched_at([902], newer_datetime)
+    cache_controller.save()
+    assert snapshot_controller.import_snapshot(path) == {'publications': 4, 'authors': 1}
+    cache_controller.publication_lru.clear()
+    assert cache_controller.select_publication(902).title == 'Newer title'
+    assert cache_controller.publication_cache_model.timestamp_model.select([902])[902][0] == newer_datetime
+
+    # A corrupted snapshot is not imported at all
+    with open(path, mode='r+b') as file:
+        file.seek(-40, 2)
+        file.write(b'corrupted')
+    cache_controller.wipe()
+    with pytest.raises(ValueError):
+        snapshot_controller.import_snapshot(path)
+    assert cache_controller.select_all_publication_ids() == []
+
+
+def test_cache_iter_all(cache_controller):
+    cache_controller.insert_multiple_publications(list(map(_scopus_publication, range(401, 406))))
+    publication_list = list(cache_controller.iter_all_publications(fetch_size=2))
+    assert sorted(map(int, publication_list)) == list(range(401, 406))
+    assert publication_list[0].title == 'Sample publication title'
+    # Closing the generator early also closes the cursor
+    publication_iterator = cache_controller.iter_all_publications(fetch_size=2)
+    next(publication_iterator)
+    publication_iterator.close()
+    assert len(list(cache_controller.iter_all_author_profiles())) == 0
+
+
+def test_sqlite_timestamp_migration(sqlite_config):
+    # A database file of a version without the fetch times
+    connection = sqlite3.connect(sqlite_config['SQLITE']['path'])
+    connection.execute('CREATE TABLE publication_cache (scopus_id BIGINT PRIMARY KEY, eid TEXT, doi TEXT);')
+    connection.execute('INSERT INTO publication_cache (scopus_id) VALUES (801);')
+    connection.commit()
+    connection.close()
+
+    # The existing entries count as fetched at the time of the migration and do not expire right away
+    timestamp_model = ScopusPublicationDatabaseCacheModel().timestamp_model
+    fetched_at = timestamp_model.select([801])[801][0]
+    assert datetime.datetime.now() - fetched_at < datetime.timedelta(minutes=1)
+
+
+def test_cache_time_to_live(cache_controller):
+    max_age = datetime.timedelta(days=1)
+    cache_controller.insert_multiple_publications([_scopus_publication(501), _scopus_publication(502)])
+    assert int(cache_controller.lookup_publication(501, max_age)) == 501
+
+    # Letting the entries age by moving the fetch time back
+    fetched_at = datetime.datetime.now().replace(microsecond=0) - datetime.timedelta(hours=23)
+    cache_controller.publication_cache_model.timestamp_model.update_fetched_at([501, 502], fetched_at)
+    cache_controller.publication_lru.clear()
+    assert int(cache_controller.lookup_publication(501, max_age)) == 501
+    assert cache_controller.lookup_publication(501, datetime.timedelta(hours=12)) is CACHE_MISS
+
+    # Only the publication read since it was fetched is hot and due within the margin of two hours
+    refresh_id_list = cache_controller.select_refresh_publication_ids(max_age, datetime.timedelta(hours=2))
+    assert refresh_id_list == [501]
+    assert cache_controller.select_refresh_publication_ids(max_age, datetime.timedelta(minutes=30)) == []
+
+    # Fetching the unchanged publication again renews the entry
+    assert not cache_controller.insert_publication(_scopus_publication(501))
+    assert cache_controller.select_refresh_publication_ids(max_age, datetime.timedelta(hours=2)) == []
+    timestamp_dict = cache_controller.publication_cache_model.timestamp_model.select([501, 502])
+    assert timestamp_dict[501][0] > fetched_at
+    assert timestamp_dict[502][0] == fetched_at
+
+
+def test_cache_refresh_worker():
+    from ScopusWp.scopus.controller import ScopusCacheRefreshWorker
+
+    class PublicationSource:
+
+        def get_publication(self, scopus_id):
+            return _scopus_publication(scopus_id)
+
+    refresh_worker = ScopusCacheRefreshWorker(PublicationSource())
+    refresh_worker.start()
+    assert refresh_worker.schedule(ScopusCacheRefreshWorker.PUBLICATION, [601, 602]) == 2
+    assert refresh_worker.schedule(ScopusCacheRefreshWorker.PUBLICATION, [601]) == 0
+
+    publication_list = []
+    for _ in range(100):
+        publication_list += refresh_worker.drain()[0]
+        if len(publication_list) == 2:
+            break
+        time.sleep(0.01)
+    refresh_worker.stop(timeout=5)
+    assert sorted(map(int, publication_list)) == [601, 602]
+    assert not refresh_worker.is_alive()
+
+
+def test_cache_pipeline(cache_controller, sqlite_config):
+    from ScopusWp.scopus.controller import ScopusCachePipeline
+
+    request_list = []
+    publication_id_dict = {10: [100, 101], 11: [110]}
+
+    class ScopusSource:
+
+        def get_author_profile(self, author_id):
+            request_list.append(('author', author_id))
+            return ScopusAuthorProfile(author_id, 'Max', 'Mustermann', 1, 1, 2, publication_id_dict[author_id])
+
+        def get_publication(self, scopus_id):
+            request_list.append(('publication', scopus_id))
+            if scopus_id == 666:
+                raise ConnectionError('request failed')
+            return _scopus_publication(scopus_id, citation_list=[scopus_id + 1, 666])
+
+    class TopController:
+
+        def __init__(self):
+            self.cache_controller = cache_controller
+            self.citation_graph_controller = ScopusCitationGraphController()
+            self.write_queue = WriteBehindQueue(queue_size=2, batch_size=2, linger_seconds=0.01)
+            self.write_queue.register('publication_cache', cache_controller.insert_multiple_publications,
+                                      cache_controller.save)
+            self.write_queue.register('author_cache', cache_controller.insert_multiple_author_profiles,
+                                      cache_controller.save)
+
+    # The publication 100 is cached already and 101 is both published by an observed author and citing one
+    cache_controller.insert_publication(_scopus_publication(100, citation_list=[101]))
+    top_controller = TopController()
+    sqlite_config['PIPELINE'] = {'queue_size': '1', 'publications_concurrency': '3'}
+    pipeline = ScopusCachePipeline(top_controller, scopus_controller_class=ScopusSource)
+    statistics = pipeline.run([10, 11])
+    top_controller.write_queue.close()
+
+    assert statistics['publications'] == {'processed': 3, 'failed': 0}
+    assert statistics['citation_publications'] == {'processed': 2, 'failed': 1}
+    assert sorted(cache_controller.select_all_publication_ids()) == [100, 101, 102, 110, 111]
+    assert cache_controller.contains_author_profile(11)
+    # Every publication is requested only once and the cached one is not requested at all
+    publication_request_list = [x[1] for x in request_list if x[0] == 'publication']
+    assert sorted(publication_request_list) == [101, 102, 110, 111, 666]
+
+    # The failed writes are no failures of the stages, but make the run fail
+    def fail(item_list): raise ValueError('write failed')
+    top_controller = TopController()
+    top_controller.write_queue.register('publication_cache', fail, cache_controller.save)
+    pipeline = ScopusCachePipeline(
+        top_controller,
+        load_citations=False,
+        reload=True,
+        scopus_controller_class=ScopusSource
+    )
+    with pytest.raises(ValueError):
+        pipeline.run([10, 11])
+    top_controller.write_queue.close()
+    assert pipeline.statistics['publications'] == {'processed': 3, 'failed': 0}
+
+
+def test_citation_closure(cache_controller, sqlite_config):
+    from ScopusWp.scopus.controller import ScopusCitationClosureCrawler
+
+    citation_dict = {100: [101], 101: [102, 103], 102: [104], 103: [], 104: [105]}
+    request_list = []
+
+    class ScopusSource:
+
+        def get_publication(self, scopus_id):
+            request_list.append(scopus_id)
+            return _scopus_publication(scopus_id, citation_list=citation_dict[scopus_id])
+
+    class TopController:
+
+        def __init__(self):
+            self.cache_controller = cache_controller
+            self.citation_graph_controller = ScopusCitationGraphController()
+            self.write_queue = WriteBehindQueue(batch_size=2, linger_seconds=0.01)
+            self.write_queue.register('publication_cache', cache_controller.insert_multiple_publications,
+                                      cache_controller.save)
+
+    cache_controller.insert_publication(_scopus_publication(100, citation_list=[101]))
+    top_controller = TopController()
+    crawler = ScopusCitationClosureCrawler(top_controller, max_depth=2, scopus_controller_class=ScopusSource)
+    assert crawler.run([100, 100]) == {100: 0, 101: 1, 102: 2, 103: 2}
+    assert sorted(request_list) == [101, 102, 103]
+    assert sorted(cache_controller.select_all_publication_ids()) == [100, 101, 102, 103]
+
+    # The size limit stops the walk within a depth, the publications already cached are not requested again
+    crawler = ScopusCitationClosureCrawler(top_controller, max_depth=5, max_size=5,
+                                           scopus_controller_class=ScopusSource)
+    assert crawler.run([100]) == {100: 0, 101: 1, 102: 2, 103: 2, 104: 3}
+    assert sorted(request_list) == [101, 102, 103, 104]
+    top_controller.write_queue.close()
+
+    # A failed write makes the walk fail
+    def fail(item_list): raise ValueError('write failed')
+    top_controller = TopController()
+    top_controller.write_queue.register('publication_cache', fail, cache_controller.save)
+    crawler = ScopusCitationClosureCrawler(top_controller, reload=True, scopus_controller_class=ScopusSource)
+    with pytest.raises(ValueError):
+        crawler.run([100])
+    top_controller.write_queue.close()
+
+
+def test_temp_sequence_journal(tmp_path):
+    def name_function(obj): return list(obj.keys())[0]
+    temp_list = TempPersistentSequenceModel('test', str(tmp_path), name_function, sync_interval=2)
+    temp_list.load()
+    for index in range(5):
+        temp_list.append({'key{}'.format(index % 3): index})
+    temp_list.close()
+
+    # Simulating a crash during the write of the last record
+    journal_path = tmp_path / 'test.journal'
+    with journal_path.open(mode='ab') as file:
+        file.write(b'\x00\x00\x01\x00garbage')
+
+    temp_list = TempPersistentSequenceModel('test', str(tmp_path), name_function)
+    temp_list.load()
+    assert len(temp_list) == 5
+    assert list(temp_list) == [{'key0': 0}, {'key1': 1}, {'key2': 2}, {'key0': 3}, {'key1': 4}]
+
+    temp_list.compact()
+    assert list(temp_list) == [{'key2': 2}, {'key0': 3}, {'key1': 4}]
+    temp_list.append({'key3': 5})
+    assert len(temp_list) == 4
+    assert list(temp_list)[-1] == {'key3': 5}
+    temp_list.close()
+
+
+def test_crawl_journal(tmp_path, monkeypatch):
+    from ScopusWp.scopus.controller import ScopusCrawl
+
+    config = configparser.ConfigParser()
+    config.read_dict({'CRAWL': {'max_retries': '2', 'backoff_seconds': '0'}})
+    monkeypatch.setattr(Config, '_instance', config)
+    attempt_list = []
+
+    def crawl_function(_id):
+        attempt_list.append(_id)
+        if _id == 3 or (_id == 2 and attempt_list.count(2) < 2):
+            raise ConnectionError('connection lost')
+        return _id * 10
+
+    # The id 2 succeeds with the first retry, the id 3 keeps failing
+    crawl = ScopusCrawl('test', crawl_function, folder_path=str(tmp_path))
+    assert crawl.run([1, 2, 3, 1]) == {1: 10, 2: 20}
+    assert attempt_list == [1, 2, 3, 2, 3, 3]
+
+    # The state is replayed from the journal and the resume only retries the failed id
+    journal = ScopusCrawlJournal('test', str(tmp_path))
+    journal.load()
+    assert journal.planned_ids() == [1, 2, 3]
+    assert journal.failures[3][0] == 3
+    journal.close()
+
+    attempt_list.clear()
+    crawl = ScopusCrawl('test', lambda x: x * 10, lambda x: [y for y in x if y != 2], folder_path=str(tmp_path))
+    assert crawl.resume() == {1: 10, 2: 20, 3: 30}
+    assert not (tmp_path / 'crawl_test.journal').exists()
+
+    crawl = ScopusCrawl('parallel', lambda x: x * 10, folder_path=str(tmp_path), concurrency=3)
+    assert crawl.run(list(range(20))) == {x: x * 10 for x in range(20)}
+
+
+def test_progress_reporter(tmp_path):
+    from ScopusWp.progress import ProgressReporter
+
+    class Stream(io.StringIO):
+
+        def isatty(self):
+            return True
+
+    class Response:
+
+        def __init__(self, status_code, headers):
+            self.status_code = status_code
+            self.headers = headers
+
+    status_path = tmp_path / 'status.json'
+    stream = Stream()
+    reporter = ProgressReporter(str(status_path), interval=0.05, rate_window=10, stream=stream)
+
+    # The rate is measured between the samples taken with every status
+    task = reporter.task('load', 10)
+    task.status(now=task.started)
+    task.advance(4)
+    task_dict = task.status(now=task.started + 2)
+    assert task_dict['rate'] == 2
+    assert task_dict['eta'] == 3
+    task.add_total(2)
+    task.advance(failed=True)
+    task_dict = task.status(now=task.started + 3)
+    assert (task_dict['completed'], task_dict['failed'], task_dict['total']) == (5, 1, 12)
+    assert task_dict['eta'] == 7 / (5 / 3)
+
+    reporter.request_started()
+    reporter.request_started()
+    reporter.request_finished(Response(200, {'X-RateLimit-Limit': '20000', 'X-RateLimit-Remaining': '19998'}))
+    reporter.record_cache(True, 3)
+    reporter.record_cache(False)
+
+    # The status file is rewritten by the thread while the task is running
+    time.sleep(0.2)
+    status_dict = json.loads(status_path.read_text())
+    assert status_dict['requests'] == {'in_flight': 1, 'total': 1, 'failed': 0}
+    assert status_dict['quota']['remaining'] == 19998
+    assert status_dict['cache']['hit_rate'] == 0.75
+    assert status_dict['tasks'][0]['name'] == 'load'
+    assert 'load 5/12' in stream.getvalue()
+    assert 'quota 19998/20000 | cache 75%' in stream.getvalue()
+
+    # Finishing the last task stops the thread after a last report
+    reporter.request_finished(None)
+    task.finish()
+    assert reporter.thread is None
+    status_dict = json.loads(status_path.read_text())
+    assert status_dict['tasks'][0]['finished']
+    assert status_dict['requests'] == {'in_flight': 0, 'total': 2, 'failed': 1}
+    assert stream.getvalue().endswith('\n')
+
+
+def test_cache_json_columns(cache_controller):
+    publication = _scopus_publication(701, title='The "quoted" title of O\'Brien')
+    cache_controller.insert_publication(publication)
+    cache_controller.publication_lru.clear()
+    cached_publication = cache_controller.select_publication(701)
+    assert cached_publication.title == publication.title
+    assert cached_publication.content_hash == publication.content_hash
+
+    # The json columns are stored as valid json and the old format with single quotes can still be loaded
+    database_access = cache_controller.publication_cache_model.database_access
+    row_list = database_access.select('SELECT authors FROM publication_cache WHERE scopus_id=%s', (701, ))
+    authors_json_string = row_list[0][0]
+    assert json.loads(authors_json_string)[0]['first_name'] == 'Max'
+    assert json_column(authors_json_string.replace('"', "'")) == json.loads(authors_json_string)
+
+    # The statements are parameterized, so the same statement is reused for different ids
+    statement_amount = len(database_access.statement_cache)
+    cache_controller.publication_cache_model.select(702)
+    cache_controller.publication_cache_model.select(703)
+    assert len(database_access.statement_cache) <= statement_amount + 1
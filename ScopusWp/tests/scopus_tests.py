@@ -4,6 +4,12 @@ from ScopusWp.scopus.data import ScopusAuthorObservation
 from ScopusWp.scopus.scopus import ScopusAffiliationController
 from ScopusWp.scopus.scopus import ScopusAuthorController
 from ScopusWp.scopus.scopus import ScopusPublicationController
+from ScopusWp.scopus.scopus import ScopusAuthorAffiliationFetcher
+
+from ScopusWp.config import Config
+
+import configparser
+import json
 
 import pytest
 
@@ -123,6 +129,71 @@ def test_scopus_publication_contains_keyword(scopus_publication_sample):
     assert scopus_publication.contains_keyword('apple')
 
 
+def _scopus_publication(title, citation_list):
+    scopus_publication = ScopusPublication(
+        31415,
+        '2e1234567',
+        '2k-str.9876',
+        title,
+        'Sample publication description',
+        '12-12-17',
+        ScopusAuthor('Max', 'Mustermann', 1, [12]),
+        [
+            ScopusAuthor('Max', 'Mustermann', 1, [12]),
+            ScopusAuthor('Karl', 'Weber', 3, [56])
+        ],
+        citation_list,
+        ['keyword', 'apple'],
+        'nature',
+        '12'
+    )
+    return scopus_publication
+
+
+def test_scopus_publication_content_hash():
+    # Tests if the content hash does not depend on the order of the citations, but changes with the content
+    scopus_publication = _scopus_publication('Sample publication title', [345, 897, 675])
+    reordered_publication = _scopus_publication('Sample publication title', [675, 345, 897])
+    changed_publication = _scopus_publication('Another publication title', [345, 897, 675])
+    assert scopus_publication.content_hash == reordered_publication.content_hash
+    assert scopus_publication.content_hash != changed_publication.content_hash
+    assert len(scopus_publication.content_hash) == 32
+
+
+def test_scopus_author_affiliation_fetcher(monkeypatch):
+    # Tests the collection of the affiliations from the pages of the search results, without requesting them
+    config = configparser.ConfigParser()
+    config.read_dict({'SCOPUS': {'url': 'https://api.elsevier.com/content', 'api_key': ''}})
+    monkeypatch.setattr(Config, '_instance', config)
+
+    page_list = [
+        [
+            {'author': [{'authid': '7', 'afid': [{'$': '601'}, {'$': '602'}]}, {'authid': '8', 'afid': {'$': '609'}}]},
+            {'author': [{'authid': '7', 'afid': {'$': '602'}}]}
+        ],
+        [
+            {'author': [{'authid': '7', 'afid': {'$': '603'}}]}
+        ]
+    ]
+
+    class Response:
+
+        def __init__(self, entry_list):
+            self.text = json.dumps({'search-results': {
+                'entry': entry_list,
+                'opensearch:totalResults': '3',
+                'opensearch:itemsPerPage': str(len(entry_list))
+            }})
+
+    class PageFetcher(ScopusAuthorAffiliationFetcher):
+
+        def request_publication_search(self, start_index):
+            assert self.VIEW == 'COMPLETE'
+            return Response(page_list[0 if start_index == 0 else 1])
+
+    assert PageFetcher(7).fetch() == ['601', '602', '603']
+
+
 def test_scopus_author_observation_whitelist_contains(scopus_author_observation_sample):
     scopus_author_observation = scopus_author_observation_sample  # type: ScopusAuthorObservation
     assert scopus_author_observation.whitelist_contains(23)
@@ -18,6 +18,9 @@ setup(
         'tabulate>=0.8',
         'python-wordpress-xmlrpc>=2.3'
     ],
+    extras_require={
+        'lmdb': ['lmdb>=0.94']
+    },
     python_requires='>=3, <4',
     package_data={
         '': []